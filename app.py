@@ -1,36 +1,99 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from werkzeug.utils import secure_filename
 import os
-import hashlib
 from web3 import Web3
 import json
 from datetime import datetime
 import uuid
 import config
+import indexer
+import batch_reads
+import registration_queue
+import nonce_manager
+import signer
+import batch_submitter
+import registry_client
+import read_cache
+import upload_stream
+import blob_store
+import chunked_upload
+import rate_limit
+import merkle_anchor
+import similarity
+import metrics
+import fee_oracle
 
 app = Flask(__name__)
+# Uploads are hashed while the request body is parsed
+app.request_class = upload_stream.HashingRequest
 app.secret_key = 'your-secret-key-change-this'
 app.config['UPLOAD_FOLDER'] = config.UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_FILE_SIZE
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
+# Initialize Web3 (one pooled connection per process)
+w3 = registry_client.get_web3()
+
+# Local read replica (None if disabled)
+work_index = indexer.open_index()
+
+# Keystore account, decrypted once and kept for SIGNER_TTL seconds
+account_signer = signer.get_signer()
+
+# Submitted registrations awaiting confirmation
+registrations = registration_queue.RegistrationQueue()
+
+# Cache for immutable view calls (None if disabled)
+view_cache = read_cache.open_cache()
+
+# Uploaded files, stored once per content hash
+blobs = blob_store.BlobStore()
+
+# Resumable chunked uploads of large files (/api/uploads)
+uploads = chunked_upload.UploadStore()
+
+# Inclusion proofs of works anchored under a Merkle root (None if never used)
+anchor_store = merkle_anchor.open_store()
+
+# Perceptual fingerprints for near-duplicate warnings (None if disabled)
+similar_index = similarity.open_index()
+
+# Per-client limits for the bulk verification API
+api_limiter = rate_limit.ClientLimiter(
+    config.VERIFY_API_RATE, config.VERIFY_API_BURST, config.VERIFY_API_MAX_INFLIGHT
+)
 
 def get_contract():
-    """Get contract instance"""
-    if not config.CONTRACT_ADDRESS:
-        return None
-    with open(config.ABI_FILE, "r") as f:
-        abi = json.load(f)
-    return w3.eth.contract(address=config.CONTRACT_ADDRESS, abi=abi)
-
-def calculate_file_hash(filepath):
-    """Calculate SHA-256 hash"""
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    """Get contract instance (built once per process, None if not deployed)"""
+    return registry_client.get_contract(w3, cache=view_cache)
+
+@app.before_request
+def start_request_trace():
+    """Collect this request's phases and RPC calls for /metrics"""
+    if config.METRICS_ENABLED:
+        metrics.start_trace(request.endpoint or 'unmatched')
+
+@app.after_request
+def finish_request_trace(response):
+    trace = metrics.finish_trace(request.method, response.status_code)
+    if trace:
+        if config.METRICS_TIMING_HEADER:
+            response.headers['Server-Timing'] = trace.server_timing()
+        if config.METRICS_SLOW_REQUEST and trace.elapsed > config.METRICS_SLOW_REQUEST:
+            print(f"⚠️ Slow request {request.method} {request.path} {trace.elapsed:.3f}s: {trace.summary()}")
+    return response
+
+@app.teardown_request
+def count_unhandled_error(error):
+    if error is not None:
+        metrics.record_error(error)
+        metrics.finish_trace(request.method, 500)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    if not config.METRICS_ENABLED:
+        return jsonify({'error': 'metrics disabled'}), 404
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/')
 def index():
@@ -41,17 +104,30 @@ def index():
 def register():
     """Register work page"""
     if request.method == 'POST':
-        # Check file uploaded
-        if 'file' not in request.files:
-            flash('No file uploaded', 'error')
-            return redirect(request.url)
-        
-        file = request.files['file']
-        if file.filename == '':
-            flash('No file selected', 'error')
-            return redirect(request.url)
+        # Parsing the body receives and hashes the upload
+        with metrics.phase('upload'):
+            upload_id = request.form.get('upload_id')
+        upload = None
+        if upload_id:
+            # Large file sent ahead in chunks through /api/uploads
+            upload = uploads.get(upload_id)
+            if not upload or not upload['complete']:
+                flash('Upload not found or not finished', 'error')
+                return redirect(request.url)
+            original_filename = upload['filename']
+        else:
+            # Check file uploaded
+            if 'file' not in request.files:
+                flash('No file uploaded', 'error')
+                return redirect(request.url)
+            
+            file = request.files['file']
+            if file.filename == '':
+                flash('No file selected', 'error')
+                return redirect(request.url)
+            original_filename = file.filename
         
-        if not config.allowed_file(file.filename):
+        if not config.allowed_file(original_filename):
             flash('File type not allowed', 'error')
             return redirect(request.url)
         
@@ -61,17 +137,13 @@ def register():
         metadata = request.form.get('metadata', '')
         account_password = request.form.get('account_password')
         
+        # The password authorizes every registration, even while the signer is unlocked
         if not all([work_title, work_type, account_password]):
             flash('Please fill all required fields', 'error')
             return redirect(request.url)
         
-        # Save file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
-        
-        # Calculate hash
-        content_hash = calculate_file_hash(filepath)
+        # Hash computed while the upload (or its chunks) streamed in
+        content_hash = upload['content_hash'] if upload else upload_stream.upload_hash(file)
         
         # Check if already registered
         contract = get_contract()
@@ -80,60 +152,242 @@ def register():
             return redirect(url_for('index'))
         
         try:
-            existing_work_id = contract.functions.checkContentExists(content_hash).call()
+            with metrics.phase('duplicate_check'):
+                existing_work_id = indexer.find_work_by_hash(contract, content_hash, work_index)
+                if not existing_work_id:
+                    anchored = merkle_anchor.find_anchored(contract, anchor_store, content_hash=content_hash)
+                    if anchored and anchored[1]['valid']:
+                        existing_work_id = anchored[0]['work_id']
             if existing_work_id:
                 flash(f'This content already registered as {existing_work_id}', 'warning')
                 return redirect(url_for('verify', work_id=existing_work_id))
-        except:
-            pass
+        except Exception as e:
+            metrics.record_error(e, 'duplicate_check')
+        
+        pending_work_id = registrations.find_pending_by_hash(content_hash)
+        if pending_work_id:
+            flash(f'This content is already being registered as {pending_work_id}', 'warning')
+            return redirect(url_for('registration_status', work_id=pending_work_id))
+        
+        # Checked before the upload is touched, so a wrong password keeps a chunked upload
+        try:
+            # Decrypts the keystore only when the signer is locked; otherwise an HMAC check
+            with metrics.phase('unlock'):
+                account = account_signer.get_account(account_password)
+        except Exception as e:
+            metrics.record_error(e, 'unlock')
+            flash(f'Error: {str(e)}', 'error')
+            return redirect(request.url)
+        filename = secure_filename(original_filename)
+        
+        # Resized / re-encoded copies of registered works only warn, they don't block
+        fingerprint = None
+        with metrics.phase('fingerprint'):
+            if similar_index:
+                source = uploads.part_path(upload['upload_id']) if upload else file.stream
+                fingerprint = similarity.fingerprint_file(source, original_filename)
+            similar = find_similar(fingerprint)
+        
+        def store_file(work_id):
+            """Keep the file once its registration is queued or sent (a no-op if the blob exists)"""
+            with metrics.phase('store_blob'):
+                if upload:
+                    uploads.store(upload['upload_id'], blobs)
+                else:
+                    blobs.put(file.stream, content_hash)
+            blobs.add_ref(content_hash, work_id, filename)
         
         # Register on blockchain
         try:
-            with open(config.UTC_KEYSTORE_FILE) as keyfile:
-                encrypted_key = keyfile.read()
-                private_key = w3.eth.account.decrypt(encrypted_key, account_password)
-            
-            account = w3.eth.account.from_key(private_key)
             work_id = f"WORK-{uuid.uuid4().hex[:8].upper()}"
             
-            nonce = w3.eth.get_transaction_count(account.address)
+            if config.BATCH_REGISTER or config.ANCHOR_REGISTER:
+                # Sent with other queued works in the next registerWorks batch or Merkle root
+                with metrics.phase('queue'):
+                    registrations.add_queued(
+                        work_id, work_title, work_type, content_hash, metadata, account.address
+                    )
+                store_file(work_id)
+                index_fingerprint(work_id, content_hash, fingerprint, similar)
+                flash(f'Registration queued! Work ID: {work_id}', 'success')
+                return redirect(url_for('registration_status', work_id=work_id))
             
-            # Estimate gas dynamically
-            try:
-                gas_estimate = contract.functions.registerWork(
-                    work_id, work_title, work_type, content_hash, metadata
-                ).estimate_gas({'from': account.address})
-                gas_limit = int(gas_estimate * 1.2)  # Add 20% buffer
-            except Exception:
-                gas_limit = 500000  # Fallback gas limit
+            # Gaps and stuck transactions are repaired by the receipt confirmer, off the request path
+            nonces = nonce_manager.for_account(w3, account.address)
             
-            tx = contract.functions.registerWork(
-                work_id, work_title, work_type, content_hash, metadata
-            ).build_transaction({
-                'from': account.address,
-                'nonce': nonce,
-                'gas': gas_limit,
-                'gasPrice': w3.eth.gas_price,
-                'chainId': config.CHAIN_ID
-            })
+            # Gas from the argument sizes, fees from the cached head (no RPC most of the time)
+            oracle = fee_oracle.get_oracle(w3)
+            with metrics.phase('estimate_gas'):
+                gas_limit = fee_oracle.register_work_gas_limit(
+                    contract, account.address, work_id, work_title, work_type, content_hash, metadata
+                )
             
-            signed_tx = account.sign_transaction(tx)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+            with metrics.phase('gas_price'):
+                fees = oracle.fees()
             
-            # receipt.status can be 1, True, or other truthy values depending on web3 version
-            if receipt.status:
-                flash(f'Work registered successfully! Work ID: {work_id}', 'success')
-                return redirect(url_for('verify', work_id=work_id))
-            else:
-                flash(f'Transaction failed. Gas used: {receipt.gasUsed}', 'error')
+            # Reserve a nonce locally so concurrent registrations don't collide
+            nonce = nonces.allocate()
+            try:
+                with metrics.phase('sign'):
+                    tx = contract.functions.registerWork(
+                        work_id, work_title, work_type, content_hash, metadata
+                    ).build_transaction({
+                        'from': account.address,
+                        'nonce': nonce,
+                        'gas': gas_limit,
+                        'chainId': config.CHAIN_ID,
+                        **fees
+                    })
+                    
+                    signed_tx = account.sign_transaction(tx)
+                with metrics.phase('send'):
+                    tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+            except Exception:
+                nonces.release(nonce)
+                raise
+            nonces.mark_sent(nonce, tx_hash, tx)
+            
+            # Don't wait for mining here; the confirmer thread resolves the receipt
+            with metrics.phase('queue'):
+                registrations.add_pending(
+                    work_id, work_title, work_type, content_hash, metadata,
+                    account.address, Web3.to_hex(tx_hash)
+                )
+            store_file(work_id)
+            index_fingerprint(work_id, content_hash, fingerprint, similar)
+            flash(f'Registration submitted! Work ID: {work_id}', 'success')
+            return redirect(url_for('registration_status', work_id=work_id))
         
         except Exception as e:
+            metrics.record_error(e, 'register')
             flash(f'Error: {str(e)}', 'error')
         
         return redirect(request.url)
     
-    return render_template('register.html')
+    return render_template('register.html', signer_unlocked=account_signer.is_unlocked(),
+                           signer_expires_in=int(account_signer.expires_in()),
+                           chunk_size=config.UPLOAD_CHUNK_SIZE,
+                           parallel_chunks=config.UPLOAD_PARALLEL_CHUNKS,
+                           max_upload_size=config.MAX_UPLOAD_SIZE)
+
+@app.route('/api/uploads', methods=['POST'])
+def upload_create():
+    """Open a resumable upload: {"filename": ..., "size": bytes}"""
+    body = request.get_json(silent=True)
+    if (not isinstance(body, dict) or not isinstance(body.get('filename'), str)
+            or type(body.get('size')) is not int or body['size'] < 0):
+        return jsonify({'error': 'expected a JSON object with filename and size'}), 400
+    if not config.allowed_file(body['filename']):
+        return jsonify({'error': 'file type not allowed'}), 400
+    if body['size'] > config.MAX_UPLOAD_SIZE:
+        return jsonify({'error': f'files are limited to {config.MAX_UPLOAD_SIZE} bytes',
+                        'limit': config.MAX_UPLOAD_SIZE}), 413
+    return jsonify(uploads.create(body['filename'], body['size'])), 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET', 'DELETE'])
+def upload_status(upload_id):
+    """Chunks still missing from an upload, or drop it"""
+    upload = uploads.get(upload_id)
+    if not upload:
+        return jsonify({'error': 'not found'}), 404
+    if request.method == 'DELETE':
+        uploads.discard(upload_id)
+        return '', 204
+    return jsonify(upload)
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Store one chunk (raw body, optional X-Chunk-SHA256 header)"""
+    try:
+        upload = uploads.write_chunk(
+            upload_id, index, request.get_data(cache=False), request.headers.get('X-Chunk-SHA256')
+        )
+    except KeyError:
+        return jsonify({'error': 'not found'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(upload)
+
+def find_similar(fingerprint, exclude=None):
+    """Registered works resembling fingerprint, leaving out failed registrations"""
+    if not (similar_index and fingerprint):
+        return []
+    matches = []
+    for match in similar_index.similar(fingerprint):
+        registration = registrations.get(match['work_id'])
+        if match['work_id'] == exclude or (registration and registration['status'] == registration_queue.FAILED):
+            continue
+        matches.append(match)
+    return matches
+
+def index_fingerprint(work_id, content_hash, fingerprint, similar):
+    """Index a new work's fingerprint and warn about the near-duplicates found for it"""
+    if fingerprint:
+        similar_index.add(work_id, content_hash, fingerprint)
+    if similar:
+        listed = ', '.join(f"{match['work_id']} ({match['similarity']:.0%})" for match in similar[:3])
+        flash(f'Looks similar to already registered work: {listed}', 'warning')
+
+@app.route('/signer/unlock', methods=['POST'])
+def signer_unlock():
+    """Decrypt the keystore once and keep the key for SIGNER_TTL seconds"""
+    try:
+        account_signer.unlock(request.form.get('account_password', ''))
+        flash(f'Signer unlocked for {int(config.SIGNER_TTL // 60)} minutes', 'success')
+    except Exception as e:
+        flash(f'Could not unlock signer: {str(e)}', 'error')
+    return redirect(url_for('register'))
+
+@app.route('/signer/lock', methods=['POST'])
+def signer_lock():
+    """Forget the decrypted key (needs the unlock password)"""
+    try:
+        if account_signer.is_unlocked():
+            account_signer.get_account(request.form.get('account_password', ''))
+        account_signer.lock()
+        flash('Signer locked', 'success')
+    except Exception as e:
+        flash(f'Could not lock signer: {str(e)}', 'error')
+    return redirect(url_for('register'))
+
+@app.route('/registration/<work_id>')
+def registration_status(work_id):
+    """Status page for a submitted registration"""
+    registration = registrations.get(work_id)
+    if not registration:
+        flash(f'No submitted registration with ID {work_id}', 'error')
+        return redirect(url_for('index'))
+    return render_template('registration_status.html', registration=registration)
+
+@app.route('/api/registrations/<work_id>')
+def registration_status_api(work_id):
+    """JSON status of a submitted registration: queued, pending, confirmed or failed"""
+    registration = registrations.get(work_id)
+    if not registration:
+        return jsonify({'error': 'not found'}), 404
+    return jsonify(registration)
+
+@app.route('/api/proofs/<work_id>')
+def proof_api(work_id):
+    """Merkle inclusion proof of an anchored work, checked against the contract"""
+    record = anchor_store.get(work_id) if anchor_store else None
+    if not record:
+        return jsonify({'error': 'no anchored work with this ID'}), 404
+    contract = get_contract()
+    if not contract:
+        return jsonify({'error': 'contract not deployed'}), 503
+    try:
+        check = merkle_anchor.check_proof(contract, record)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+    return jsonify({**merkle_anchor.proof_bundle(record), 'check': check})
+
+@app.route('/api/cache/stats')
+def cache_stats_api():
+    """Hit/miss counters of the view-call cache"""
+    if not view_cache:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **view_cache.stats()})
 
 def normalize_hash_input(h):
     if not h:
@@ -143,6 +397,142 @@ def normalize_hash_input(h):
         h = h[2:]
     return h.lower()
 
+def work_registration_json(details):
+    """getWorkDetails tuple as a WorkRegistration object"""
+    return {
+        'work_id': details[0],
+        'title': details[1],
+        'type': details[2],
+        'content_hash': details[3],
+        'creator': details[4],
+        'timestamp': details[5],
+        'metadata': details[6],
+    }
+
+def work_details_view(details, anchor=None):
+    """Template fields of a registration (anchor: its merkle_anchor.check_proof result)"""
+    view = {
+        'work_id': details[0],
+        'title': details[1],
+        'type': details[2],
+        'content_hash': details[3],
+        'creator': details[4],
+        'timestamp': datetime.fromtimestamp(details[5]).strftime('%Y-%m-%d %H:%M:%S UTC'),
+        'metadata': details[6]
+    }
+    if anchor:
+        view['anchor_root'] = anchor['root']
+    return view
+
+def get_work_view(contract, work_id):
+    """
+    Template fields of work_id, registered in the contract or anchored under
+    a Merkle root with a valid inclusion proof; raises if neither
+    """
+    try:
+        return work_details_view(indexer.get_work_details(contract, work_id, work_index))
+    except Exception as e:
+        anchored = merkle_anchor.find_anchored(contract, anchor_store, work_id=work_id)
+        if not anchored:
+            raise
+        record, check = anchored
+        if not check['valid']:
+            raise ValueError(check['error']) from e
+        return work_details_view(merkle_anchor.to_registration(record, check), check)
+
+def resolve_verify_queries(contract, queries):
+    """
+    Yield one result per (kind, value) query, resolving BATCH_READ_SIZE
+    queries at a time with batched, cached contract reads
+    """
+    size = config.BATCH_READ_SIZE
+    check = lambda keys: batch_reads.check_contents_exist(w3, contract, keys, work_index)
+    fetch = lambda keys: batch_reads.get_works_details(w3, contract, keys, work_index)
+    for i in range(0, len(queries), size):
+        chunk = queries[i:i + size]
+        hashes = [normalize_hash_input(value) for kind, value in chunk if kind == 'content_hash']
+        found = dict(zip(hashes, read_cache.read_many(contract, 'checkContentExists', hashes, check)))
+        # Hashes stored with a 0x prefix, as the /verify form tries both
+        retry = [h for h in hashes if not found[h]]
+        if retry:
+            prefixed = ['0x' + h for h in retry]
+            found.update(zip(retry, read_cache.read_many(contract, 'checkContentExists', prefixed, check)))
+
+        work_ids = [
+            value if kind == 'work_id' else found[normalize_hash_input(value)]
+            for kind, value in chunk
+        ]
+        lookup = [work_id for work_id in dict.fromkeys(work_ids) if work_id]
+        details = dict(zip(lookup, read_cache.read_many(contract, 'getWorkDetails', lookup, fetch)))
+
+        for (kind, value), work_id in zip(chunk, work_ids):
+            registered = details.get(work_id) if work_id else None
+            result = {'query': value, 'kind': kind, 'found': bool(registered)}
+            if registered:
+                result['work'] = work_registration_json(registered)
+            yield result
+
+@app.route('/api/verify', methods=['POST'])
+def verify_bulk_api():
+    """
+    Look up many works at once. Body: {"work_ids": [...], "content_hashes": [...]}.
+    Returns {"results": [...]}, or one JSON result per line when the client
+    sends Accept: application/x-ndjson (allows larger batches).
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'expected a JSON object with work_ids and/or content_hashes'}), 400
+    queries = []
+    for field, kind in (('work_ids', 'work_id'), ('content_hashes', 'content_hash')):
+        values = body.get(field) or []
+        if not isinstance(values, list) or not all(isinstance(v, str) and v for v in values):
+            return jsonify({'error': f'{field} must be a list of non-empty strings'}), 400
+        queries.extend((kind, value) for value in values)
+    if not queries:
+        return jsonify({'error': 'no work_ids or content_hashes given'}), 400
+
+    stream = request.accept_mimetypes.best == 'application/x-ndjson'
+    limit = config.VERIFY_API_MAX_STREAM_ITEMS if stream else config.VERIFY_API_MAX_ITEMS
+    if len(queries) > limit:
+        return jsonify({'error': f'at most {limit} items per request', 'limit': limit}), 413
+
+    contract = get_contract()
+    if not contract:
+        return jsonify({'error': 'contract not deployed'}), 503
+
+    client = request.remote_addr
+    retry_after = api_limiter.acquire(client, len(queries))
+    if retry_after:
+        response = jsonify({'error': 'rate limit exceeded', 'retry_after': retry_after})
+        response.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+        return response, 429
+
+    if stream:
+        def generate():
+            try:
+                for result in resolve_verify_queries(contract, queries):
+                    yield json.dumps(result) + '\n'
+            except Exception as e:
+                # The 200 status is already sent; a last line tells the client the rest is missing
+                metrics.record_error(e, 'verify_api')
+                yield json.dumps({'error': str(e)}) + '\n'
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        # Frees the slot even if the client disconnects before the body is sent
+        response.call_on_close(lambda: api_limiter.release(client))
+        return response
+
+    try:
+        results = list(resolve_verify_queries(contract, queries))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 502
+    finally:
+        api_limiter.release(client)
+    return jsonify({
+        'results': results,
+        'found': sum(result['found'] for result in results),
+        'not_found': sum(not result['found'] for result in results),
+    })
+
 # ----- Ganti atau perbarui route /verify menjadi seperti ini -----
 @app.route('/verify', methods=['GET', 'POST'])
 def verify():
@@ -157,14 +547,10 @@ def verify():
         content_hash_input = request.form.get('content_hash') or None
         file = request.files.get('file')
 
-        # If file provided, calculate hash
+        # If file provided, use the hash computed while it streamed in (never saved)
         content_hash_from_file = None
         if file and file.filename:
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            # calculate hash (same helper as before)
-            content_hash_from_file = calculate_file_hash(filepath)
+            content_hash_from_file = upload_stream.upload_hash(file)
 
         # If content_hash_input provided, normalize
         if content_hash_input:
@@ -182,33 +568,33 @@ def verify():
         # 1) If work_id provided: fetch details and optionally compare hash/file
         if work_id:
             try:
-                details = contract.functions.getWorkDetails(work_id).call()
-                work_details = {
-                    'work_id': details[0],
-                    'title': details[1],
-                    'type': details[2],
-                    'content_hash': details[3],
-                    'creator': details[4],
-                    'timestamp': datetime.fromtimestamp(details[5]).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    'metadata': details[6]
-                }
+                with metrics.phase('lookup'):
+                    work_details = get_work_view(contract, work_id)
                 # Compare hash if available
                 target_hash = content_hash_from_file or normalized
                 if target_hash:
-                    # try compare both variants (with/without 0x) - smart contract may use hex with 0x
-                    try:
-                        is_valid = contract.functions.verifyWork(work_id, target_hash).call()
-                    except:
-                        # try with 0x prefix
-                        try:
-                            is_valid = contract.functions.verifyWork(work_id, "0x" + target_hash).call()
-                        except:
-                            is_valid = False
+                    if work_details.get('anchor_root'):
+                        # The checked proof covers the content hash, so compare locally
+                        is_valid = normalize_hash_input(work_details['content_hash']) == target_hash
+                    else:
+                        # try compare both variants (with/without 0x) - smart contract may use hex with 0x
+                        with metrics.phase('verify_hash'):
+                            try:
+                                is_valid = contract.functions.verifyWork(work_id, target_hash).call()
+                            except Exception as e:
+                                metrics.record_error(e, 'verify_hash')
+                                # try with 0x prefix
+                                try:
+                                    is_valid = contract.functions.verifyWork(work_id, "0x" + target_hash).call()
+                                except Exception as e:
+                                    metrics.record_error(e, 'verify_hash')
+                                    is_valid = False
                     if is_valid:
                         flash('File/hash MATCHES registered work!', 'success')
                     else:
                         flash('File/hash DOES NOT MATCH registered work', 'warning')
             except Exception as e:
+                metrics.record_error(e, 'lookup')
                 flash(f'Work not found: {str(e)}', 'error')
             return render_template('verify.html', work_details=work_details)
 
@@ -216,18 +602,30 @@ def verify():
         if normalized or content_hash_from_file:
             search_hash = content_hash_from_file or normalized
             found_id = None
-            try:
-                # try as-is
-                found_id = contract.functions.checkContentExists(search_hash).call()
-            except:
-                # try with 0x prefix
+            with metrics.phase('hash_lookup'):
                 try:
-                    found_id = contract.functions.checkContentExists("0x" + search_hash).call()
-                except:
-                    found_id = ""
+                    # try as-is
+                    found_id = indexer.find_work_by_hash(contract, search_hash, work_index)
+                except Exception as e:
+                    metrics.record_error(e, 'hash_lookup')
+                    # try with 0x prefix
+                    try:
+                        found_id = contract.functions.checkContentExists("0x" + search_hash).call()
+                    except Exception as e:
+                        metrics.record_error(e, 'hash_lookup')
+                        found_id = ""
+                anchored = None
+                if not found_id:
+                    anchored = merkle_anchor.find_anchored(contract, anchor_store, content_hash=search_hash)
+                    if anchored and anchored[1]['valid']:
+                        found_id = anchored[0]['work_id']
             if found_id:
                 flash(f'Content found on-chain: {found_id}', 'success')
                 return redirect(url_for('verify', work_id=found_id))
+            elif anchored:
+                flash(f'Content registered as {anchored[0]["work_id"]}, but not verifiable yet: '
+                      f'{anchored[1]["error"]}', 'warning')
+                return render_template('verify.html', work_details=None)
             else:
                 flash('Content hash not found on-chain', 'warning')
                 return render_template('verify.html', work_details=None)
@@ -241,32 +639,59 @@ def verify():
         contract = get_contract()
         if contract:
             try:
-                details = contract.functions.getWorkDetails(work_id).call()
-                work_details = {
-                    'work_id': details[0],
-                    'title': details[1],
-                    'type': details[2],
-                    'content_hash': details[3],
-                    'creator': details[4],
-                    'timestamp': datetime.fromtimestamp(details[5]).strftime('%Y-%m-%d %H:%M:%S UTC'),
-                    'metadata': details[6]
-                }
+                with metrics.phase('lookup'):
+                    work_details = get_work_view(contract, work_id)
             except Exception as e:
+                metrics.record_error(e, 'lookup')
                 flash(f'Work not found: {str(e)}', 'error')
 
     return render_template('verify.html', work_details=work_details)
 
+@app.route('/verify/similar', methods=['GET', 'POST'])
+def verify_similar():
+    """Find registered works resembling an uploaded file, or ?work_id=... of a registered one"""
+    work_id = request.args.get('work_id')
+    if not similar_index:
+        flash('Similarity search is disabled', 'error')
+        return redirect(url_for('verify'))
+
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Please upload an image or audio file', 'error')
+            return redirect(url_for('verify'))
+        fingerprint = similarity.fingerprint_file(file.stream, file.filename)
+        subject = file.filename
+    elif work_id:
+        fingerprint = similar_index.get(work_id)
+        subject = work_id
+    else:
+        return redirect(url_for('verify'))
+
+    if not fingerprint:
+        flash(f'No perceptual fingerprint for {subject} (images and mp3 files only)', 'warning')
+        return render_template('verify.html', work_details=None)
+    similar = find_similar(fingerprint, exclude=work_id)
+    if not similar:
+        flash(f'No registered works similar to {subject}', 'success')
+    return render_template('verify.html', work_details=None, similar=similar, similar_to=subject)
+
 @app.route('/my-works')
 def my_works():
-    """List user's works"""
+    """List user's works, one page at a time"""
     contract = get_contract()
     works = []
+    total = 0
+    page = max(request.args.get('page', 1, type=int), 1)
+    page_size = config.WORKS_PAGE_SIZE
     
     if contract:
         try:
-            work_ids = contract.functions.getCreatorWorks(config.ACCOUNT_ADDRESS).call()
-            for work_id in work_ids:
-                details = contract.functions.getWorkDetails(work_id).call()
+            with metrics.phase('list'):
+                total, page_works = batch_reads.get_creator_works_page(
+                    w3, contract, config.ACCOUNT_ADDRESS, (page - 1) * page_size, page_size, work_index
+                )
+            for details in page_works:
                 works.append({
                     'work_id': details[0],
                     'title': details[1],
@@ -274,9 +699,54 @@ def my_works():
                     'timestamp': datetime.fromtimestamp(details[5]).strftime('%Y-%m-%d %H:%M:%S')
                 })
         except Exception as e:
+            metrics.record_error(e, 'list')
             flash(f'Error loading works: {str(e)}', 'error')
     
-    return render_template('my_works.html', works=works)
+    total_pages = max((total + page_size - 1) // page_size, 1)
+    return render_template('my_works.html', works=works, total=total,
+                           page=page, total_pages=total_pages)
+
+def start_indexer():
+    """Follow WorkRegistered events in a background thread"""
+    contract = get_contract()
+    if work_index and contract:
+        on_registered = view_cache.clear_negatives if view_cache else None
+        indexer.RegistryIndexer(w3, contract, work_index, on_registered=on_registered).start()
+
+def start_cache_invalidator():
+    """Drop negative cache entries on WorkRegistered when no replica runs in-process"""
+    contract = get_contract()
+    if view_cache and contract:
+        read_cache.EventInvalidator(w3, contract, view_cache).start()
+
+def start_confirmer():
+    """Resolve pending registrations in a background thread"""
+    registration_queue.ReceiptConfirmer(w3, registrations, account_signer).start()
+
+def start_batch_submitter():
+    """Send queued registrations in registerWorks batches in a background thread"""
+    contract = get_contract()
+    if contract:
+        batch_submitter.BatchSubmitter(w3, contract, registrations, account_signer).start()
+
+def start_anchorer():
+    """Commit queued registrations as Merkle roots in a background thread"""
+    contract = get_contract()
+    if contract and anchor_store:
+        merkle_anchor.Anchorer(w3, contract, registrations, anchor_store, account_signer).start()
 
 if __name__ == '__main__':
+    # Only start background threads in the reloader child, not the watcher
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        if config.INDEX_IN_PROCESS and work_index:
+            start_indexer()
+        else:
+            start_cache_invalidator()
+        if config.CONFIRM_IN_PROCESS:
+            start_confirmer()
+        if config.ANCHOR_REGISTER:
+            if config.ANCHOR_IN_PROCESS:
+                start_anchorer()
+        elif config.BATCH_REGISTER and config.BATCH_IN_PROCESS:
+            start_batch_submitter()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,122 @@
+"""Async JSON endpoints for verification and listing.
+
+Serves the read side of app.py (/verify and /my-works) as JSON from one
+asyncio event loop on aiohttp's server, with lookups through
+async_registry.AsyncRegistry. A waiting request costs a coroutine instead
+of an OS thread, and at most ASYNC_RPC_CONCURRENCY calls are in flight
+toward the node however many requests are open.
+
+Registration stays in app.py. Run next to it (e.g. behind the same reverse
+proxy, routing /api/verify and /api/my-works here):
+    python async_app.py [--port 5001]
+"""
+from aiohttp import web
+from web3.exceptions import ContractLogicError
+import sys
+import config
+import read_cache
+from async_registry import AsyncRegistry
+
+routes = web.RouteTableDef()
+REGISTRY = web.AppKey("registry", AsyncRegistry)
+
+
+def normalize_hash_input(h):
+    if not h:
+        return ""
+    h = h.strip()
+    if h.startswith("0x") or h.startswith("0X"):
+        h = h[2:]
+    return h.lower()
+
+
+def error(message, status):
+    return web.json_response({"error": message}, status=status)
+
+
+@routes.get("/api/works/{work_id}")
+async def work_api(request):
+    """Registration of one work"""
+    details = await request.app[REGISTRY].get_work_details(request.match_info["work_id"])
+    if details is None:
+        return error("not found", 404)
+    return web.json_response(details._asdict())
+
+
+@routes.get("/api/verify")
+async def verify_api(request):
+    """
+    ?work_id=... returns the work and, with &content_hash=..., whether the
+    hash matches it; ?content_hash=... alone finds the work registering it
+    """
+    registry = request.app[REGISTRY]
+    work_id = request.query.get("work_id")
+    content_hash = normalize_hash_input(request.query.get("content_hash"))
+    if not work_id and not content_hash:
+        return error("work_id or content_hash required", 400)
+
+    try:
+        if not work_id:
+            # Hashes may have been registered with a 0x prefix
+            work_id = await registry.find_work_by_hash(content_hash)
+            if not work_id:
+                work_id = await registry.find_work_by_hash("0x" + content_hash)
+            if not work_id:
+                return web.json_response({"found": False, "content_hash": content_hash})
+
+        details = await registry.get_work_details(work_id)
+        if details is None:
+            return web.json_response({"found": False, "work_id": work_id})
+        result = {"found": True, "work": details._asdict()}
+        if content_hash:
+            registered = normalize_hash_input(details.content_hash)
+            result["matches"] = registered == content_hash
+        return web.json_response(result)
+    except (ContractLogicError, OSError) as e:
+        return error(str(e), 502)
+
+
+@routes.get("/api/my-works")
+async def my_works_api(request):
+    """One page of a creator's works (default: the configured account)"""
+    creator = request.query.get("creator") or config.ACCOUNT_ADDRESS
+    try:
+        page = max(int(request.query.get("page", 1)), 1)
+    except ValueError:
+        return error("page must be a number", 400)
+    page_size = config.WORKS_PAGE_SIZE
+    try:
+        total, works = await request.app[REGISTRY].get_creator_works_page(
+            creator, (page - 1) * page_size, page_size
+        )
+    except (ContractLogicError, OSError, ValueError) as e:
+        return error(str(e), 502)
+    return web.json_response({
+        "creator": creator,
+        "total": total,
+        "page": page,
+        "total_pages": max((total + page_size - 1) // page_size, 1),
+        "works": [details._asdict() for details in works],
+    })
+
+
+async def _open_registry(app):
+    app[REGISTRY] = await AsyncRegistry(cache=read_cache.open_cache()).open()
+    yield
+    await app[REGISTRY].close()
+
+
+def create_app():
+    app = web.Application()
+    app.add_routes(routes)
+    app.cleanup_ctx.append(_open_registry)
+    return app
+
+
+if __name__ == "__main__":
+    if not config.CONTRACT_ADDRESS:
+        print("✗ CONTRACT_ADDRESS not set in config.py")
+        sys.exit(1)
+    args = sys.argv[1:]
+    port = int(args[args.index("--port") + 1]) if "--port" in args else config.ASYNC_PORT
+    web.run_app(create_app(), port=port)
@@ -0,0 +1,143 @@
+"""Asyncio read path for the registry (AsyncWeb3).
+
+The same lookups as indexer.py / batch_reads.py, as coroutines, so one
+process can keep thousands of verification requests waiting on the node
+without a thread each. Calls toward the node are bounded by a semaphore
+(ASYNC_RPC_CONCURRENCY) and identical calls already in flight are shared,
+so a burst of requests for one work costs one eth_call. Results go through
+an optional read_cache.ReadCache with the same keys as the sync path.
+"""
+from aiohttp import ClientSession, TCPConnector
+from web3 import AsyncWeb3, AsyncHTTPProvider
+from web3.exceptions import ContractLogicError
+import asyncio
+import batch_reads
+import config
+import read_cache
+import registry_client
+import registry_v2
+
+
+class AsyncRegistry:
+    """Read-only registry client on AsyncWeb3 with bounded concurrency"""
+
+    def __init__(self, url=None, address=None, concurrency=None, cache=None):
+        self.url = url or config.RPC_URL
+        self.address = address or config.CONTRACT_ADDRESS
+        self.concurrency = concurrency or config.ASYNC_RPC_CONCURRENCY
+        self.cache = cache
+        self.w3 = AsyncWeb3(AsyncHTTPProvider(self.url, request_kwargs={"timeout": config.RPC_TIMEOUT}))
+        self.contract = self.w3.eth.contract(address=self.address, abi=registry_client.load_abi())
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._inflight = {}
+        self._no_aggregate = False
+        self._no_paging = False
+
+    async def open(self):
+        """Give the provider a connection pool sized to the concurrency bound"""
+        self._session = ClientSession(connector=TCPConnector(limit=self.concurrency))
+        await self.w3.provider.cache_async_session(self._session)
+        return self
+
+    async def close(self):
+        await self._session.close()
+
+    async def _call(self, name, *args):
+        """eth_call of a view function with registry_v2 encoding, bounded and de-duplicated"""
+        key = read_cache.cache_key(self.address, name, args)
+        if self.cache is not None and name in read_cache.CACHED:
+            cached = self.cache.get(key)
+            if cached is not None:
+                value = cached[0]
+                if isinstance(value, dict) and "error" in value:
+                    raise ContractLogicError(value["error"])
+                return read_cache.RESTORE[name](value) if name in read_cache.RESTORE else value
+
+        future = self._inflight.get(key)
+        if future is None:
+            future = self._inflight[key] = asyncio.ensure_future(self._fetch(key, name, args))
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, key, name, args):
+        encoders, decode = registry_v2.signature(name) or ((), None)
+        encoded = [encode(arg) for encode, arg in zip(encoders, args)] if encoders else list(args)
+        function = getattr(self.contract.functions, name)(*encoded)
+        cacheable = self.cache is not None and name in read_cache.CACHED
+        async with self._semaphore:
+            try:
+                value = await function.call()
+            except ContractLogicError as e:
+                if cacheable:
+                    self.cache.set(key, {"error": str(e)}, True)
+                raise
+        value = decode(value) if decode else value
+        if cacheable:
+            self.cache.set(key, value, read_cache.CACHED[name](value))
+        return value
+
+    async def get_work_details(self, work_id):
+        """WorkRegistration for work_id, or None if not registered"""
+        try:
+            return await self._call("getWorkDetails", work_id)
+        except ContractLogicError:
+            return None
+
+    async def find_work_by_hash(self, content_hash):
+        """Registered work ID for content_hash, or empty string"""
+        return await self._call("checkContentExists", content_hash)
+
+    async def verify_work(self, work_id, content_hash):
+        return await self._call("verifyWork", work_id, content_hash)
+
+    async def get_works_details(self, work_ids):
+        """get_work_details for many IDs, chunked aggregate calls run concurrently"""
+        if not self._no_aggregate:
+            size = config.BATCH_READ_SIZE
+            chunks = [work_ids[i:i + size] for i in range(0, len(work_ids), size)]
+            try:
+                parts = await asyncio.gather(*[self._call("getWorksDetails", chunk) for chunk in chunks])
+                return [
+                    registry_v2.to_record(item) if item and item[0] else None
+                    for part in parts for item in part
+                ]
+            except OSError:
+                # Connection problem, not a missing function
+                raise
+            except Exception as e:
+                # Deployed bytecode predates the aggregate view; other errors retry next call
+                if batch_reads.is_missing_function(e):
+                    self._no_aggregate = True
+        return list(await asyncio.gather(*[self.get_work_details(w) for w in work_ids]))
+
+    async def check_contents_exist(self, content_hashes):
+        """find_work_by_hash for many hashes, chunked aggregate calls run concurrently"""
+        if not self._no_aggregate:
+            size = config.BATCH_READ_SIZE
+            chunks = [content_hashes[i:i + size] for i in range(0, len(content_hashes), size)]
+            try:
+                parts = await asyncio.gather(*[self._call("checkContentsExist", chunk) for chunk in chunks])
+                return [work_id for part in parts for work_id in part]
+            except OSError:
+                raise
+            except Exception as e:
+                if batch_reads.is_missing_function(e):
+                    self._no_aggregate = True
+        return list(await asyncio.gather(*[self.find_work_by_hash(h) for h in content_hashes]))
+
+    async def get_creator_works_page(self, creator, offset, limit):
+        """(total, works) for one page of a creator's works"""
+        total = await self._call("getCreatorWorkCount", creator)
+        if offset >= total:
+            return total, []
+        if not self._no_paging:
+            try:
+                page = await self._call("getCreatorWorksPage", creator, offset, limit)
+                return total, [registry_v2.to_record(item) for item in page]
+            except OSError:
+                raise
+            except Exception as e:
+                if batch_reads.is_missing_function(e):
+                    self._no_paging = True
+        work_ids = (await self._call("getCreatorWorks", creator))[offset:offset + limit]
+        return total, [details for details in await self.get_works_details(work_ids) if details]
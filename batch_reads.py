@@ -0,0 +1,164 @@
+"""Batched contract reads.
+
+Fetches many registrations in a few round-trips instead of one eth_call per
+work ID. Strategies, in order of preference:
+
+1. Aggregate views in the contract (getWorksDetails / checkContentsExist),
+   one eth_call per chunk.
+2. JSON-RPC batch requests, one HTTP round-trip per chunk.
+3. Serial eth_calls (old deployments behind providers without batch support).
+
+Creator listings are paginated with getCreatorWorksPage.
+"""
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError, Web3Exception
+import config
+import registry_v2
+
+# Contract addresses whose deployed bytecode lacks the aggregate / paging views
+_no_aggregate = set()
+_no_paging = set()
+
+
+def is_missing_function(error):
+    """
+    True if a call failed because the deployed bytecode lacks the function:
+    an empty revert (no selector matched, no fallback) or empty return data.
+    Other errors (node timeouts, RPC errors) say nothing about the bytecode.
+    """
+    if isinstance(error, BadFunctionCallOutput):
+        return True
+    if isinstance(error, ContractLogicError):
+        return error.data in (None, "", "0x", b"")
+    # eth-tester raises its own TransactionFailed carrying the raw revert data
+    return type(error).__name__ == "TransactionFailed" and str(error).endswith("b''")
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _aggregate(contract, fn_name, chunk):
+    """Call an aggregate view; None if the deployed contract does not have it"""
+    if contract.address in _no_aggregate:
+        return None
+    try:
+        return getattr(contract.functions, fn_name)(chunk).call()
+    except OSError:
+        # Connection problem, not a missing function
+        raise
+    except Exception as e:
+        # Anything else falls back for this call only and is retried next time
+        if is_missing_function(e):
+            _no_aggregate.add(contract.address)
+        return None
+
+
+def _json_rpc_batch(w3, calls):
+    """Send contract calls as one JSON-RPC batch; None if unsupported or failed"""
+    try:
+        with w3.batch_requests() as batch:
+            for call in calls:
+                # registry_v2 calls wrap the contract function with a decoder
+                batch.add(getattr(call, "function", call))
+            results = batch.execute()
+    except (Web3Exception, ValueError, OSError):
+        return None
+    return [
+        call.decode(result) if hasattr(call, "decode") else result
+        for call, result in zip(calls, results)
+    ]
+
+
+def get_works_details(w3, contract, work_ids, index=None, chunk_size=None):
+    """
+    Return getWorkDetails tuples for work_ids, in the same order.
+    Unknown work IDs map to None. Replica hits (if index given) skip the chain.
+    """
+    chunk_size = chunk_size or config.BATCH_READ_SIZE
+    results = {}
+
+    missing = []
+    for work_id in work_ids:
+        row = index.get_work(work_id) if index else None
+        if row:
+            results[work_id] = registry_v2.to_record(row)
+        else:
+            missing.append(work_id)
+
+    for chunk in _chunks(missing, chunk_size):
+        details = _aggregate(contract, "getWorksDetails", chunk)
+        if details is None:
+            details = _json_rpc_batch(
+                w3, [contract.functions.getWorkDetails(work_id) for work_id in chunk]
+            )
+        if details is None:
+            details = []
+            for work_id in chunk:
+                try:
+                    details.append(contract.functions.getWorkDetails(work_id).call())
+                except Exception:
+                    details.append(None)
+        for work_id, item in zip(chunk, details):
+            # Aggregate view returns an empty struct for unknown IDs
+            results[work_id] = registry_v2.to_record(item) if item and item[0] else None
+
+    return [results[work_id] for work_id in work_ids]
+
+
+def check_contents_exist(w3, contract, content_hashes, index=None, chunk_size=None):
+    """Return the registered work ID (or "") for each content hash, in order"""
+    chunk_size = chunk_size or config.BATCH_READ_SIZE
+    results = {}
+
+    missing = []
+    for content_hash in content_hashes:
+        work_id = index.find_by_hash(content_hash) if index else ""
+        if work_id:
+            results[content_hash] = work_id
+        else:
+            missing.append(content_hash)
+
+    for chunk in _chunks(missing, chunk_size):
+        work_ids = _aggregate(contract, "checkContentsExist", chunk)
+        if work_ids is None:
+            work_ids = _json_rpc_batch(
+                w3, [contract.functions.checkContentExists(h) for h in chunk]
+            )
+        if work_ids is None:
+            work_ids = [contract.functions.checkContentExists(h).call() for h in chunk]
+        results.update(zip(chunk, work_ids))
+
+    return [results[content_hash] for content_hash in content_hashes]
+
+
+def get_creator_works_page(w3, contract, creator, offset, limit, index=None):
+    """
+    Return (total, works) for one page of a creator's works, where works are
+    getWorkDetails tuples in registration order. Cost depends on limit, not on
+    how many works the creator has (except on old deployments, see below).
+    """
+    if index and index.is_fresh():
+        total = index.count_creator_works(creator)
+        rows = index.creator_works_page(creator, offset, limit)
+        return total, [registry_v2.to_record(row) for row in rows]
+
+    total = contract.functions.getCreatorWorkCount(creator).call()
+    if offset >= total:
+        return total, []
+
+    if contract.address not in _no_paging:
+        try:
+            page = contract.functions.getCreatorWorksPage(creator, offset, limit).call()
+            return total, [registry_v2.to_record(item) for item in page]
+        except OSError:
+            raise
+        except Exception as e:
+            if is_missing_function(e):
+                _no_paging.add(contract.address)
+
+    # Deployed contract predates getCreatorWorksPage: the ID list is still O(n),
+    # but details are only fetched for the requested slice.
+    work_ids = contract.functions.getCreatorWorks(creator).call()[offset:offset + limit]
+    works = get_works_details(w3, contract, work_ids, index)
+    return total, [details for details in works if details]
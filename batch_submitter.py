@@ -0,0 +1,193 @@
+"""Batched registration through CopyrightRegistry.registerWorks.
+
+Every registerWork transaction pays the 21k base gas, its own signature,
+an RPC round-trip and a block slot. pack_batches() groups registrations into
+registerWorks calls sized to a fraction of the block gas limit, and
+BatchSubmitter drains the web app's 'queued' registrations into such batches
+every BATCH_INTERVAL seconds (skip-on-duplicate, so one duplicate doesn't
+revert other users' works).
+
+Run the submitter standalone (recommended for multi-worker deployments):
+    python batch_submitter.py
+"""
+from web3 import Web3
+from getpass import getpass
+import sys
+import threading
+import config
+import fee_oracle
+import nonce_manager
+import registration_queue
+import signer
+import registry_client
+
+FIELDS = ("work_id", "title", "type", "content_hash", "metadata")
+
+
+def _batch_call(contract, works, skip_duplicates):
+    """registerWorks call for works (dicts with FIELDS keys)"""
+    columns = [[work[field] for work in works] for field in FIELDS]
+    return contract.functions.registerWorks(*columns, skip_duplicates)
+
+
+def deployed_without_batches(w3, contract):
+    """
+    True if the contract deployed at contract.address has no registerWorks
+    (an older build): every batch sent to it would revert
+    """
+    entries = [entry for entry in contract.abi if entry.get("name") == "registerWorks"]
+    code = w3.eth.get_code(contract.address).hex()
+    return not entries or bool(registry_client.missing_functions(entries, code))
+
+
+def gas_budget(w3):
+    """Gas one batch may use: BATCH_GAS_FRACTION of the latest block gas limit"""
+    return int(w3.eth.get_block("latest")["gasLimit"] * config.BATCH_GAS_FRACTION)
+
+
+def pack_batches(contract, sender, works, budget, skip_duplicates=True, max_works=None):
+    """
+    Split works into registerWorks batches that fit the gas budget.
+    Returns [(works, gas_limit)]. A batch over budget (estimate including
+    the 20% buffer) is halved until it fits; a single work that cannot be
+    estimated is returned alone with the fallback gas limit.
+    """
+    max_works = max_works or config.BATCH_MAX_WORKS
+    pending = [works[i:i + max_works] for i in range(0, len(works), max_works)]
+    batches = []
+    while pending:
+        batch = pending.pop(0)
+        try:
+            gas_limit = int(_batch_call(contract, batch, skip_duplicates)
+                            .estimate_gas({'from': sender}) * 1.2)
+        except Exception:
+            if len(batch) == 1:
+                batches.append((batch, 500000))
+                continue
+            gas_limit = budget + 1  # unknown: split and estimate the halves
+        if gas_limit <= budget or len(batch) == 1:
+            batches.append((batch, gas_limit))
+        else:
+            half = len(batch) // 2
+            pending[:0] = [batch[:half], batch[half:]]
+    return batches
+
+
+def send_batch(w3, contract, account, nonces, works, gas_limit, fees=None,
+               skip_duplicates=True):
+    """Sign and broadcast one registerWorks transaction; returns its tx hash"""
+    nonce = nonces.allocate()
+    try:
+        tx = _batch_call(contract, works, skip_duplicates).build_transaction({
+            'from': account.address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            'chainId': config.CHAIN_ID,
+            **(fees or fee_oracle.get_oracle(w3).fees())
+        })
+        signed_tx = account.sign_transaction(tx)
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception:
+        nonces.release(nonce)
+        raise
+    nonces.mark_sent(nonce, tx_hash, tx)
+    return Web3.to_hex(tx_hash)
+
+
+class BatchSubmitter:
+    """Background worker that sends queued registrations in registerWorks batches"""
+
+    def __init__(self, w3, contract, queue, key_signer=None):
+        self.w3 = w3
+        self.contract = contract
+        self.queue = queue
+        self.signer = key_signer or signer.get_signer()
+        self._stop = threading.Event()
+
+    def can_submit(self):
+        """False, with the reason printed, if the deployed contract can't take batches"""
+        if deployed_without_batches(self.w3, self.contract):
+            print(f"✗ Contract at {self.contract.address} has no registerWorks; not submitting batches")
+            print("  Redeploy the current copyright_registry.sol or set BATCH_REGISTER=0")
+            return False
+        return True
+
+    def submit_once(self):
+        """Send everything queued now; returns number of works submitted"""
+        queued = self.queue.queued()
+        if not queued:
+            return 0
+        try:
+            account = self.signer.get_account()
+        except signer.SignerLocked:
+            print(f"⚠️  {len(queued)} queued registrations waiting for the signer to be unlocked")
+            return 0
+
+        nonces = nonce_manager.for_account(self.w3, account.address)
+        if nonces.needs_repair():
+            nonces.repair(account, on_replaced=self.queue.replace_tx_hash)
+
+        submitted = 0
+        fees = fee_oracle.get_oracle(self.w3).fees()
+        for works, gas_limit in pack_batches(
+            self.contract, account.address, queued, gas_budget(self.w3)
+        ):
+            try:
+                tx_hash = send_batch(
+                    self.w3, self.contract, account, nonces, works, gas_limit, fees
+                )
+            except Exception as e:
+                for work in works:
+                    self.queue.mark_failed(work["work_id"], f"Batch send failed: {e}")
+                continue
+            self.queue.mark_submitted([work["work_id"] for work in works], tx_hash)
+            submitted += len(works)
+        return submitted
+
+    def run(self):
+        """Submit until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.submit_once()
+            except Exception as e:
+                print(f"✗ Batch submitter error: {e}")
+            self._stop.wait(config.BATCH_INTERVAL)
+
+    def start(self):
+        """Run the submitter in a daemon thread; None if can_submit() refuses"""
+        if not self.can_submit():
+            return None
+        threading.Thread(target=self.run, name="batch-submitter", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        sys.exit(1)
+    print("✓ Connected to blockchain")
+
+    contract = registry_client.get_contract(w3)
+    submitter = BatchSubmitter(w3, contract, registration_queue.RegistrationQueue())
+    if not submitter.can_submit():
+        sys.exit(1)
+
+    # The submitter signs on its own, so it needs its own unlocked key
+    key_signer = signer.get_signer()
+    try:
+        account = key_signer.unlock(getpass("Account Password: "), ttl=float("inf"))
+    except Exception as e:
+        print(f"✗ Failed to decrypt account: {e}")
+        sys.exit(1)
+    print(f"✓ Using account: {account.address}")
+
+    print(f"✓ Registration queue at {submitter.queue.path}")
+    print(f"⏳ Submitting queued registrations every {config.BATCH_INTERVAL:.0f}s... (Ctrl+C to stop)")
+    try:
+        submitter.run()
+    except KeyboardInterrupt:
+        print("\n✓ Batch submitter stopped")
@@ -0,0 +1,142 @@
+"""Benchmark: concurrent verification, sync app.py vs async_app.py.
+
+Serves app.py on Werkzeug's threaded server and async_app.py on aiohttp in
+this process, then fires the same single-work lookups at both at rising
+concurrency: POST /api/verify {"work_ids": [id]} on the sync app and
+GET /api/verify?work_id=id on the async one (both one getWorkDetails call).
+View caches are off so every request reaches the node. Reports requests/s,
+p50/p99 latency, errors and the number of threads each run needed.
+
+Usage (from the repository root, with the node running and works registered):
+    python -m benchmarks.bench_async_verify [creator_address] [--concurrency 10,100,1000] [--requests 2000]
+"""
+from aiohttp import ClientSession, TCPConnector, web
+from werkzeug.serving import make_server
+import asyncio
+import json
+import random
+import sys
+import threading
+import time
+import config
+
+SYNC_PORT = 5100
+ASYNC_PORT = 5101
+
+
+def start_sync_server():
+    import app as sync_app
+    server = make_server("127.0.0.1", SYNC_PORT, sync_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_async_server():
+    import async_app
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(async_app.create_app())
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, "127.0.0.1", ASYNC_PORT).start())
+        loop.run_forever()
+    threading.Thread(target=run, daemon=True).start()
+    return loop
+
+
+async def load(request, work_ids, concurrency, total):
+    """Run total requests with at most concurrency open; (latencies, errors, seconds)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(session, work_id):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                async with request(session, work_id) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as session:
+        await asyncio.gather(*[one(session, random.choice(work_ids)) for _ in range(total)])
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+def sync_request(session, work_id):
+    return session.post(f"http://127.0.0.1:{SYNC_PORT}/api/verify", json={"work_ids": [work_id]})
+
+
+def async_request(session, work_id):
+    return session.get(f"http://127.0.0.1:{ASYNC_PORT}/api/verify", params={"work_id": work_id})
+
+
+def main():
+    args = sys.argv[1:]
+    levels = [10, 100, 1000]
+    total = 2000
+    if "--concurrency" in args:
+        i = args.index("--concurrency")
+        levels = [int(n) for n in args[i + 1].split(",")]
+        del args[i:i + 2]
+    if "--requests" in args:
+        i = args.index("--requests")
+        total = int(args[i + 1])
+        del args[i:i + 2]
+    creator = args[0] if args else config.ACCOUNT_ADDRESS
+
+    # Every request reaches the node, and the bulk API limits stay out of the way
+    config.READ_CACHE_ENABLED = False
+    config.VERIFY_API_RATE = config.VERIFY_API_BURST = 10 ** 9
+    config.VERIFY_API_MAX_INFLIGHT = 10 ** 9
+
+    import registry_client
+    work_ids = registry_client.get_contract().functions.getCreatorWorks(creator).call()[:1000]
+    if not work_ids:
+        print(f"✗ {creator} has no registered works")
+        sys.exit(1)
+    print(f"Looking up {len(work_ids)} works of {creator}, {total} requests per run\n")
+
+    start_sync_server()
+    start_async_server()
+    time.sleep(1)
+
+    print(f"{'app':>6} {'conc':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'threads':>8}")
+    results = []
+    for label, request in (("sync", sync_request), ("async", async_request)):
+        for concurrency in levels:
+            peak = threading.active_count()
+            sampling = True
+
+            def sample():
+                nonlocal peak
+                while sampling:
+                    peak = max(peak, threading.active_count())
+                    time.sleep(0.01)
+            sampler = threading.Thread(target=sample, daemon=True)
+            sampler.start()
+            latencies, errors, elapsed = asyncio.run(load(request, work_ids, concurrency, total))
+            sampling = False
+            sampler.join()
+
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{label:>6} {concurrency:>6} {total / elapsed:>9.0f} {p50:>9.1f} {p99:>9.1f} "
+                  f"{errors:>7} {peak:>8}")
+            results.append({
+                "app": label, "concurrency": concurrency, "requests_per_s": total / elapsed,
+                "p50_ms": p50, "p99_ms": p99, "errors": errors, "peak_threads": peak,
+            })
+
+    print("\n" + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark: /my-works detail fetching, serial vs batched.
+
+Times fetching details for the first N works of a creator with the old
+one-eth_call-per-work loop and with batch_reads.get_works_details.
+
+Usage (from the repository root, with the node running):
+    python -m benchmarks.bench_batch_reads [creator_address] [--sizes 1,10,100,1000]
+"""
+import json
+import sys
+import time
+import config
+import batch_reads
+import registry_client
+
+
+def time_call(fn, repeat=3):
+    """Best wall-clock time of fn() over repeat runs, in milliseconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def serial(contract, work_ids):
+    return [contract.functions.getWorkDetails(work_id).call() for work_id in work_ids]
+
+
+def main():
+    args = sys.argv[1:]
+    sizes = [1, 10, 100, 1000]
+    if "--sizes" in args:
+        i = args.index("--sizes")
+        sizes = [int(s) for s in args[i + 1].split(",")]
+        del args[i:i + 2]
+    creator = args[0] if args else config.ACCOUNT_ADDRESS
+
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        sys.exit(1)
+    contract = registry_client.get_contract(w3)
+
+    all_ids = contract.functions.getCreatorWorks(creator).call()
+    print(f"Creator {creator} has {len(all_ids)} works\n")
+    print(f"{'works':>8} {'serial ms':>12} {'batched ms':>12} {'speedup':>8}")
+
+    results = []
+    for n in sizes:
+        if n > len(all_ids):
+            print(f"{n:>8}  (skipped: not enough works)")
+            continue
+        work_ids = all_ids[:n]
+        t_serial = time_call(lambda: serial(contract, work_ids))
+        t_batch = time_call(lambda: batch_reads.get_works_details(w3, contract, work_ids))
+        print(f"{n:>8} {t_serial:>12.1f} {t_batch:>12.1f} {t_serial / t_batch:>7.1f}x")
+        results.append({"works": n, "serial_ms": t_serial, "batched_ms": t_batch})
+
+    print("\n" + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
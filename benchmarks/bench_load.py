@@ -0,0 +1,495 @@
+"""Load test: the web app under concurrent traffic, per worker model.
+
+Starts a local chain stand-in in its own process. It is eth-tester's py-evm
+chain with the registry deployed and --works works seeded, served over
+HTTP JSON-RPC. The same process runs the receipt confirmer. The app is then
+served by each worker model in turn, each in its own process:
+
+- threaded: app.py on Werkzeug's threaded server (one thread per connection)
+- gunicorn: app.py on gunicorn sync workers (--workers processes, one request each)
+- async: async_app.py on aiohttp (JSON routes only)
+
+A closed-loop asyncio client keeps --concurrency users busy for --duration
+seconds per level. Each user picks its next request from a weighted mix:
+
+- register: POST /register with a fresh --file-size upload
+- status: GET /api/registrations/<id> of a work registered during the run
+- verify_id: GET /verify?work_id= (async: GET /api/verify?work_id=)
+- hash_lookup: POST /verify with a content hash (async: GET /api/verify?content_hash=)
+- verify_file: POST /verify with an upload of a seeded work
+- listing: GET /my-works (async: GET /api/my-works)
+
+For every model, level and endpoint it reports requests/s, p50/p90/p99
+latency, errors and timeouts (--timeout) and the node RPC calls per
+request. The saturation point is the last level that still raised an
+endpoint's throughput by 10%. --rpc-latency (milliseconds) adds a node
+round-trip delay to every call. The stand-in mines each transaction on
+arrival and executes one call at a time, like a single local node, so the
+chain can become the bottleneck first. Its share shows in the RPC column.
+The read replica and view caches are off unless --caches is given.
+
+Usage (from the repository root; needs eth-tester, and gunicorn for the gunicorn model):
+    python -m benchmarks.bench_load [--models threaded,gunicorn,async] [--concurrency 1,4,16,64]
+        [--duration 15] [--works 200] [--workers 4] [--file-size 64K] [--timeout 30]
+        [--mix verify_id=4,hash_lookup=3,...] [--rpc-latency 0] [--caches] [--output FILE]
+"""
+from aiohttp import ClientSession, ClientTimeout, CookieJar, FormData, TCPConnector
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from web3 import EthereumTesterProvider, Web3
+from web3.middleware import combine_middleware
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import config
+import metrics
+import registration_queue
+from benchmarks.bench_suite import PASSWORD, RESULTS_DIR, configure, git_commit, percentile, seed, start_chain
+from benchmarks.bench_upload_hashing import parse_size
+
+CHAIN_PORT = 5299
+APP_PORT = 5300
+SETTINGS_ENV = "BENCH_LOAD_SETTINGS"
+MODELS = ("threaded", "gunicorn", "async")
+MIX = {"verify_id": 4, "hash_lookup": 3, "verify_file": 2, "listing": 2, "register": 1, "status": 1}
+SATURATION_GAIN = 1.1  # a level must raise throughput this much to count as unsaturated
+
+
+# ----- chain stand-in (own process) -----
+
+def rpc_handler(handle, rpc_latency):
+    class RPCHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like a node
+
+        def log_message(self, *args):
+            pass
+
+        def call(self, request):
+            if rpc_latency:
+                time.sleep(rpc_latency)
+            if request.get("method") == "bench_rpcCalls":
+                response = {"result": metrics.RPC_CALLS.by("method")}
+            else:
+                try:
+                    response = dict(handle(request["method"], request.get("params") or []))
+                except Exception as e:
+                    response = {"error": {"code": -32000, "message": str(e)}}
+            response.update(jsonrpc="2.0", id=request.get("id"))
+            return response
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(body, list):
+                response = [self.call(request) for request in body]
+            else:
+                response = self.call(body)
+            data = Web3.to_json(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return RPCHandler
+
+
+def serve_chain(workdir, port, works, rpc_latency, caches):
+    """Deploy, seed and serve the chain; writes workdir/settings.json once ready"""
+    configure(workdir)
+    if caches:
+        config.READ_CACHE_ENABLED = config.HASH_CACHE_ENABLED = True
+    tester = EthereumTesterProvider()
+    lock = threading.Lock()
+    make_request = tester.make_request
+
+    def locked_request(method, params):
+        # eth-tester is not thread-safe; one call at a time, like one node
+        with lock:
+            return make_request(method, params)
+    tester.make_request = locked_request
+
+    w3, contract, batched = start_chain(tester)
+    seed(w3, contract, batched, 0, works)
+    # The provider's own middleware turns JSON-RPC params into eth-tester calls
+    handle = combine_middleware(tester._middleware, w3, tester.make_request)
+    server = ThreadingHTTPServer(("127.0.0.1", port), rpc_handler(handle, rpc_latency))
+    server.daemon_threads = True
+    registration_queue.ReceiptConfirmer(w3, registration_queue.RegistrationQueue()).start()
+
+    config.RPC_URL = f"http://127.0.0.1:{port}"
+    settings = {
+        "workdir": workdir,
+        "works": works,
+        "batched_seeding": batched,
+        "config": {name: value for name, value in vars(config).items()
+                   if name.isupper() and isinstance(value, (str, int, float, bool, type(None)))},
+    }
+    path = os.path.join(workdir, "settings.json")
+    with open(path + ".tmp", "w") as f:
+        json.dump(settings, f)
+    os.replace(path + ".tmp", path)
+    server.serve_forever()
+
+
+# ----- app servers (own processes) -----
+
+def apply_settings():
+    """Configure this server process like the chain stand-in's config"""
+    with open(os.environ[SETTINGS_ENV]) as f:
+        settings = json.load(f)
+    for name, value in settings["config"].items():
+        setattr(config, name, value)
+    os.chdir(settings["workdir"])
+
+
+def wsgi_app():
+    """gunicorn entry point: benchmarks.bench_load:wsgi_app()"""
+    apply_settings()
+    import app
+    return app.app
+
+
+def serve_app(model, port):
+    apply_settings()
+    if model == "async":
+        from aiohttp import web
+        import async_app
+        web.run_app(async_app.create_app(), host="127.0.0.1", port=port, print=None)
+    else:
+        from werkzeug.serving import make_server
+        import app
+        make_server("127.0.0.1", port, app.app, threaded=True).serve_forever()
+
+
+def server_command(model, port, workers, timeout):
+    if model == "gunicorn":
+        return ["gunicorn", "--workers", str(workers), "--worker-class", "sync",
+                "--bind", f"127.0.0.1:{port}", "--timeout", str(int(timeout) + 5),
+                "--log-level", "warning", "benchmarks.bench_load:wsgi_app()"]
+    return [sys.executable, "-m", "benchmarks.bench_load", "--serve", model, "--port", str(port)]
+
+
+def start_process(command, log_path, env=None):
+    log = open(log_path, "w")
+    return subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT, env=env)
+
+
+def stop_process(process):
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def wait_until_serving(process, url, log_path, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            break
+        try:
+            urllib.request.urlopen(url, timeout=5).close()
+            return
+        except urllib.error.HTTPError:
+            return  # any HTTP answer means it is serving
+        except OSError:
+            time.sleep(0.2)
+    with open(log_path) as f:
+        raise RuntimeError(f"server did not come up at {url}:\n{f.read()[-2000:]}")
+
+
+def rpc_calls():
+    """RPC calls the chain stand-in has served so far, by method"""
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{CHAIN_PORT}",
+        data=json.dumps({"jsonrpc": "2.0", "id": 1, "method": "bench_rpcCalls", "params": []}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)["result"]
+
+
+# ----- load generator -----
+
+class Workload:
+    """Request mix of one worker model; each scenario returns True on success"""
+
+    def __init__(self, base, model, works, file_size, rng):
+        self.base = base
+        self.sync = model != "async"
+        self.works = works
+        self.file_size = file_size
+        self.rng = rng
+        self.registered = []
+
+    def scenarios(self, mix):
+        available = {"verify_id", "hash_lookup", "listing"}
+        if self.sync:
+            available |= {"register", "status", "verify_file"}
+        return {name: weight for name, weight in mix.items() if name in available and weight > 0}
+
+    def seeded(self):
+        i = self.rng.randrange(self.works)
+        return i, f"WORK-{i:08X}", hashlib.sha256(f"seed-{i}".encode()).hexdigest()
+
+    async def verify_id(self, session):
+        _, work_id, _ = self.seeded()
+        if not self.sync:
+            async with session.get(f"{self.base}/api/verify", params={"work_id": work_id}) as response:
+                return response.status == 200 and (await response.json())["found"]
+        async with session.get(f"{self.base}/verify", params={"work_id": work_id}) as response:
+            return response.status == 200 and b"Registration Confirmed" in await response.read()
+
+    async def hash_lookup(self, session):
+        _, _, content_hash = self.seeded()
+        if not self.sync:
+            async with session.get(f"{self.base}/api/verify", params={"content_hash": content_hash}) as response:
+                return response.status == 200 and (await response.json())["found"]
+        async with session.post(f"{self.base}/verify", data={"content_hash": content_hash}) as response:
+            return response.status == 200 and b"Registration Confirmed" in await response.read()
+
+    async def verify_file(self, session):
+        i, _, _ = self.seeded()
+        form = FormData()
+        form.add_field("file", f"seed-{i}".encode(), filename="work.txt")
+        async with session.post(f"{self.base}/verify", data=form) as response:
+            return response.status == 200 and b"Registration Confirmed" in await response.read()
+
+    async def listing(self, session):
+        path = "/my-works" if self.sync else "/api/my-works"
+        async with session.get(self.base + path) as response:
+            await response.read()
+            return response.status == 200
+
+    async def register(self, session):
+        form = FormData()
+        form.add_field("file", os.urandom(self.file_size), filename="work.txt")
+        form.add_field("work_title", f"Load {len(self.registered)}")
+        form.add_field("work_type", "image")
+        form.add_field("account_password", PASSWORD)
+        async with session.post(f"{self.base}/register", data=form, allow_redirects=False) as response:
+            location = response.headers.get("Location", "")
+            if response.status != 302 or "/registration/" not in location:
+                return False
+            self.registered.append(location.rsplit("/", 1)[1])
+            return True
+
+    async def status(self, session):
+        work_id = self.rng.choice(self.registered)
+        async with session.get(f"{self.base}/api/registrations/{work_id}") as response:
+            await response.read()
+            return response.status == 200
+
+    def pick(self, scenarios):
+        names = [name for name in scenarios if name != "status" or self.registered]
+        return self.rng.choices(names, [scenarios[name] for name in names])[0]
+
+
+async def run_level(workload, scenarios, concurrency, duration, timeout):
+    """concurrency users for duration seconds; {scenario: [(seconds, outcome)]}"""
+    samples = {name: [] for name in scenarios}
+    deadline = time.perf_counter() + duration
+
+    async def user(session):
+        while time.perf_counter() < deadline:
+            name = workload.pick(scenarios)
+            start = time.perf_counter()
+            try:
+                outcome = "ok" if await getattr(workload, name)(session) else "error"
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+            except Exception:
+                outcome = "error"
+            samples[name].append((time.perf_counter() - start, outcome))
+
+    started = time.perf_counter()
+    # Keeps the session cookie like a browser (flash messages); IP hosts need unsafe=True
+    async with ClientSession(cookie_jar=CookieJar(unsafe=True), connector=TCPConnector(limit=concurrency),
+                             timeout=ClientTimeout(total=timeout)) as session:
+        await asyncio.gather(*[user(session) for _ in range(concurrency)])
+    return samples, time.perf_counter() - started
+
+
+def summarize(model, concurrency, name, samples, elapsed):
+    latencies = sorted(seconds for seconds, _ in samples)
+    outcomes = [outcome for _, outcome in samples]
+    result = {
+        "model": model,
+        "concurrency": concurrency,
+        "endpoint": name,
+        "requests": len(samples),
+        "ok": outcomes.count("ok"),
+        "errors": outcomes.count("error"),
+        "timeouts": outcomes.count("timeout"),
+        "rps": outcomes.count("ok") / elapsed,
+    }
+    if latencies:
+        result["latency_ms"] = {
+            "p50": 1000 * percentile(latencies, 0.5),
+            "p90": 1000 * percentile(latencies, 0.9),
+            "p99": 1000 * percentile(latencies, 0.99),
+            "max": 1000 * latencies[-1],
+        }
+    return result
+
+
+def saturation(results):
+    """Per model and endpoint: peak throughput and the level where gains stopped"""
+    curves = {}
+    for result in results:
+        curves.setdefault((result["model"], result["endpoint"]), []).append(result)
+    points = []
+    for (model, endpoint), curve in curves.items():
+        curve.sort(key=lambda r: r["concurrency"])
+        peak = max(curve, key=lambda r: r["rps"])
+        saturated_at = None
+        for previous, current in zip(curve, curve[1:]):
+            if current["rps"] < previous["rps"] * SATURATION_GAIN:
+                saturated_at = previous["concurrency"]
+                break
+        points.append({
+            "model": model,
+            "endpoint": endpoint,
+            "peak_rps": peak["rps"],
+            "peak_concurrency": peak["concurrency"],
+            "saturated_at": saturated_at,
+            "p99_ms_at_peak": peak.get("latency_ms", {}).get("p99"),
+        })
+    return points
+
+
+def run_model(model, workload, mix, levels, duration, timeout):
+    scenarios = workload.scenarios(mix)
+    results = []
+    for concurrency in levels:
+        calls_before = rpc_calls()
+        samples, elapsed = asyncio.run(run_level(workload, scenarios, concurrency, duration, timeout))
+        calls_after = rpc_calls()
+        requests = sum(len(s) for s in samples.values())
+        rpc_per_request = (sum(calls_after.values()) - sum(calls_before.values())) / max(requests, 1)
+        for name in scenarios:
+            result = summarize(model, concurrency, name, samples[name], elapsed)
+            result["level_rpc_per_request"] = rpc_per_request
+            results.append(result)
+            latency = result.get("latency_ms", {})
+            print(f"{model:<9} {concurrency:>5} {name:<12} {result['requests']:>7} {result['rps']:>8.1f} "
+                  f"{latency.get('p50', 0):>8.1f} {latency.get('p99', 0):>9.1f} "
+                  f"{result['errors']:>5} {result['timeouts']:>5} {rpc_per_request:>6.1f}")
+    return results
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name not in MIX:
+            raise ValueError(f"unknown scenario {name!r} (one of {', '.join(MIX)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def main():
+    args = sys.argv[1:]
+    if "--serve" in args:
+        serve_app(args[args.index("--serve") + 1], int(args[args.index("--port") + 1]))
+        return
+    if "--chain" in args:
+        serve_chain(args[args.index("--chain") + 1], int(args[args.index("--port") + 1]),
+                    int(args[args.index("--works") + 1]), float(args[args.index("--rpc-latency") + 1]),
+                    "--caches" in args)
+        return
+
+    models = args[args.index("--models") + 1].split(",") if "--models" in args else list(MODELS)
+    levels = [int(c) for c in args[args.index("--concurrency") + 1].split(",")] if "--concurrency" in args else [1, 4, 16, 64]
+    duration = float(args[args.index("--duration") + 1]) if "--duration" in args else 15.0
+    works = int(args[args.index("--works") + 1]) if "--works" in args else 200
+    workers = int(args[args.index("--workers") + 1]) if "--workers" in args else 4
+    file_size = parse_size(args[args.index("--file-size") + 1]) if "--file-size" in args else 64 * 1024
+    timeout = float(args[args.index("--timeout") + 1]) if "--timeout" in args else 30.0
+    mix = parse_mix(args[args.index("--mix") + 1]) if "--mix" in args else dict(MIX)
+    rpc_latency = float(args[args.index("--rpc-latency") + 1]) / 1000 if "--rpc-latency" in args else 0.0
+    for model in models:
+        if model not in MODELS:
+            print(f"✗ Unknown worker model: {model} (one of {', '.join(MODELS)})")
+            sys.exit(1)
+    if file_size > config.MAX_FILE_SIZE:
+        print(f"✗ --file-size is above MAX_FILE_SIZE ({config.MAX_FILE_SIZE} bytes)")
+        sys.exit(1)
+    commit, dirty = git_commit()
+    output = os.path.abspath(
+        args[args.index("--output") + 1] if "--output" in args
+        else os.path.join(RESULTS_DIR, f"load-{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    )
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="registry-load-") as workdir:
+        chain_log = os.path.join(workdir, "chain.log")
+        command = [sys.executable, "-m", "benchmarks.bench_load", "--chain", workdir,
+                   "--port", str(CHAIN_PORT), "--works", str(works), "--rpc-latency", str(rpc_latency)] + (["--caches"] if "--caches" in args else [])
+        print(f"⏳ Deploying the registry and seeding {works} works...")
+        chain = start_process(command, chain_log)
+        try:
+            settings_path = os.path.join(workdir, "settings.json")
+            while not os.path.exists(settings_path):
+                if chain.poll() is not None:
+                    with open(chain_log) as f:
+                        print(f"✗ Chain stand-in failed:\n{f.read()[-2000:]}")
+                    sys.exit(1)
+                time.sleep(0.2)
+            env = dict(os.environ, **{SETTINGS_ENV: settings_path})
+            print(f"{'model':<9} {'users':>5} {'endpoint':<12} {'reqs':>7} {'req/s':>8} "
+                  f"{'p50 ms':>8} {'p99 ms':>9} {'err':>5} {'t/o':>5} {'rpc':>6}")
+            for model in models:
+                if model == "gunicorn" and not shutil.which("gunicorn"):
+                    print("⚠️  Skipping gunicorn: not installed (pip install gunicorn)")
+                    continue
+                log_path = os.path.join(workdir, f"{model}.log")
+                server = start_process(server_command(model, APP_PORT, workers, timeout), log_path, env)
+                try:
+                    wait_until_serving(server, f"http://127.0.0.1:{APP_PORT}/", log_path)
+                    workload = Workload(f"http://127.0.0.1:{APP_PORT}", model, works, file_size,
+                                        random.Random(0))
+                    results.extend(run_model(model, workload, mix, levels, duration, timeout))
+                finally:
+                    stop_process(server)
+        finally:
+            stop_process(chain)
+
+    points = saturation(results)
+    print(f"\n{'model':<9} {'endpoint':<12} {'peak req/s':>10} {'at users':>9} {'saturated at':>13} {'p99 ms':>9}")
+    for point in points:
+        print(f"{point['model']:<9} {point['endpoint']:<12} {point['peak_rps']:>10.1f} "
+              f"{point['peak_concurrency']:>9} {point['saturated_at'] or '-':>13} "
+              f"{point['p99_ms_at_peak'] or 0:>9.1f}")
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "parameters": {
+            "models": models, "concurrency": levels, "duration": duration, "works": works,
+            "workers": workers, "file_size": file_size, "timeout": timeout, "mix": mix,
+            "rpc_latency": rpc_latency, "caches": "--caches" in args,
+        },
+        "results": results,
+        "saturation": points,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Benchmark: gas per registration, v1 vs v2 storage layout.
+
+Deploys CopyrightRegistry (string keys) and CopyrightRegistryV2 (bytes16/
+bytes32 keys, packed record) with and without stored text fields on an
+in-process EVM (eth-tester), registers the same works on each, one per
+transaction and in registerWorks batches, and reports gas per work.
+
+Compiles both contracts from source with SOLC_PATH (solc >= 0.8.26, same
+options as README step 6), so the numbers always match the .sol files, and
+needs eth-tester (pip install "web3[tester]").
+
+Usage (from the repository root):
+    python -m benchmarks.bench_storage_layout [--works 50] [--batch 20]
+"""
+from web3 import Web3, EthereumTesterProvider
+import hashlib
+import json
+import subprocess
+import sys
+import config
+import registry_client
+import registry_v2
+
+
+def deploy(w3, compiled, name, *args):
+    abi, bytecode = compiled[name]
+    factory = w3.eth.contract(abi=abi, bytecode=bytecode)
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor(*args).transact())
+    return w3.eth.contract(address=receipt.contractAddress, abi=abi), receipt.gasUsed
+
+
+def sample_works(prefix, start, count):
+    """Deterministic works; prefix keeps content hashes distinct per contract"""
+    return [
+        {
+            "work_id": f"WORK-{i:08X}",
+            "title": f"Sunset Painting #{i}",
+            "type": "image",
+            "content_hash": hashlib.sha256(f"{prefix}-{i}".encode()).hexdigest(),
+            "metadata": '{"license": "CC-BY-4.0"}',
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def args_v1(work):
+    return (work["work_id"], work["title"], work["type"], work["content_hash"], work["metadata"])
+
+
+def args_v2(work):
+    return (
+        registry_v2.encode_work_id(work["work_id"]), work["title"], work["type"],
+        registry_v2.encode_content_hash(work["content_hash"]), work["metadata"],
+    )
+
+
+def measure(w3, contract, encode, prefix, works, batch):
+    """Average gas per work for single and batched registration"""
+    single = []
+    for work in sample_works(prefix, 0, works):
+        tx_hash = contract.functions.registerWork(*encode(work)).transact()
+        single.append(w3.eth.wait_for_transaction_receipt(tx_hash).gasUsed)
+
+    try:
+        columns = list(zip(*[encode(work) for work in sample_works(prefix, works, batch)]))
+        tx_hash = contract.functions.registerWorks(*[list(c) for c in columns], False).transact()
+        batched = w3.eth.wait_for_transaction_receipt(tx_hash).gasUsed / batch
+    except Exception:
+        batched = None  # contract built without registerWorks
+
+    work = sample_works(prefix, 0, 1)[0]
+    encoded = encode(work)
+    verify_gas = contract.functions.verifyWork(encoded[0], encoded[3]).estimate_gas()
+    return sum(single) / len(single), batched, verify_gas
+
+
+def main():
+    args = sys.argv[1:]
+    works, batch = 50, 20
+    if "--works" in args:
+        works = int(args[args.index("--works") + 1])
+    if "--batch" in args:
+        batch = int(args[args.index("--batch") + 1])
+
+    try:
+        compiled = registry_client.compile_contracts("copyright_registry.sol", "copyright_registry_v2.sol")
+    except FileNotFoundError:
+        print(f"✗ {config.SOLC_PATH} not found; install solc >= 0.8.26 or set SOLC_PATH")
+        sys.exit(1)
+    except subprocess.CalledProcessError as e:
+        print(f"✗ Compilation failed:\n{e.stderr}")
+        sys.exit(1)
+
+    w3 = Web3(EthereumTesterProvider())
+    w3.eth.default_account = w3.eth.accounts[0]
+
+    layouts = [
+        ("v1 (strings)", "CopyrightRegistry", (), args_v1),
+        ("v2 (stored text)", "CopyrightRegistryV2", (True,), args_v2),
+        ("v2 (events only)", "CopyrightRegistryV2", (False,), args_v2),
+    ]
+    print(f"{'layout':<18} {'deploy':>10} {'registerWork':>13} {'per work in batch':>18} {'verifyWork':>11}")
+
+    results = []
+    for label, name, ctor_args, encode in layouts:
+        contract, deploy_gas = deploy(w3, compiled, name, *ctor_args)
+        single, batched, verify_gas = measure(w3, contract, encode, label, works, batch)
+        batched_text = f"{batched:>18.0f}" if batched else f"{'n/a':>18}"
+        print(f"{label:<18} {deploy_gas:>10} {single:>13.0f} {batched_text} {verify_gas:>11}")
+        results.append({
+            "layout": label, "deploy_gas": deploy_gas, "register_gas": single,
+            "batched_gas_per_work": batched, "verify_gas": verify_gas,
+        })
+
+    print("\n" + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""Benchmark suite: registration and verification on an in-process chain.
+
+Deploys the compiled registry (build/, README step 6) to eth-tester's py-evm
+backend, so no Geth node is needed, seeds it to each --scales size and at
+every scale times:
+
+- CLIs: register_work, verify_work (by work ID and by file) and
+  list_creator_works (first page)
+- Flask routes through the test client: POST /register, GET /verify,
+  POST /verify (file upload), GET /my-works and POST /api/verify (100 IDs)
+
+Operations that take a file run once per --sizes entry (up to
+MAX_FILE_SIZE). Each reports ops/s, p50/p90/p99 latency, gas per operation
+(from the blocks it mined) and JSON-RPC calls per operation, by method.
+Everything runs in a temporary directory with the read replica, view cache,
+file hash cache and similarity index off, so every operation reaches the
+chain and hashes its file. Seeding uses registerWorks batches when the
+deployed bytecode has them, else one registerWork per transaction (100k
+works then take about an hour).
+
+Results are written as JSON together with the git commit, so runs can be
+compared; --compare exits with status 1 when an operation got slower,
+costlier or chattier than --threshold percent.
+
+Usage (from the repository root; needs eth-tester: pip install "web3[tester]"):
+    python -m benchmarks.bench_suite [--scales 1,100,1000] [--sizes 1K,1M,16M] [--samples 20] [--output FILE]
+    python -m benchmarks.bench_suite --compare OLD.json NEW.json [--threshold 10]
+"""
+from contextlib import redirect_stdout
+from datetime import datetime
+from web3 import Web3, EthereumTesterProvider
+from eth_account import Account
+from eth_utils import function_abi_to_4byte_selector
+import hashlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import web3
+import config
+import metrics
+import nonce_manager
+import registry_client
+import signer
+from benchmarks.bench_upload_hashing import parse_size
+
+PASSWORD = "bench"
+SEED_BATCH = 50  # works per registerWorks seeding transaction
+API_VERIFY_ITEMS = 100
+RESULTS_DIR = os.path.join("benchmarks", "results")
+
+
+def git_commit():
+    """(commit hash, True if the tree has uncommitted changes) or (None, None)"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def configure(workdir):
+    """Point every store at workdir and turn off the caches that would hide chain work"""
+    config.ABI_FILE = os.path.abspath(config.ABI_FILE)
+    config.BIN_FILE = os.path.abspath(config.BIN_FILE)
+    config.STATE_DIR = os.path.join(workdir, "state")
+    for name in dir(config):
+        if name.endswith("_DB"):
+            setattr(config, name, os.path.join(config.STATE_DIR, f"{name.lower()}.sqlite"))
+    config.BLOB_DIR = os.path.join(workdir, "blobs")
+    config.UPLOAD_PART_DIR = os.path.join(config.BLOB_DIR, "parts")
+    config.INDEX_ENABLED = False
+    config.READ_CACHE_ENABLED = False
+    config.HASH_CACHE_ENABLED = False
+    config.SIMILARITY_ENABLED = False
+    config.METRICS_ENABLED = True
+    config.VERIFY_API_RATE = config.VERIFY_API_BURST = 10 ** 9
+    for folder in (config.STATE_DIR, os.path.join(workdir, "hasil"), os.path.join(workdir, "files")):
+        os.makedirs(folder, exist_ok=True)
+    os.chdir(workdir)
+
+
+def start_chain(provider=None):
+    """eth-tester chain with the registry deployed; (w3, contract, has registerWorks)"""
+    provider = metrics.instrument_provider(provider or EthereumTesterProvider(), registry_client.function_names)
+    w3 = Web3(provider)
+    # Every entry point (CLIs, app.py) takes its Web3 from registry_client
+    registry_client._web3[os.getpid()] = w3
+
+    key = provider.ethereum_tester.backend.account_keys[0].to_bytes()
+    account = Account.from_key(key)
+    config.UTC_KEYSTORE_FILE = os.path.abspath("keystore.json")
+    with open(config.UTC_KEYSTORE_FILE, "w") as f:
+        json.dump(Account.encrypt(key, PASSWORD, kdf="pbkdf2", iterations=2), f)
+    config.ACCOUNT_ADDRESS = account.address
+    config.CHAIN_ID = w3.eth.chain_id
+    signer.get_signer().unlock(PASSWORD)
+
+    abi = registry_client.load_abi()
+    with open(config.BIN_FILE) as f:
+        bytecode = f.read().strip()
+    args = (config.REGISTRY_STORE_DETAILS,) if config.CONTRACT_VERSION == 2 else ()
+    tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact(
+        {"from": account.address}
+    )
+    config.CONTRACT_ADDRESS = w3.eth.wait_for_transaction_receipt(tx_hash).contractAddress
+    contract = registry_client.get_contract(w3)
+
+    register_works = next(entry for entry in abi if entry.get("name") == "registerWorks")
+    return w3, contract, function_abi_to_4byte_selector(register_works).hex() in bytecode
+
+
+def seed(w3, contract, batched, start, count):
+    """Register works start..start+count-1 from the signer account"""
+    address = config.ACCOUNT_ADDRESS
+    works = [
+        (f"WORK-{i:08X}", f"Seeded Work #{i}", "image",
+         hashlib.sha256(f"seed-{i}".encode()).hexdigest(), '{"license": "CC-BY-4.0"}')
+        for i in range(start, start + count)
+    ]
+    if batched:
+        for i in range(0, len(works), SEED_BATCH):
+            columns = [list(column) for column in zip(*works[i:i + SEED_BATCH])]
+            contract.functions.registerWorks(*columns, False).transact({"from": address})
+    else:
+        for work in works:
+            contract.functions.registerWork(*work).transact({"from": address})
+    # Seeding bypassed the nonce manager
+    nonce_manager.for_account(w3, address).sync()
+
+
+def tester_block(w3):
+    return w3.provider.ethereum_tester.get_block_by_number("latest")
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(w3, operation, samples):
+    """Run operation(i) samples times; latency, gas and RPC figures"""
+    latencies = []
+    errors = 0
+    gas = 0
+    rpc_before = metrics.RPC_CALLS.by("method")
+    for i in range(samples):
+        block = tester_block(w3)["number"]
+        start = time.perf_counter()
+        try:
+            with redirect_stdout(io.StringIO()):
+                ok = operation(i)
+        except Exception:
+            ok = False
+        latencies.append(time.perf_counter() - start)
+        errors += not ok
+        latest = tester_block(w3)["number"]
+        gas += sum(w3.provider.ethereum_tester.get_block_by_number(n)["gas_used"]
+                   for n in range(block + 1, latest + 1))
+    rpc_after = metrics.RPC_CALLS.by("method")
+    rpc = {method: (count - rpc_before.get(method, 0)) / samples
+           for method, count in rpc_after.items() if count != rpc_before.get(method, 0)}
+    ordered = sorted(latencies)
+    return {
+        "samples": samples,
+        "errors": errors,
+        "ops_per_s": samples / sum(latencies),
+        "latency_ms": {
+            "mean": 1000 * sum(latencies) / samples,
+            "p50": 1000 * percentile(ordered, 0.5),
+            "p90": 1000 * percentile(ordered, 0.9),
+            "p99": 1000 * percentile(ordered, 0.99),
+            "max": 1000 * ordered[-1],
+        },
+        "gas_per_op": gas / samples,
+        "rpc_per_op": sum(rpc.values()),
+        "rpc_by_method": rpc,
+    }
+
+
+def run(scales, sizes, samples):
+    w3, contract, batched = start_chain()
+    # Imported only now: app.py builds its Web3, signer and stores at import time
+    import register_work
+    import verify_work
+    import list_works
+    import app as webapp
+
+    client = webapp.app.test_client()
+    rng = random.Random(0)
+    results = []
+    seeded = 0  # works registered by seed()
+    works = 0   # works of the creator, including the ones the operations register
+
+    def record(op, scale, size, operation):
+        result = {"op": op, "scale": scale, "size": size, "works": works,
+                  **measure(w3, operation, samples)}
+        results.append(result)
+        print(f"{op:<28} {scale:>7} {size or '':>9} {result['ops_per_s']:>8.1f} "
+              f"{result['latency_ms']['p50']:>8.1f} {result['latency_ms']['p99']:>8.1f} "
+              f"{result['gas_per_op']:>9.0f} {result['rpc_per_op']:>6.1f} {result['errors']:>4}")
+
+    print(f"Bytecode has registerWorks: {batched} (seeding {'batched' if batched else 'one work per transaction'})")
+    print(f"{'operation':<28} {'scale':>7} {'size':>9} {'ops/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'gas/op':>9} {'rpc':>6} {'err':>4}")
+    for scale in scales:
+        if scale > works:
+            started = time.perf_counter()
+            seed(w3, contract, batched, seeded, scale - works)
+            print(f"⏳ Seeded {scale - works} works in {time.perf_counter() - started:.1f}s")
+            seeded += scale - works
+            works = scale
+        seeded_id = lambda i: f"WORK-{rng.randrange(seeded):08X}"
+
+        # Reads first, while the creator holds exactly `scale` works
+        record("cli.verify_work.id", scale, None, lambda i: verify_work.verify_work(work_id=seeded_id(i)))
+        record("cli.list_creator_works", scale, None,
+               lambda i: list_works.list_creator_works(config.ACCOUNT_ADDRESS, page=1))
+        record("web.verify.id", scale, None, lambda i: b"Registration Confirmed" in client.get(
+            f"/verify?work_id={seeded_id(i)}").data)
+        record("web.my_works", scale, None, lambda i: client.get("/my-works").status_code == 200)
+        record(f"web.api_verify.{API_VERIFY_ITEMS}", scale, None, lambda i: client.post(
+            "/api/verify", json={"work_ids": [seeded_id(i) for _ in range(API_VERIFY_ITEMS)]},
+        ).get_json()["found"] == API_VERIFY_ITEMS)
+
+        for size in sizes:
+            files = []
+            for i in range(samples):
+                path = os.path.join("files", f"{scale}-{size}-{i}.bin")
+                with open(path, "wb") as f:
+                    f.write(rng.randbytes(size))
+                files.append(path)
+            uploads = [rng.randbytes(size) for _ in range(samples)]
+
+            record("cli.register_work", scale, size,
+                   lambda i: register_work.register_work(files[i], f"Bench {i}", "image", "", PASSWORD))
+            record("cli.verify_work.file", scale, size,
+                   lambda i: verify_work.verify_work(filepath=files[i]))
+            record("web.register", scale, size, lambda i: client.post(
+                "/register",
+                data={"file": (io.BytesIO(uploads[i]), "work.txt"), "work_title": f"Web {i}",
+                      "work_type": "image", "account_password": PASSWORD},
+                content_type="multipart/form-data",
+            ).headers.get("Location", "").startswith("/registration/"))
+            record("web.verify.file", scale, size, lambda i: b"Registration Confirmed" in client.post(
+                "/verify", data={"file": (io.BytesIO(uploads[i]), "work.txt")},
+                content_type="multipart/form-data", follow_redirects=True,
+            ).data)
+            works += 2 * samples
+    return batched, results
+
+
+def compare(old_path, new_path, threshold):
+    """Print changes between two result files; True if nothing regressed"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old.get('commit') or old_path} -> {new.get('commit') or new_path}")
+    print(f"{'operation':<28} {'scale':>7} {'size':>9} {'p50 ms':>18} {'gas/op':>20} {'rpc/op':>14}")
+    before = {(r["op"], r["scale"], r["size"]): r for r in old["results"]}
+    regressed = False
+    for result in new["results"]:
+        previous = before.get((result["op"], result["scale"], result["size"]))
+        if previous is None:
+            continue
+        pairs = [
+            (previous["latency_ms"]["p50"], result["latency_ms"]["p50"]),
+            (previous["gas_per_op"], result["gas_per_op"]),
+            (previous["rpc_per_op"], result["rpc_per_op"]),
+        ]
+        cells = []
+        worse = False
+        for a, b in pairs:
+            change = (b - a) / a * 100 if a else 0.0
+            worse |= change > threshold
+            cells.append(f"{b:>9.1f} ({change:+5.1f}%)")
+        regressed |= worse
+        print(f"{result['op']:<28} {result['scale']:>7} {result['size'] or '':>9} "
+              f"{'  '.join(cells)}{'  ⚠️' if worse else ''}")
+    return not regressed
+
+
+def main():
+    args = sys.argv[1:]
+    if "--compare" in args:
+        position = args.index("--compare")
+        threshold = float(args[args.index("--threshold") + 1]) if "--threshold" in args else 10.0
+        sys.exit(0 if compare(args[position + 1], args[position + 2], threshold) else 1)
+
+    scales = [1, 100, 1000]
+    sizes = ["1K", "1M", "16M"]
+    samples = 20
+    if "--scales" in args:
+        scales = [int(scale) for scale in args[args.index("--scales") + 1].split(",")]
+    if "--sizes" in args:
+        sizes = args[args.index("--sizes") + 1].split(",")
+    if "--samples" in args:
+        samples = int(args[args.index("--samples") + 1])
+    commit, dirty = git_commit()
+    output = os.path.abspath(
+        args[args.index("--output") + 1] if "--output" in args
+        else os.path.join(RESULTS_DIR, f"{(commit or 'unknown')[:12]}{'-dirty' if dirty else ''}.json")
+    )
+    byte_sizes = []
+    for label in sizes:
+        size = parse_size(label)
+        if size > config.MAX_FILE_SIZE:
+            print(f"⚠️  Skipping size {label}: above MAX_FILE_SIZE ({config.MAX_FILE_SIZE} bytes)")
+        else:
+            byte_sizes.append(size)
+
+    repo = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="registry-bench-") as workdir:
+        configure(workdir)
+        try:
+            batched, results = run(sorted(scales), byte_sizes, samples)
+        finally:
+            os.chdir(repo)
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "web3": web3.__version__,
+        "contract_version": config.CONTRACT_VERSION,
+        "batched_seeding": batched,
+        "parameters": {"scales": sorted(scales), "sizes": byte_sizes, "samples": samples},
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
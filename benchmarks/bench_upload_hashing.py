@@ -0,0 +1,105 @@
+"""Benchmark: upload hashing, save-then-rehash vs hash-while-streaming.
+
+Posts files of several sizes through Flask's test client to two minimal
+apps that mirror the /verify upload path: the old one saves the upload to
+UPLOAD_FOLDER and reads it back in 4 KB blocks, the new one uses
+upload_stream.HashingRequest and never touches disk. Reports wall-clock
+latency and CPU time per request.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_upload_hashing [--sizes 64K,1M,16M] [--repeat 5]
+"""
+from flask import Flask, request
+import hashlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import upload_stream
+
+UNITS = {"K": 1024, "M": 1024 * 1024}
+
+
+def parse_size(text):
+    if text[-1].upper() in UNITS:
+        return int(text[:-1]) * UNITS[text[-1].upper()]
+    return int(text)
+
+
+def legacy_app(folder):
+    """Old path: save the upload, then hash the saved file"""
+    app = Flask("legacy")
+
+    @app.route("/verify", methods=["POST"])
+    def verify():
+        file = request.files["file"]
+        filepath = os.path.join(folder, "upload.bin")
+        file.save(filepath)
+        sha256_hash = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for byte_block in iter(lambda: f.read(4096), b""):
+                sha256_hash.update(byte_block)
+        return sha256_hash.hexdigest()
+    return app
+
+
+def streaming_app():
+    """New path: hash computed while the multipart body is parsed"""
+    app = Flask("streaming")
+    app.request_class = upload_stream.HashingRequest
+
+    @app.route("/verify", methods=["POST"])
+    def verify():
+        return upload_stream.upload_hash(request.files["file"])
+    return app
+
+
+def time_upload(client, payload, repeat):
+    """Best wall-clock and CPU milliseconds per request over repeat runs"""
+    best_wall = best_cpu = None
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        response = client.post(
+            "/verify", data={"file": (io.BytesIO(payload), "work.bin")},
+            content_type="multipart/form-data",
+        )
+        wall = (time.perf_counter() - wall) * 1000
+        cpu = (time.process_time() - cpu) * 1000
+        assert response.data.decode() == hashlib.sha256(payload).hexdigest()
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        best_cpu = cpu if best_cpu is None else min(best_cpu, cpu)
+    return best_wall, best_cpu
+
+
+def main():
+    args = sys.argv[1:]
+    sizes = ["64K", "1M", "16M"]
+    repeat = 5
+    if "--sizes" in args:
+        sizes = args[args.index("--sizes") + 1].split(",")
+    if "--repeat" in args:
+        repeat = int(args[args.index("--repeat") + 1])
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        legacy = legacy_app(folder).test_client()
+        streaming = streaming_app().test_client()
+        print(f"{'size':>6} {'old ms':>9} {'old cpu':>9} {'new ms':>9} {'new cpu':>9} {'speedup':>8}")
+        for label in sizes:
+            payload = os.urandom(parse_size(label))
+            old_wall, old_cpu = time_upload(legacy, payload, repeat)
+            new_wall, new_cpu = time_upload(streaming, payload, repeat)
+            print(f"{label:>6} {old_wall:>9.2f} {old_cpu:>9.2f} {new_wall:>9.2f} "
+                  f"{new_cpu:>9.2f} {old_wall / new_wall:>7.1f}x")
+            results.append({
+                "size": len(payload), "old_ms": old_wall, "old_cpu_ms": old_cpu,
+                "new_ms": new_wall, "new_cpu_ms": new_cpu,
+            })
+
+    print("\n" + json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Content-addressed store for uploaded files.
+
+Uploads are stored once per SHA-256 under BLOB_DIR with two levels of
+fan-out (ab/cd/abcd...), written to a temporary file and renamed into
+place, so a reader never sees a partial blob and two uploads of the same
+content share one file. Each registration that uses a blob holds a
+reference (content_hash, work_id) in BLOB_DB; the garbage collector drops
+references of failed registrations and deletes blobs nobody references.
+Chunked uploads are assembled next to the store and renamed in with adopt().
+
+Collect garbage (e.g. from cron):
+    python blob_store.py gc [--dry-run]
+    python blob_store.py stats
+"""
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import config
+
+HEX_HASH = re.compile(r"^[0-9a-f]{64}$")
+
+COPY_BUFFER = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    content_hash TEXT PRIMARY KEY,
+    size         INTEGER NOT NULL,
+    stored_at    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS refs (
+    content_hash TEXT NOT NULL,
+    work_id      TEXT NOT NULL,
+    filename     TEXT,
+    created_at   REAL NOT NULL,
+    PRIMARY KEY (content_hash, work_id)
+);
+CREATE INDEX IF NOT EXISTS idx_refs_work ON refs (work_id);
+"""
+
+
+class BlobStore:
+    """Sharded blob directory plus a SQLite table of references"""
+
+    def __init__(self, root=None, path=None):
+        self.root = root or config.BLOB_DIR
+        self.path = path or config.BLOB_DB
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def path_for(self, content_hash):
+        """Blob path for a hex SHA-256: BLOB_DIR/ab/cd/abcd..."""
+        content_hash = content_hash.lower()
+        if not HEX_HASH.match(content_hash):
+            raise ValueError(f"Not a SHA-256 hex digest: {content_hash}")
+        return os.path.join(self.root, content_hash[:2], content_hash[2:4], content_hash)
+
+    def exists(self, content_hash):
+        return os.path.exists(self.path_for(content_hash))
+
+    def _touch(self, content_hash):
+        """True if the blob is already stored"""
+        with self._conn() as conn:
+            # Refreshing stored_at keeps the GC grace period from expiring under us
+            touched = conn.execute(
+                "UPDATE blobs SET stored_at = ? WHERE content_hash = ?",
+                (time.time(), content_hash),
+            ).rowcount
+        return bool(touched) and os.path.exists(self.path_for(content_hash))
+
+    def _record(self, content_hash, size):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?)",
+                (content_hash, size, time.time()),
+            )
+
+    def put(self, stream, content_hash):
+        """
+        Store stream's content under content_hash; returns False if the blob
+        was already stored (the upload is not written again)
+        """
+        path = self.path_for(content_hash)
+        if self._touch(content_hash):
+            return False
+
+        stream.seek(0)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                shutil.copyfileobj(stream, f, COPY_BUFFER)
+                f.flush()
+                os.fsync(f.fileno())
+            size = os.path.getsize(tmp_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._record(content_hash, size)
+        return True
+
+    def adopt(self, file_path, content_hash):
+        """
+        Move a complete file on the same filesystem into the store under
+        content_hash without copying it; like put(), returns False if the
+        blob was already stored (file_path is then deleted)
+        """
+        path = self.path_for(content_hash)
+        if self._touch(content_hash):
+            os.unlink(file_path)
+            return False
+        size = os.path.getsize(file_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(file_path, path)
+        self._record(content_hash, size)
+        return True
+
+    def add_ref(self, content_hash, work_id, filename=None):
+        """Mark the blob as used by a registration"""
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO refs VALUES (?, ?, ?, ?)",
+                (content_hash, work_id, filename, time.time()),
+            )
+
+    def release(self, work_ids):
+        """Drop the references held by work_ids; returns how many were dropped"""
+        with self._conn() as conn:
+            return conn.executemany(
+                "DELETE FROM refs WHERE work_id = ?", [(work_id,) for work_id in work_ids]
+            ).rowcount
+
+    def refs(self, content_hash):
+        """Work IDs referencing a blob"""
+        rows = self._conn().execute(
+            "SELECT work_id FROM refs WHERE content_hash = ? ORDER BY created_at",
+            (content_hash,),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_refs(self):
+        """(content_hash, work_id, filename) of every reference, oldest first"""
+        return self._conn().execute(
+            "SELECT content_hash, work_id, filename FROM refs ORDER BY created_at"
+        ).fetchall()
+
+    def stats(self):
+        conn = self._conn()
+        blobs, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        refs = conn.execute("SELECT COUNT(*) FROM refs").fetchone()[0]
+        unreferenced = conn.execute(
+            "SELECT COUNT(*) FROM blobs b WHERE NOT EXISTS "
+            "(SELECT 1 FROM refs r WHERE r.content_hash = b.content_hash)"
+        ).fetchone()[0]
+        return {"blobs": blobs, "bytes": size, "refs": refs, "unreferenced": unreferenced}
+
+    def collect(self, registrations=None, grace=None, dry_run=False):
+        """
+        Release references of failed registrations, then delete blobs that
+        have had no reference for longer than grace seconds
+        """
+        grace = config.BLOB_GC_GRACE if grace is None else grace
+        cutoff = time.time() - grace
+        released = 0
+        if registrations is not None:
+            failed = registrations.failed_work_ids()
+            if dry_run:
+                released = sum(
+                    self._conn().execute(
+                        "SELECT COUNT(*) FROM refs WHERE work_id = ?", (work_id,)
+                    ).fetchone()[0]
+                    for work_id in failed
+                )
+            elif failed:
+                released = self.release(failed)
+
+        candidates = [row[0] for row in self._conn().execute(
+            "SELECT content_hash FROM blobs b WHERE stored_at < ? AND NOT EXISTS "
+            "(SELECT 1 FROM refs r WHERE r.content_hash = b.content_hash)",
+            (cutoff,),
+        )]
+        deleted = 0
+        freed = 0
+        for content_hash in candidates:
+            if dry_run:
+                deleted += 1
+                continue
+            conn = self._conn()
+            # Delete the row and the file in one write transaction so a
+            # concurrent put() of the same content waits and then rewrites it
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT size FROM blobs WHERE content_hash = ? AND stored_at < ? AND NOT EXISTS "
+                    "(SELECT 1 FROM refs WHERE content_hash = ?)",
+                    (content_hash, cutoff, content_hash),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM blobs WHERE content_hash = ?", (content_hash,))
+                    try:
+                        os.unlink(self.path_for(content_hash))
+                    except FileNotFoundError:
+                        pass
+                    deleted += 1
+                    freed += row[0]
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        # Temporary files left behind by interrupted writes
+        stale = 0
+        for name in os.listdir(self.tmp_dir):
+            tmp_path = os.path.join(self.tmp_dir, name)
+            if os.path.getmtime(tmp_path) < cutoff:
+                stale += 1
+                if not dry_run:
+                    os.unlink(tmp_path)
+
+        return {"released": released, "deleted": deleted, "bytes_freed": freed, "stale_tmp": stale}
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("gc", "stats"):
+        print("Usage:")
+        print("  python blob_store.py gc [--dry-run]")
+        print("  python blob_store.py stats")
+        sys.exit(1)
+
+    store = BlobStore()
+    if args[0] == "stats":
+        stats = store.stats()
+        print(f"📄 {stats['blobs']} blobs, {stats['bytes'] / 1024 / 1024:.1f} MB, "
+              f"{stats['refs']} references, {stats['unreferenced']} unreferenced")
+        return
+
+    import registration_queue
+    dry_run = "--dry-run" in args
+    result = store.collect(registration_queue.RegistrationQueue(), dry_run=dry_run)
+    prefix = "Would delete" if dry_run else "✓ Deleted"
+    print(f"{prefix} {result['deleted']} blobs ({result['bytes_freed'] / 1024 / 1024:.1f} MB), "
+          f"released {result['released']} references of failed registrations, "
+          f"{result['stale_tmp']} stale temporary files")
+
+
+if __name__ == "__main__":
+    main()
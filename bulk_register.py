@@ -0,0 +1,411 @@
+"""Bulk registration of many files.
+
+Takes a directory tree or a CSV/JSONL manifest, hashes files in a process
+pool, skips content that is duplicated locally or already on-chain, then
+submits registerWork transactions with pipelined nonces (up to --window in
+flight, sent as JSON-RPC batches). With --batch, works are packed into
+registerWorks transactions sized by the block gas limit instead of one
+transaction each. Progress is appended to a checkpoint file so an
+interrupted run resumes where it stopped.
+
+Manifest columns / keys: path, title, type, metadata (only path is required).
+"""
+from web3 import Web3
+from hexbytes import HexBytes
+from concurrent.futures import ProcessPoolExecutor
+from getpass import getpass
+import csv
+import json
+import os
+import sys
+import time
+import uuid
+import config
+import batch_reads
+import batch_submitter
+import confirmation_tracker
+import fee_oracle
+import nonce_manager
+import signer
+import registry_client
+import registry_v2
+from file_hash import calculate_file_hash
+
+TYPE_BY_EXTENSION = {
+    'png': 'image', 'jpg': 'image', 'jpeg': 'image', 'gif': 'image',
+    'txt': 'text', 'pdf': 'text', 'doc': 'text', 'docx': 'text',
+    'mp3': 'music', 'mp4': 'video',
+}
+
+# Checkpoint statuses
+SUBMITTED = "submitted"
+REGISTERED = "registered"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+DONE = (REGISTERED, DUPLICATE)
+
+
+def default_type(path):
+    return TYPE_BY_EXTENSION.get(path.rsplit('.', 1)[-1].lower(), 'other')
+
+
+def load_items(source):
+    """Read work items from a directory, .csv or .jsonl manifest"""
+    items = []
+    if os.path.isdir(source):
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if config.allowed_file(name):
+                    path = os.path.join(root, name)
+                    items.append({'path': path, 'title': os.path.splitext(name)[0]})
+    elif source.endswith('.csv'):
+        with open(source, newline='') as f:
+            items = list(csv.DictReader(f))
+    else:
+        with open(source) as f:
+            items = [json.loads(line) for line in f if line.strip()]
+
+    for item in items:
+        item['title'] = item.get('title') or os.path.splitext(os.path.basename(item['path']))[0]
+        item['type'] = item.get('type') or default_type(item['path'])
+        item['metadata'] = item.get('metadata') or ''
+    return items
+
+
+class Checkpoint:
+    """Append-only JSONL log of per-file progress (last record per path wins)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        self.records[record['path']] = record
+        self._file = open(path, 'a')
+
+    def get(self, path):
+        return self.records.get(path)
+
+    def write(self, record):
+        self.records[record['path']] = record
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def _hash_file(path):
+    st = os.stat(path)
+    return path, calculate_file_hash(path), st.st_size, st.st_mtime_ns
+
+
+def hash_files(items, checkpoint, workers):
+    """Fill item['content_hash'], reusing checkpointed hashes of unchanged files"""
+    todo = []
+    for item in items:
+        record = checkpoint.get(item['path'])
+        try:
+            st = os.stat(item['path'])
+        except OSError as e:
+            item['error'] = str(e)
+            continue
+        if record and record.get('size') == st.st_size and record.get('mtime_ns') == st.st_mtime_ns:
+            item['content_hash'] = record['content_hash']
+        else:
+            todo.append(item)
+
+    by_path = {item['path']: item for item in todo}
+    total_bytes = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for path, content_hash, size, mtime_ns in pool.map(
+            _hash_file, list(by_path), chunksize=16
+        ):
+            item = by_path[path]
+            item['content_hash'] = content_hash
+            item['size'] = size
+            item['mtime_ns'] = mtime_ns
+            total_bytes += size
+    elapsed = time.perf_counter() - start
+    if todo:
+        print(f"✓ Hashed {len(todo)} files ({total_bytes / 1e6:.1f} MB) in {elapsed:.1f}s "
+              f"- {len(todo) / elapsed:.1f} files/s, {total_bytes / 1e6 / elapsed:.1f} MB/s")
+
+
+def send_raw_transactions(w3, raw_transactions):
+    """
+    Broadcast signed transactions in one JSON-RPC batch.
+    Returns a list of (tx_hash, error) in the same order.
+    """
+    try:
+        responses = w3.provider.make_batch_request(
+            [("eth_sendRawTransaction", [Web3.to_hex(raw)]) for raw in raw_transactions]
+        )
+        if isinstance(responses, list):
+            return [
+                (response.get("result"), (response.get("error") or {}).get("message"))
+                for response in responses
+            ]
+    except (NotImplementedError, AttributeError, ValueError, OSError):
+        pass
+
+    results = []
+    for raw in raw_transactions:
+        try:
+            results.append((Web3.to_hex(w3.eth.send_raw_transaction(raw)), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
+
+
+def estimate_gas_limit(contract, items, sender):
+    """
+    Upper-bound gas for a window of registrations: one synthetic call whose
+    string fields are as long as the longest in the window.
+    """
+    def longest(key):
+        return max(len(item[key].encode()) for item in items)
+
+    return fee_oracle.register_work_gas_limit(
+        contract, sender,
+        f"WORK-{uuid.uuid4().hex[:8].upper()}",
+        "x" * longest('title'),
+        "x" * longest('type'),
+        uuid.uuid4().hex * 2,
+        "x" * longest('metadata'),
+    )
+
+
+def _with_work_ids(items):
+    for item in items:
+        item['work_id'] = f"WORK-{uuid.uuid4().hex[:8].upper()}"
+    return items
+
+
+def bulk_register(source, checkpoint_path=None, workers=None, window=None, account_password=None,
+                  batch=False):
+    """
+    Register every file in source; returns True if nothing failed.
+    window is the number of transactions in flight; with batch=True each
+    transaction is a registerWorks call carrying many works.
+    """
+    items = load_items(source)
+    print(f"📄 {len(items)} files in {source}")
+    checkpoint = Checkpoint(checkpoint_path or config.BULK_CHECKPOINT)
+    window = window or config.BULK_WINDOW
+
+    todo = []
+    inflight = {}  # tx_hash -> records of the works it carries
+    awaiting = 0
+    for item in items:
+        record = checkpoint.get(item['path'])
+        if record and record['status'] in DONE:
+            continue
+        if record and record['status'] == SUBMITTED:
+            inflight.setdefault(record['tx_hash'], []).append(record)
+            awaiting += 1
+            continue
+        todo.append(item)
+    print(f"✓ {len(items) - len(todo) - awaiting} already done, "
+          f"{awaiting} awaiting confirmation, {len(todo)} to process")
+
+    hash_files(todo, checkpoint, workers or config.BULK_HASH_WORKERS)
+
+    # Local dedupe: first occurrence of each hash wins
+    seen = {record.get('content_hash') for record in checkpoint.records.values()
+            if record['status'] in DONE + (SUBMITTED,)}
+    unique = []
+    for item in todo:
+        if 'error' in item:
+            checkpoint.write({'path': item['path'], 'status': FAILED, 'error': item['error']})
+        elif item['content_hash'] in seen:
+            checkpoint.write({**item, 'status': DUPLICATE, 'work_id': ''})
+        else:
+            seen.add(item['content_hash'])
+            unique.append(item)
+
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        return False
+    contract = registry_client.get_contract(w3)
+
+    # Chain dedupe in batched lookups
+    existing = batch_reads.check_contents_exist(
+        w3, contract, [item['content_hash'] for item in unique]
+    )
+    queue = []
+    for item, work_id in zip(unique, existing):
+        if work_id:
+            checkpoint.write({**item, 'status': DUPLICATE, 'work_id': work_id})
+        else:
+            queue.append(item)
+    print(f"✓ {len(unique) - len(queue)} already registered on-chain, {len(queue)} to submit")
+
+    if queue:
+        key_signer = signer.get_signer()
+        if not key_signer.is_unlocked() and not account_password:
+            account_password = getpass("Account Password: ")
+        account = key_signer.get_account(account_password)
+        nonces = nonce_manager.for_account(w3, account.address)
+        if nonces.needs_repair():
+            nonces.repair(account)
+    elif not inflight:
+        checkpoint.close()
+        return True
+
+    failed = 0
+    confirmed = 0
+    confirmed_txs = 0
+    submitted = 0
+    transactions = 0
+    start = time.perf_counter()
+    # Receipts only for transactions seen in new blocks, not every one in flight each round
+    tracker = confirmation_tracker.ConfirmationTracker(w3).start()
+    while queue or inflight:
+        # Top up the pipeline
+        slots = window - len(inflight)
+        if batch and slots > 0 and queue:
+            take = queue[:slots * config.BATCH_MAX_WORKS]
+            groups = batch_submitter.pack_batches(
+                contract, account.address, _with_work_ids(take),
+                batch_submitter.gas_budget(w3)
+            )[:slots]
+        else:
+            groups = [([item], None) for item in _with_work_ids(queue[:max(slots, 0)])]
+        del queue[:sum(len(works) for works, _ in groups)]
+
+        if groups:
+            if not batch:
+                gas_limit = estimate_gas_limit(contract, [works[0] for works, _ in groups],
+                                               account.address)
+            fees = fee_oracle.get_oracle(w3).fees()
+            signed = []
+            for works, batch_gas in groups:
+                nonce = nonces.allocate()
+                try:
+                    if batch:
+                        call = batch_submitter._batch_call(contract, works, True)
+                    else:
+                        item = works[0]
+                        call = contract.functions.registerWork(
+                            item['work_id'], item['title'], item['type'],
+                            item['content_hash'], item['metadata']
+                        )
+                    tx = call.build_transaction({
+                        'from': account.address,
+                        'nonce': nonce,
+                        'gas': batch_gas if batch else gas_limit,
+                        'chainId': config.CHAIN_ID,
+                        **fees
+                    })
+                    signed.append((works, nonce, tx, account.sign_transaction(tx)))
+                except Exception as e:
+                    nonces.release(nonce)
+                    for item in works:
+                        checkpoint.write({**item, 'status': FAILED, 'error': str(e)})
+                    failed += len(works)
+
+            results = send_raw_transactions(w3, [s.raw_transaction for _, _, _, s in signed])
+            for (works, nonce, tx, _), (tx_hash, error) in zip(signed, results):
+                if error:
+                    nonces.release(nonce)
+                    for item in works:
+                        checkpoint.write({**item, 'status': FAILED, 'error': error})
+                    failed += len(works)
+                    continue
+                nonces.mark_sent(nonce, HexBytes(tx_hash), tx)
+                records = [{**item, 'status': SUBMITTED, 'tx_hash': tx_hash,
+                            'submitted_at': time.time()} for item in works]
+                for record in records:
+                    checkpoint.write(record)
+                inflight[tx_hash] = records
+                submitted += len(works)
+                transactions += 1
+
+        seen = tracker.updates
+        tracker.retain(inflight)
+        tracker.wait_for_block(seen, config.CONFIRM_POLL_INTERVAL)
+
+        receipts = tracker.receipts(inflight)
+        now = time.time()
+        for tx_hash in list(inflight):
+            receipt = receipts.get(tx_hash)
+            if receipt is None:
+                records = inflight[tx_hash]
+                if now - records[0].get('submitted_at', now) > config.CONFIRM_TIMEOUT:
+                    inflight.pop(tx_hash)
+                    for record in records:
+                        checkpoint.write({**record, 'status': FAILED,
+                                          'error': f"Not mined within {config.CONFIRM_TIMEOUT:.0f}s"})
+                    failed += len(records)
+                continue
+            confirmed_txs += 1
+            for record in inflight.pop(tx_hash):
+                registered = registry_v2.work_id_topic(record['work_id']) in receipt['workIdTopics']
+                if receipt['status'] and registered:
+                    checkpoint.write({**record, 'status': REGISTERED,
+                                      'block_number': receipt['blockNumber'],
+                                      'gas_used': receipt['gasUsed'] // len(receipt['workIdTopics'])})
+                    confirmed += 1
+                elif receipt['status']:
+                    # Skipped inside registerWorks: registered meanwhile
+                    checkpoint.write({**record, 'status': DUPLICATE, 'work_id': ''})
+                else:
+                    checkpoint.write({**record, 'status': FAILED, 'error': 'reverted'})
+                    failed += 1
+
+        elapsed = time.perf_counter() - start
+        print(f"   submitted {submitted} works in {transactions} txs, confirmed {confirmed}, "
+              f"failed {failed}, in flight {len(inflight)} txs - "
+              f"{confirmed / elapsed:.2f} works/s, {confirmed_txs / elapsed:.2f} tx/s")
+
+    tracker.stop()
+    checkpoint.close()
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Done in {elapsed:.1f}s: {confirmed} registered, {failed} failed "
+          f"({confirmed / elapsed if elapsed else 0:.2f} works/s, "
+          f"{confirmed_txs / elapsed if elapsed else 0:.2f} tx/s)")
+    print(f"💾 Progress saved to {checkpoint.path}")
+    return failed == 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python bulk_register.py <directory|manifest.csv|manifest.jsonl> "
+              "[--checkpoint FILE] [--workers N] [--window N] [--batch]")
+        print("\nManifest columns: path, title, type, metadata (only path is required)")
+        print("\nExample:")
+        print("  python bulk_register.py catalogue/ --window 100")
+        print("  python bulk_register.py works.csv --batch")
+        sys.exit(1)
+
+    source = sys.argv[1]
+    options = {}
+    i = 2
+    while i < len(sys.argv):
+        if sys.argv[i] in ("--checkpoint", "--workers", "--window") and i + 1 < len(sys.argv):
+            options[sys.argv[i][2:]] = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--batch":
+            options["batch"] = True
+            i += 1
+        else:
+            i += 1
+
+    if not os.path.exists(source):
+        print(f"✗ Not found: {source}")
+        sys.exit(1)
+
+    success = bulk_register(
+        source,
+        checkpoint_path=options.get("checkpoint"),
+        workers=int(options["workers"]) if "workers" in options else None,
+        window=int(options["window"]) if "window" in options else None,
+        batch=options.get("batch", False),
+    )
+    sys.exit(0 if success else 1)
@@ -0,0 +1,247 @@
+"""Resumable chunked uploads for files past MAX_FILE_SIZE.
+
+A client opens a session (POST /api/uploads with filename and size), sends
+the file as fixed-size chunks (PUT /api/uploads/<id>/chunks/<n>, any order,
+several at once) and, after a dropped connection, asks which chunks are still
+missing (GET /api/uploads/<id>) instead of starting over. Chunks are written
+at their offset into one preallocated part file under UPLOAD_PART_DIR.
+
+- Each chunk may carry its own SHA-256 (X-Chunk-SHA256). It is checked on
+  arrival, so corrupted chunks are rejected and resent on their own; chunks
+  arriving in parallel requests are hashed in parallel (hashlib releases the
+  GIL on large buffers).
+- The file's SHA-256 is advanced over the contiguous prefix of received
+  chunks as they land and kept in memory between requests, so the content
+  hash is ready with the last chunk. Only chunks that arrived ahead of a gap
+  are read back; after a restart the prefix is rehashed once.
+- /register takes the finished session's upload_id instead of a file and
+  the part file is renamed into the blob store (BlobStore.adopt).
+
+Sessions idle for UPLOAD_SESSION_TTL seconds are dropped when new ones open.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+import config
+
+UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+
+COPY_BUFFER = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id    TEXT PRIMARY KEY,
+    filename     TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    chunk_size   INTEGER NOT NULL,
+    received     TEXT NOT NULL,
+    hashed       INTEGER NOT NULL,
+    content_hash TEXT,
+    created_at   REAL NOT NULL,
+    updated_at   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_updated ON uploads (updated_at);
+"""
+
+
+class UploadStore:
+    """Upload sessions in SQLite plus one part file per session"""
+
+    def __init__(self, path=None, part_dir=None):
+        self.path = path or config.UPLOAD_DB
+        self.part_dir = part_dir or config.UPLOAD_PART_DIR
+        os.makedirs(self.part_dir, exist_ok=True)
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self._upload_locks = {}
+        # upload_id -> (chunks hashed, running sha256 of those chunks)
+        self._hashers = {}
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _upload_lock(self, upload_id):
+        with self._lock:
+            return self._upload_locks.setdefault(upload_id, threading.Lock())
+
+    def part_path(self, upload_id):
+        if not UPLOAD_ID.match(upload_id):
+            raise ValueError(f"Not an upload ID: {upload_id}")
+        return os.path.join(self.part_dir, upload_id)
+
+    def create(self, filename, size):
+        """Open a session for a file of size bytes; returns its state"""
+        self.expire()
+        upload_id = uuid.uuid4().hex
+        chunk_size = config.UPLOAD_CHUNK_SIZE
+        chunks = max(1, -(-size // chunk_size))
+        with open(self.part_path(upload_id), "wb") as f:
+            f.truncate(size)
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO uploads VALUES (?, ?, ?, ?, ?, 0, NULL, ?, ?)",
+                (upload_id, filename, size, chunk_size, "0" * chunks, now, now),
+            )
+        return self.get(upload_id)
+
+    def _row(self, upload_id):
+        if not UPLOAD_ID.match(upload_id or ""):
+            return None
+        return self._conn().execute(
+            "SELECT * FROM uploads WHERE upload_id = ?", (upload_id,)
+        ).fetchone()
+
+    def get(self, upload_id):
+        """Session state (with the indexes of missing chunks) or None"""
+        row = self._row(upload_id)
+        if row is None:
+            return None
+        return {
+            "upload_id": row["upload_id"],
+            "filename": row["filename"],
+            "size": row["size"],
+            "chunk_size": row["chunk_size"],
+            "chunks": len(row["received"]),
+            "missing": [i for i, bit in enumerate(row["received"]) if bit == "0"],
+            "content_hash": row["content_hash"],
+            "complete": row["content_hash"] is not None,
+        }
+
+    def write_chunk(self, upload_id, index, data, chunk_sha256=None):
+        """
+        Store chunk index of an upload and advance the file's SHA-256;
+        returns the new state. KeyError for an unknown session, ValueError
+        for a chunk of the wrong size or checksum.
+        """
+        row = self._row(upload_id)
+        if row is None:
+            raise KeyError(upload_id)
+        size, chunk_size = row["size"], row["chunk_size"]
+        if not 0 <= index < len(row["received"]):
+            raise ValueError(f"Chunk index out of range: {index}")
+        expected = min(chunk_size, size - index * chunk_size)
+        if len(data) != expected:
+            raise ValueError(f"Chunk {index} must be {expected} bytes, got {len(data)}")
+        if chunk_sha256 and hashlib.sha256(data).hexdigest() != chunk_sha256.lower():
+            raise ValueError(f"Checksum mismatch for chunk {index}")
+
+        if row["received"][index] == "0":
+            with open(self.part_path(upload_id), "r+b") as f:
+                f.seek(index * chunk_size)
+                f.write(data)
+                f.flush()
+                # The received bit must never outlive the data it stands for
+                os.fsync(f.fileno())
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                received = conn.execute(
+                    "SELECT received FROM uploads WHERE upload_id = ?", (upload_id,)
+                ).fetchone()[0]
+                conn.execute(
+                    "UPDATE uploads SET received = ?, updated_at = ? WHERE upload_id = ?",
+                    (received[:index] + "1" + received[index + 1:], time.time(), upload_id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            self._advance(upload_id, index, data)
+        return self.get(upload_id)
+
+    def _advance(self, upload_id, index, data):
+        """Feed the contiguous run of received chunks to the file's SHA-256"""
+        with self._upload_lock(upload_id):
+            while True:
+                row = self._row(upload_id)
+                if row is None or row["content_hash"] is not None:
+                    return
+                received, hashed, chunk_size = row["received"], row["hashed"], row["chunk_size"]
+                if received[hashed] == "0":
+                    return
+                state = self._hashers.get(upload_id)
+                if state is not None and state[0] == hashed:
+                    sha256 = state[1]
+                else:
+                    # Restarted, or another process hashed part of this upload
+                    sha256 = self._rehash(upload_id, hashed * chunk_size)
+
+                done = hashed
+                with open(self.part_path(upload_id), "rb") as f:
+                    while done < len(received) and received[done] == "1":
+                        if done == index:
+                            sha256.update(data)
+                        else:
+                            # Arrived ahead of a gap: read back once
+                            f.seek(done * chunk_size)
+                            sha256.update(f.read(min(chunk_size, row["size"] - done * chunk_size)))
+                        done += 1
+                content_hash = sha256.hexdigest() if done == len(received) else None
+
+                with self._conn() as conn:
+                    advanced = conn.execute(
+                        "UPDATE uploads SET hashed = ?, content_hash = ?, updated_at = ? "
+                        "WHERE upload_id = ? AND hashed = ?",
+                        (done, content_hash, time.time(), upload_id, hashed),
+                    ).rowcount
+                if advanced:
+                    if content_hash is None:
+                        self._hashers[upload_id] = (done, sha256)
+                    else:
+                        self._hashers.pop(upload_id, None)
+                    return
+                self._hashers.pop(upload_id, None)
+
+    def _rehash(self, upload_id, length):
+        sha256 = hashlib.sha256()
+        with open(self.part_path(upload_id), "rb") as f:
+            while length > 0:
+                data = f.read(min(COPY_BUFFER, length))
+                if not data:
+                    break
+                sha256.update(data)
+                length -= len(data)
+        return sha256
+
+    def store(self, upload_id, blobs):
+        """Move a finished upload into the blob store; returns its content hash"""
+        upload = self.get(upload_id)
+        if upload is None or not upload["complete"]:
+            raise ValueError(f"Upload not finished: {upload_id}")
+        blobs.adopt(self.part_path(upload_id), upload["content_hash"])
+        self.discard(upload_id)
+        return upload["content_hash"]
+
+    def discard(self, upload_id):
+        """Drop a session and its part file"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM uploads WHERE upload_id = ?", (upload_id,))
+        try:
+            os.unlink(self.part_path(upload_id))
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self._upload_locks.pop(upload_id, None)
+        self._hashers.pop(upload_id, None)
+
+    def expire(self, ttl=None):
+        """Drop sessions idle for longer than ttl seconds; returns how many"""
+        ttl = config.UPLOAD_SESSION_TTL if ttl is None else ttl
+        rows = self._conn().execute(
+            "SELECT upload_id FROM uploads WHERE updated_at < ?", (time.time() - ttl,)
+        ).fetchall()
+        for row in rows:
+            self.discard(row["upload_id"])
+        return len(rows)
@@ -6,7 +6,10 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # Blockchain Configuration
+# http(s)://, ws(s):// or a geth .ipc path; see registry_client.py
 RPC_URL = os.getenv("RPC_URL", "http://127.0.0.1:8545")
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", "32"))  # keep-alive HTTP connections per process
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", "30"))  # seconds
 CHAIN_ID = int(os.getenv("CHAIN_ID", "110261"))
 
 # Contract Configuration
@@ -21,7 +24,13 @@ def get_contract_address():
         return None
 
 CONTRACT_ADDRESS = get_contract_address()
-ABI_FILE = "build/CopyrightRegistry.abi"
+# 1: copyright_registry.sol (string keys); 2: copyright_registry_v2.sol (bytes16/bytes32 keys)
+CONTRACT_VERSION = int(os.getenv("CONTRACT_VERSION", "1"))
+ABI_FILE = "build/CopyrightRegistryV2.abi" if CONTRACT_VERSION == 2 else "build/CopyrightRegistry.abi"
+BIN_FILE = ABI_FILE[:-len(".abi")] + ".bin"
+SOLC_PATH = os.getenv("SOLC_PATH", "solc")  # Solidity compiler used by the tests and benchmarks
+# v2 only: also store title/type/metadata in contract storage (else only in events)
+REGISTRY_STORE_DETAILS = os.getenv("REGISTRY_STORE_DETAILS", "1") == "1"
 
 # Account Configuration
 # Default to Account 1 for application operations
@@ -35,10 +44,154 @@ UTC_KEYSTORE_FILE = os.getenv(
 UPLOAD_FOLDER = "uploads"
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'mp3', 'mp4', 'doc', 'docx'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16 MB
+# Uploads kept in memory up to this size, then spooled to a temporary file
+UPLOAD_SPOOL_SIZE = int(os.getenv("UPLOAD_SPOOL_SIZE", 1024 * 1024))
+
+# Local State Configuration
+# Directory for local databases (read replica, queues, caches)
+STATE_DIR = os.getenv("STATE_DIR", "state")
+
+# Read Replica Configuration
+# Local SQLite copy of WorkRegistered events, used to serve reads without eth_call
+INDEX_ENABLED = os.getenv("INDEX_ENABLED", "1") == "1"
+INDEX_IN_PROCESS = os.getenv("INDEX_IN_PROCESS", "1") == "1"  # run indexer thread inside app.py
+INDEX_DB = os.getenv("INDEX_DB", os.path.join(STATE_DIR, "registry_index.db"))
+INDEX_START_BLOCK = int(os.getenv("INDEX_START_BLOCK", "0"))
+INDEX_CONFIRMATIONS = int(os.getenv("INDEX_CONFIRMATIONS", "1"))  # blocks behind head
+INDEX_BATCH_BLOCKS = int(os.getenv("INDEX_BATCH_BLOCKS", "2000"))  # max blocks per eth_getLogs
+INDEX_REORG_DEPTH = int(os.getenv("INDEX_REORG_DEPTH", "64"))  # block hashes kept for reorg checks
+INDEX_POLL_INTERVAL = float(os.getenv("INDEX_POLL_INTERVAL", "5"))  # seconds
+INDEX_MAX_AGE = float(os.getenv("INDEX_MAX_AGE", "60"))  # seconds; older replica falls back to chain
+
+# Batched Reads
+# Work IDs per aggregate eth_call / JSON-RPC batch (geth caps batches at 1000 items)
+BATCH_READ_SIZE = int(os.getenv("BATCH_READ_SIZE", "200"))
+WORKS_PAGE_SIZE = int(os.getenv("WORKS_PAGE_SIZE", "24"))  # works per /my-works page
+
+# Registration Pipeline
+# /register broadcasts and returns; a confirmer thread resolves receipts as blocks arrive
+QUEUE_DB = os.getenv("QUEUE_DB", os.path.join(STATE_DIR, "registrations.db"))
+CONFIRM_IN_PROCESS = os.getenv("CONFIRM_IN_PROCESS", "1") == "1"  # run confirmer inside app.py
+CONFIRM_POLL_INTERVAL = float(os.getenv("CONFIRM_POLL_INTERVAL", "3"))  # seconds between head reads without newHeads
+CONFIRM_TIMEOUT = float(os.getenv("CONFIRM_TIMEOUT", "600"))  # seconds before a tx is marked expired (still watched)
+CONFIRM_DEPTH = int(os.getenv("CONFIRM_DEPTH", "1"))  # blocks from the tx's own to the head; 1 = mined
+CONFIRM_REORG_DEPTH = int(os.getenv("CONFIRM_REORG_DEPTH", "64"))  # block hashes kept for reorg checks
+# ws(s):// or .ipc endpoint for eth_subscribe("newHeads"); defaults to RPC_URL when it is one,
+# otherwise the head is read every CONFIRM_POLL_INTERVAL (one eth_getBlockByNumber per new block)
+CONFIRM_HEADS_URL = os.getenv("CONFIRM_HEADS_URL") or (
+    RPC_URL if RPC_URL.endswith(".ipc") or RPC_URL.startswith(("ws://", "wss://")) else "")
+
+# Nonce Management
+# Shared by the web app and CLIs so concurrent registrations get distinct nonces
+NONCE_DB = os.getenv("NONCE_DB", os.path.join(STATE_DIR, "nonces.db"))
+NONCE_SYNC_INTERVAL = float(os.getenv("NONCE_SYNC_INTERVAL", "30"))  # seconds between chain re-syncs
+NONCE_STUCK_AFTER = float(os.getenv("NONCE_STUCK_AFTER", "120"))  # seconds before gap fill / replacement
+NONCE_REPLACE_BUMP = float(os.getenv("NONCE_REPLACE_BUMP", "1.125"))  # gas price multiplier for replacements
+
+# Signer
+# Keystore is decrypted once (scrypt) and the key kept in memory for this long; 0 disables caching
+SIGNER_TTL = float(os.getenv("SIGNER_TTL", "900"))  # seconds
+
+# Bulk Registration
+BULK_CHECKPOINT = os.getenv("BULK_CHECKPOINT", os.path.join(STATE_DIR, "bulk_register.jsonl"))
+BULK_HASH_WORKERS = int(os.getenv("BULK_HASH_WORKERS", str(os.cpu_count() or 1)))
+BULK_WINDOW = int(os.getenv("BULK_WINDOW", "50"))  # transactions in flight at once
+
+# Batched Registration
+# When enabled, /register queues works and batch_submitter.py sends them via registerWorks
+BATCH_REGISTER = os.getenv("BATCH_REGISTER", "0") == "1"
+BATCH_IN_PROCESS = os.getenv("BATCH_IN_PROCESS", "1") == "1"  # run the submitter inside app.py
+BATCH_INTERVAL = float(os.getenv("BATCH_INTERVAL", "2"))  # seconds between batches
+BATCH_GAS_FRACTION = float(os.getenv("BATCH_GAS_FRACTION", "0.5"))  # share of the block gas limit per batch
+BATCH_MAX_WORKS = int(os.getenv("BATCH_MAX_WORKS", "100"))  # works per registerWorks call
+
+# View Cache
+# Positive getWorkDetails/checkContentExists/verifyWork answers are kept until evicted;
+# negative ones expire after READ_CACHE_NEGATIVE_TTL or on the next WorkRegistered event
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "1") == "1"
+READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "10000"))  # entries per process
+READ_CACHE_NEGATIVE_TTL = float(os.getenv("READ_CACHE_NEGATIVE_TTL", "10"))  # seconds
+READ_CACHE_SHARED = os.getenv("READ_CACHE_SHARED", "0") == "1"  # share entries across workers via SQLite
+READ_CACHE_DB = os.getenv("READ_CACHE_DB", os.path.join(STATE_DIR, "read_cache.db"))
+READ_CACHE_POLL_INTERVAL = float(os.getenv("READ_CACHE_POLL_INTERVAL", "3"))  # seconds between event checks
+
+# Blob Store
+# Uploads are stored once per SHA-256 under BLOB_DIR/ab/cd/<hash>
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(UPLOAD_FOLDER, "blobs"))
+BLOB_DB = os.getenv("BLOB_DB", os.path.join(STATE_DIR, "blobs.db"))
+BLOB_GC_GRACE = float(os.getenv("BLOB_GC_GRACE", "3600"))  # seconds an unreferenced blob is kept
+
+# Chunked Uploads (/api/uploads)
+# Files larger than one chunk are sent in resumable chunks and assembled under UPLOAD_PART_DIR
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))  # bytes, must stay below MAX_FILE_SIZE
+UPLOAD_PARALLEL_CHUNKS = int(os.getenv("UPLOAD_PARALLEL_CHUNKS", "3"))  # chunks the browser sends at once
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 4 * 1024 * 1024 * 1024))  # 4 GB
+UPLOAD_PART_DIR = os.getenv("UPLOAD_PART_DIR", os.path.join(BLOB_DIR, "parts"))  # same filesystem as BLOB_DIR
+UPLOAD_DB = os.getenv("UPLOAD_DB", os.path.join(STATE_DIR, "uploads.db"))
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", "86400"))  # seconds an idle upload can be resumed
+
+# File Hash Cache
+# CLIs reuse a file's SHA-256 while its (device, inode, size, mtime_ns) is unchanged
+HASH_CACHE_ENABLED = os.getenv("HASH_CACHE_ENABLED", "1") == "1"
+HASH_CACHE_DB = os.getenv("HASH_CACHE_DB", os.path.join(STATE_DIR, "file_hashes.db"))
+HASH_MMAP = os.getenv("HASH_MMAP", "1") == "1"  # hash large files through mmap
+HASH_MMAP_THRESHOLD = int(os.getenv("HASH_MMAP_THRESHOLD", 64 * 1024 * 1024))  # bytes
+
+# Batch Verification (verify_work.py --batch)
+VERIFY_WINDOW = int(os.getenv("VERIFY_WINDOW", "5000"))  # items hashed and looked up per round
+VERIFY_HASH_WORKERS = int(os.getenv("VERIFY_HASH_WORKERS", str(os.cpu_count() or 1)))
+VERIFY_RPC_WORKERS = int(os.getenv("VERIFY_RPC_WORKERS", "4"))  # concurrent batched reads
+
+# Bulk Verification API (POST /api/verify)
+VERIFY_API_MAX_ITEMS = int(os.getenv("VERIFY_API_MAX_ITEMS", "1000"))  # per JSON request
+VERIFY_API_MAX_STREAM_ITEMS = int(os.getenv("VERIFY_API_MAX_STREAM_ITEMS", "10000"))  # per NDJSON request
+VERIFY_API_RATE = float(os.getenv("VERIFY_API_RATE", "500"))  # items per second per client
+VERIFY_API_BURST = float(os.getenv("VERIFY_API_BURST", "5000"))  # items a client may look up at once
+VERIFY_API_MAX_INFLIGHT = int(os.getenv("VERIFY_API_MAX_INFLIGHT", "2"))  # concurrent bulk requests per client
+
+# Async Read Path (async_app.py)
+ASYNC_PORT = int(os.getenv("ASYNC_PORT", "5001"))
+ASYNC_RPC_CONCURRENCY = int(os.getenv("ASYNC_RPC_CONCURRENCY", "64"))  # eth_calls in flight per process
+
+# Merkle Anchoring
+# When enabled, /register queues works and merkle_anchor.py commits one Merkle root
+# per window (anchorRoot) instead of a WorkRegistration per work; proofs stay local
+ANCHOR_REGISTER = os.getenv("ANCHOR_REGISTER", "0") == "1"
+ANCHOR_IN_PROCESS = os.getenv("ANCHOR_IN_PROCESS", "1") == "1"  # run the anchorer inside app.py
+ANCHOR_INTERVAL = float(os.getenv("ANCHOR_INTERVAL", "60"))  # seconds of registrations per root
+ANCHOR_MAX_WORKS = int(os.getenv("ANCHOR_MAX_WORKS", "10000"))  # works per root
+ANCHOR_DB = os.getenv("ANCHOR_DB", os.path.join(STATE_DIR, "anchors.db"))
+
+# Near-Duplicate Detection
+# Perceptual fingerprints of image (pHash/dHash, needs Pillow) and mp3 (Chromaprint) uploads,
+# checked on /register and /verify/similar
+SIMILARITY_ENABLED = os.getenv("SIMILARITY_ENABLED", "1") == "1"
+SIMILARITY_DB = os.getenv("SIMILARITY_DB", os.path.join(STATE_DIR, "similarity.db"))
+SIMILAR_IMAGE_DISTANCE = int(os.getenv("SIMILAR_IMAGE_DISTANCE", "10"))  # max differing bits of 64
+SIMILAR_AUDIO_MAX_BER = float(os.getenv("SIMILAR_AUDIO_MAX_BER", "0.3"))  # max bit error rate of aligned prints
+SIMILAR_MAX_RESULTS = int(os.getenv("SIMILAR_MAX_RESULTS", "10"))
+FPCALC_PATH = os.getenv("FPCALC_PATH", "fpcalc")  # Chromaprint command-line tool
+
+# Metrics (GET /metrics, Prometheus text format, one set per process)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_TIMING_HEADER = os.getenv("METRICS_TIMING_HEADER", "0") == "1"  # Server-Timing header with per-phase times
+METRICS_SLOW_REQUEST = float(os.getenv("METRICS_SLOW_REQUEST", "0"))  # log phase breakdown past this many seconds (0 = off)
+
+# Fee and Gas Configuration
+# EIP-1559 type-2 transactions when the chain has a base fee (London is active from genesis)
+FEE_EIP1559 = os.getenv("FEE_EIP1559", "1") == "1"
+FEE_CACHE_TTL = float(os.getenv("FEE_CACHE_TTL", "15"))  # seconds a head's fees are reused (clique period)
+FEE_BASE_MULTIPLIER = float(os.getenv("FEE_BASE_MULTIPLIER", "2"))  # maxFeePerGas = base fee * this + priority fee
+# Priority fee in gwei; unset asks the node (eth_maxPriorityFeePerGas) once per head
+FEE_PRIORITY_GWEI = float(os.getenv("FEE_PRIORITY_GWEI")) if os.getenv("FEE_PRIORITY_GWEI") else None
+GAS_MODEL_ENABLED = os.getenv("GAS_MODEL_ENABLED", "1") == "1"  # registerWork gas from argument sizes, no eth_estimateGas
+GAS_MODEL_MARGIN = float(os.getenv("GAS_MODEL_MARGIN", "1.1"))  # headroom on the modelled gas
+BALANCE_REFRESH = float(os.getenv("BALANCE_REFRESH", "300"))  # seconds between balance reads (receipts update it in between)
 
 # Create necessary directories
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs("build", exist_ok=True)
+os.makedirs(STATE_DIR, exist_ok=True)
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
@@ -0,0 +1,366 @@
+"""Transaction confirmations from new blocks instead of receipt polling.
+
+Waiting for a transaction used to poll eth_getTransactionReceipt: every
+0.1s per transaction in the CLIs (wait_for_transaction_receipt), and for
+every pending registration each CONFIRM_POLL_INTERVAL in the receipt
+confirmer. The request count grew with the number in flight, even when no
+block had been mined. ConfirmationTracker follows the chain instead:
+
+- New heads come from eth_subscribe("newHeads") on CONFIRM_HEADS_URL
+  (WebSocket or IPC). Without one, the latest block is read every
+  CONFIRM_POLL_INTERVAL. Either way each new block is fetched once, with
+  its transaction hashes, and matched against every watched transaction.
+- A transaction is confirmed once CONFIRM_DEPTH blocks, its own included,
+  are on top of the chain. Only then is its receipt fetched, in one batch
+  with the others confirmed by the same block. A newly watched transaction
+  gets one receipt lookup, since it may have been mined before it was
+  watched.
+- The hashes of the last CONFIRM_REORG_DEPTH blocks are kept. A head that
+  does not extend them is a reorg: the tracker walks back to the common
+  block, forgets inclusions in the dropped blocks and scans the new branch.
+  Transactions it had confirmed in a dropped block are passed to on_reorg.
+- Each head also refreshes fee_oracle (observe_block).
+
+wait_for_receipt() replaces w3.eth.wait_for_transaction_receipt in the
+CLIs; ReceiptConfirmer and bulk_register keep one tracker for all their
+transactions.
+"""
+from web3 import AsyncIPCProvider, AsyncWeb3, Web3, WebSocketProvider
+from web3.exceptions import TimeExhausted, TransactionNotFound
+import asyncio
+import threading
+import time
+import config
+import fee_oracle
+import registry_v2
+
+
+def _key(tx_hash):
+    """Lowercase 0x-prefixed hex for a hash given as bytes or a string"""
+    if isinstance(tx_hash, str):
+        return tx_hash.lower() if tx_hash.startswith(("0x", "0X")) else "0x" + tx_hash.lower()
+    return Web3.to_hex(tx_hash)
+
+
+def fetch_receipts(w3, tx_hashes):
+    """
+    Fetch receipts for many transactions in one JSON-RPC batch.
+    Returns {tx_hash: receipt dict or None if not mined yet}, with the
+    sender and fee ("from", "effectiveGasPrice") for fee_oracle and
+    "blockHash" for the reorg checks below; "workIdTopics"
+    holds the first indexed topic of every log (registry_v2.work_id_topic for
+    WorkRegistered), so batch members can be matched to their events, and
+    "anchored" is set for anchorRoot transactions (RootAnchored emitted).
+    """
+    if not tx_hashes:
+        return {}
+    try:
+        responses = w3.provider.make_batch_request(
+            [("eth_getTransactionReceipt", [tx_hash]) for tx_hash in tx_hashes]
+        )
+        if isinstance(responses, list):
+            receipts = {}
+            for tx_hash, response in zip(tx_hashes, responses):
+                raw = response.get("result")
+                receipts[tx_hash] = {
+                    "status": int(raw["status"], 16),
+                    "blockNumber": int(raw["blockNumber"], 16),
+                    "blockHash": raw["blockHash"].lower(),
+                    "gasUsed": int(raw["gasUsed"], 16),
+                    "contractAddress": raw.get("contractAddress") and Web3.to_checksum_address(
+                        raw["contractAddress"]),
+                    "from": raw.get("from"),
+                    "effectiveGasPrice": int(raw.get("effectiveGasPrice") or "0x0", 16),
+                    "workIdTopics": {
+                        log["topics"][1].lower() for log in raw.get("logs", [])
+                        if len(log["topics"]) > 1
+                    },
+                    "anchored": any(
+                        log["topics"] and log["topics"][0].lower() == registry_v2.ROOT_ANCHORED_TOPIC
+                        for log in raw.get("logs", [])
+                    ),
+                } if raw else None
+            return receipts
+    except (NotImplementedError, AttributeError, ValueError, OSError):
+        pass
+
+    # Provider without batch support: one call per transaction
+    receipts = {}
+    for tx_hash in tx_hashes:
+        try:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+            receipts[tx_hash] = {
+                "status": receipt.status,
+                "blockNumber": receipt.blockNumber,
+                "blockHash": Web3.to_hex(receipt.blockHash),
+                "gasUsed": receipt.gasUsed,
+                "contractAddress": receipt.get("contractAddress"),
+                "from": receipt.get("from"),
+                "effectiveGasPrice": receipt.get("effectiveGasPrice", 0),
+                "workIdTopics": {
+                    Web3.to_hex(log["topics"][1]) for log in receipt.logs
+                    if len(log["topics"]) > 1
+                },
+                "anchored": any(
+                    log["topics"] and Web3.to_hex(log["topics"][0]) == registry_v2.ROOT_ANCHORED_TOPIC
+                    for log in receipt.logs
+                ),
+            }
+        except TransactionNotFound:
+            receipts[tx_hash] = None
+    return receipts
+
+class ConfirmationTracker:
+    """Follows new blocks and confirms watched transactions"""
+
+    def __init__(self, w3, depth=None, on_reorg=None, heads_url=None):
+        self.w3 = w3
+        self.depth = max(1, depth or config.CONFIRM_DEPTH)
+        self.heads_url = config.CONFIRM_HEADS_URL if heads_url is None else heads_url
+        # Called with the hashes of confirmed transactions whose block left the chain
+        self.on_reorg = on_reorg
+        self._cond = threading.Condition()
+        self._blocks = {}       # number -> {"hash", "parent", "confirmed": tx hashes}
+        self._head = None       # number of the newest block processed
+        self._watched = {}      # tx hash -> number of the block including it, or None
+        self._unchecked = set()  # watched tx hashes still needing a receipt lookup
+        self._found = {}        # tx hash -> receipt seen before reaching CONFIRM_DEPTH
+        self._receipts = {}     # tx hash -> receipt of a confirmed transaction
+        self.updates = 0        # heads processed so far
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def following(self):
+        """True while a background thread processes new heads"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def watch(self, tx_hashes):
+        """Start tracking transactions"""
+        with self._cond:
+            for key in map(_key, tx_hashes):
+                if key not in self._watched and key not in self._receipts:
+                    self._watched[key] = None
+                    self._unchecked.add(key)
+
+    def retain(self, tx_hashes):
+        """Track exactly tx_hashes, forgetting every other transaction"""
+        keys = set(map(_key, tx_hashes))
+        with self._cond:
+            for key in list(self._watched):
+                if key not in keys:
+                    del self._watched[key]
+                    self._found.pop(key, None)
+            self._unchecked &= keys
+            for key in list(self._receipts):
+                if key not in keys:
+                    del self._receipts[key]
+        self.watch(keys)
+
+    def receipts(self, tx_hashes):
+        """{tx_hash: receipt} for those of tx_hashes that are confirmed"""
+        with self._cond:
+            return {tx_hash: self._receipts[_key(tx_hash)] for tx_hash in tx_hashes
+                    if _key(tx_hash) in self._receipts}
+
+    def _get_block(self, block_identifier):
+        block = self.w3.eth.get_block(block_identifier)
+        return {
+            "number": block["number"],
+            "hash": Web3.to_hex(block["hash"]),
+            "parent": Web3.to_hex(block["parentHash"]),
+            "transactions": {_key(tx_hash) for tx_hash in block["transactions"]},
+        }, block
+
+    def _add(self, block):
+        """Append a block to the stored chain and record the watched transactions in it"""
+        number = block["number"]
+        self._blocks[number] = {"hash": block["hash"], "parent": block["parent"], "confirmed": set()}
+        for key, included in self._watched.items():
+            if key in block["transactions"]:
+                self._watched[key] = number
+            elif included == number:
+                # A receipt lookup placed it in a block that did not make it
+                self._watched[key] = None
+                self._found.pop(key, None)
+        self._head = number
+        for old in [n for n in self._blocks if n <= number - config.CONFIRM_REORG_DEPTH]:
+            del self._blocks[old]
+
+    def _drop_after(self, number):
+        """Forget blocks above number; returns the confirmed transactions they held"""
+        dropped = set()
+        for n in [n for n in self._blocks if n > number]:
+            dropped |= self._blocks.pop(n)["confirmed"]
+        for key, included in self._watched.items():
+            if included is not None and included > number:
+                self._watched[key] = None
+                self._found.pop(key, None)
+        for key in dropped:
+            if self._receipts.pop(key, None) is not None:
+                self._watched[key] = None
+        return dropped
+
+    def _advance(self, head):
+        """Bring the stored chain up to head; returns the reorged confirmed transactions"""
+        stored = self._blocks.get(head["number"])
+        if stored is not None and stored["hash"] == head["hash"]:
+            return set()
+        if self._head is None or head["number"] - self._head > config.CONFIRM_REORG_DEPTH:
+            # First head, or too far behind to fetch every block: look the watched
+            # transactions up by receipt instead
+            self._blocks.clear()
+            for key, included in self._watched.items():
+                if included is None:
+                    self._unchecked.add(key)
+            self._add(head)
+            return set()
+
+        # Fetch back from the head until a block's parent is one we have
+        branch = [head]
+        while True:
+            top = branch[-1]
+            parent = self._blocks.get(top["number"] - 1)
+            if parent is not None and parent["hash"] == top["parent"]:
+                break
+            if not self._blocks or top["number"] - 1 < min(self._blocks):
+                break
+            branch.append(self._get_block(top["number"] - 1)[0])
+        ancestor = branch[-1]["number"] - 1
+        deep = ancestor not in self._blocks
+        # Past CONFIRM_REORG_DEPTH nothing stored can be trusted
+        reorged = self._drop_after(-1 if deep else ancestor)
+        if deep:
+            self._unchecked.update(key for key, included in self._watched.items() if included is None)
+        for block in reversed(branch):
+            self._add(block)
+        return reorged
+
+    def _look_up(self):
+        """One receipt batch for newly watched transactions"""
+        keys = [key for key in self._unchecked if self._watched.get(key) is None]
+        self._unchecked.clear()
+        for key, receipt in fetch_receipts(self.w3, keys).items():
+            if receipt is None:
+                continue
+            number = receipt["blockNumber"]
+            stored = self._blocks.get(number)
+            if stored is not None and stored["hash"] != receipt["blockHash"]:
+                continue
+            if number > self._head:
+                # Mined after the head was read; found when that block is processed
+                continue
+            self._watched[key] = number
+            self._found[key] = receipt
+
+    def _confirm(self):
+        """Fetch receipts of transactions that reached CONFIRM_DEPTH; returns how many"""
+        ready = [key for key, included in self._watched.items()
+                 if included is not None and self._head - included + 1 >= self.depth]
+        missing = [key for key in ready if key not in self._found]
+        receipts = fetch_receipts(self.w3, missing)
+        confirmed = 0
+        for key in ready:
+            receipt = self._found.pop(key, None) or receipts.get(key)
+            if receipt is None:
+                continue
+            del self._watched[key]
+            self._receipts[key] = receipt
+            if receipt["blockNumber"] in self._blocks:
+                self._blocks[receipt["blockNumber"]]["confirmed"].add(key)
+            confirmed += 1
+        return confirmed
+
+    def update(self):
+        """Process the blocks up to the current head; returns the number newly confirmed"""
+        with self._cond:
+            head, block = self._get_block("latest")
+            reorged = self._advance(head)
+            if self._unchecked:
+                self._look_up()
+            confirmed = self._confirm()
+            self.updates += 1
+            self._cond.notify_all()
+        fee_oracle.get_oracle(self.w3).observe_block(block)
+        if reorged and self.on_reorg:
+            self.on_reorg(sorted(reorged))
+        return confirmed
+
+    def wait(self, tx_hash, timeout=None):
+        """Receipt of tx_hash once confirmed; raises TimeExhausted after timeout seconds"""
+        timeout = config.CONFIRM_TIMEOUT if timeout is None else timeout
+        key = _key(tx_hash)
+        self.watch([key])
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while key not in self._receipts:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeExhausted(f"Transaction {key} not confirmed after {timeout} seconds")
+                if not self.following:
+                    self.update()
+                    if key in self._receipts:
+                        break
+                    remaining = min(remaining, config.CONFIRM_POLL_INTERVAL)
+                self._cond.wait(remaining)
+            return self._receipts[key]
+
+    def wait_for_block(self, seen, timeout):
+        """Block until more than seen heads are processed, stop() is called or timeout passes"""
+        with self._cond:
+            self._cond.wait_for(lambda: self.updates > seen or self._stop.is_set(), timeout)
+
+    async def _subscribe(self):
+        """Process a head per newHeads notification until stop()"""
+        if self.heads_url.endswith(".ipc"):
+            provider = AsyncIPCProvider(self.heads_url)
+        else:
+            provider = WebSocketProvider(self.heads_url)
+        async with AsyncWeb3(provider) as w3:
+            await w3.eth.subscribe("newHeads")
+            print(f"✓ Subscribed to new heads at {self.heads_url}")
+            # Blocks mined while connecting
+            await asyncio.to_thread(self.update)
+            async for _ in w3.socket.process_subscriptions():
+                if self._stop.is_set():
+                    return
+                await asyncio.to_thread(self.update)
+
+    def run(self):
+        """Follow new heads until stop() is called (polling while no subscription)"""
+        subscribe_failed = False
+        while not self._stop.is_set():
+            if self.heads_url:
+                try:
+                    asyncio.run(self._subscribe())
+                except Exception as e:
+                    if not subscribe_failed:
+                        print(f"⚠️  newHeads subscription failed ({e}), polling the head")
+                    subscribe_failed = True
+            try:
+                self.update()
+            except Exception as e:
+                print(f"✗ Confirmation tracker error: {e}")
+            self._stop.wait(config.CONFIRM_POLL_INTERVAL)
+
+    def start(self):
+        """Run the tracker in a daemon thread"""
+        self._thread = threading.Thread(target=self.run, name="confirmation-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+
+def wait_for_receipt(w3, tx_hash, timeout=None):
+    """Receipt of one transaction once confirmed (a tracker for the duration of the wait)"""
+    tracker = ConfirmationTracker(w3)
+    tracker.watch([tx_hash])
+    tracker.start()
+    try:
+        return tracker.wait(tx_hash, timeout)
+    finally:
+        tracker.stop()
@@ -25,6 +25,15 @@ contract CopyrightRegistry {
     // Mapping from content hash to work ID (prevents duplicate content)
     mapping(string => string) public hashToWorkId;
 
+    struct Anchor {
+        address submitter;       // Account that committed the root
+        uint64 timestamp;        // Commit timestamp
+        uint32 workCount;        // Number of works under the root
+    }
+
+    // Mapping from Merkle root to its commit (works kept off-chain with proofs)
+    mapping(bytes32 => Anchor) public anchors;
+
     event WorkRegistered(
         string indexed workId,
         string workTitle,
@@ -33,6 +42,13 @@ contract CopyrightRegistry {
         uint256 timestamp
     );
 
+    event RootAnchored(
+        bytes32 indexed root,
+        address indexed submitter,
+        uint256 workCount,
+        uint256 timestamp
+    );
+
     modifier onlyOwner() {
         require(msg.sender == owner, "Only owner can perform this action");
         _;
@@ -55,6 +71,61 @@ contract CopyrightRegistry {
         string memory contentHash,
         string memory metadata
     ) public {
+        _registerWork(workId, workTitle, workType, contentHash, metadata);
+    }
+
+    /// @notice Register several works in one transaction
+    /// @dev Arrays are parallel; each registered work emits WorkRegistered
+    /// @param workIds Unique identifiers for the works
+    /// @param workTitles Titles of the works
+    /// @param workTypes Types of the works
+    /// @param contentHashes SHA-256 hashes of the work contents
+    /// @param metadata Additional metadata per work
+    /// @param skipDuplicates Skip works whose ID or content is already registered
+    ///        instead of reverting the whole batch
+    /// @return registered Number of works registered
+    function registerWorks(
+        string[] memory workIds,
+        string[] memory workTitles,
+        string[] memory workTypes,
+        string[] memory contentHashes,
+        string[] memory metadata,
+        bool skipDuplicates
+    ) public returns (uint256 registered) {
+        require(
+            workTitles.length == workIds.length &&
+            workTypes.length == workIds.length &&
+            contentHashes.length == workIds.length &&
+            metadata.length == workIds.length,
+            "Array lengths differ"
+        );
+        for (uint256 i = 0; i < workIds.length; i++) {
+            if (skipDuplicates && _isRegistered(workIds[i], contentHashes[i])) {
+                continue;
+            }
+            _registerWork(workIds[i], workTitles[i], workTypes[i], contentHashes[i], metadata[i]);
+            registered++;
+        }
+    }
+
+    /// @dev True if the work ID or the content hash is already taken
+    function _isRegistered(string memory workId, string memory contentHash)
+        internal
+        view
+        returns (bool)
+    {
+        return bytes(registrations[workId].workId).length != 0 ||
+               bytes(hashToWorkId[contentHash]).length != 0;
+    }
+
+    /// @dev Store one registration, reverting on duplicates
+    function _registerWork(
+        string memory workId,
+        string memory workTitle,
+        string memory workType,
+        string memory contentHash,
+        string memory metadata
+    ) internal {
         // Check if work ID already exists
         require(
             bytes(registrations[workId].workId).length == 0,
@@ -87,6 +158,42 @@ contract CopyrightRegistry {
         emit WorkRegistered(workId, workTitle, msg.sender, contentHash, block.timestamp);
     }
 
+    /// @notice Commit the Merkle root of a batch of registrations kept off-chain (owner
+    ///         only, so an anchored root always comes from the registry operator)
+    /// @dev Leaf: keccak256(abi.encodePacked(keccak256(abi.encode(workId, contentHash,
+    ///      creator, metadata)))) with contentHash as lowercase hex without 0x;
+    ///      pairs are hashed in sorted order, an odd node moves up unchanged
+    /// @param root Merkle root of the batch
+    /// @param workCount Number of works in the batch
+    function anchorRoot(bytes32 root, uint32 workCount) public onlyOwner {
+        require(root != bytes32(0), "Empty root");
+        require(anchors[root].submitter == address(0), "Root already anchored");
+        anchors[root] = Anchor(msg.sender, uint64(block.timestamp), workCount);
+        emit RootAnchored(root, msg.sender, workCount, block.timestamp);
+    }
+
+    /// @notice Check that a leaf is included under an anchored root
+    /// @param leaf Leaf hash of the work (see anchorRoot)
+    /// @param proof Sibling hashes from the leaf up to the root
+    /// @param root Anchored Merkle root
+    /// @return bool True if the root is anchored and the proof leads to it
+    function verifyAnchored(bytes32 leaf, bytes32[] calldata proof, bytes32 root) 
+        public 
+        view 
+        returns (bool) 
+    {
+        if (anchors[root].submitter == address(0)) {
+            return false;
+        }
+        bytes32 node = leaf;
+        for (uint256 i = 0; i < proof.length; i++) {
+            node = node < proof[i]
+                ? keccak256(abi.encodePacked(node, proof[i]))
+                : keccak256(abi.encodePacked(proof[i], node));
+        }
+        return node == root;
+    }
+
     /// @notice Verify if a content hash matches a registered work
     /// @param workId The work identifier
     /// @param contentHash The hash to verify
@@ -115,6 +222,21 @@ contract CopyrightRegistry {
         return registrations[workId];
     }
 
+    /// @notice Get full details of several works in one call
+    /// @param workIds The work identifiers
+    /// @return WorkRegistration[] Details in the same order (empty entry if not found)
+    function getWorksDetails(string[] memory workIds) 
+        public 
+        view 
+        returns (WorkRegistration[] memory) 
+    {
+        WorkRegistration[] memory result = new WorkRegistration[](workIds.length);
+        for (uint256 i = 0; i < workIds.length; i++) {
+            result[i] = registrations[workIds[i]];
+        }
+        return result;
+    }
+
     /// @notice Check if content hash is already registered
     /// @param contentHash The hash to check
     /// @return string The work ID if registered, empty string otherwise
@@ -126,6 +248,21 @@ contract CopyrightRegistry {
         return hashToWorkId[contentHash];
     }
 
+    /// @notice Check several content hashes in one call
+    /// @param contentHashes The hashes to check
+    /// @return string[] Work IDs in the same order (empty string if not registered)
+    function checkContentsExist(string[] memory contentHashes) 
+        public 
+        view 
+        returns (string[] memory) 
+    {
+        string[] memory result = new string[](contentHashes.length);
+        for (uint256 i = 0; i < contentHashes.length; i++) {
+            result[i] = hashToWorkId[contentHashes[i]];
+        }
+        return result;
+    }
+
     /// @notice Get all works registered by a creator
     /// @param creator The creator's address
     /// @return string[] Array of work IDs
@@ -137,6 +274,31 @@ contract CopyrightRegistry {
         return creatorWorks[creator];
     }
 
+    /// @notice Get a page of a creator's works with full details
+    /// @param creator The creator's address
+    /// @param offset Index of the first work to return
+    /// @param limit Maximum number of works to return
+    /// @return WorkRegistration[] Works in registration order (empty past the end)
+    function getCreatorWorksPage(address creator, uint256 offset, uint256 limit) 
+        public 
+        view 
+        returns (WorkRegistration[] memory) 
+    {
+        string[] storage ids = creatorWorks[creator];
+        if (offset >= ids.length) {
+            return new WorkRegistration[](0);
+        }
+        uint256 end = ids.length;
+        if (limit < end - offset) {
+            end = offset + limit;
+        }
+        WorkRegistration[] memory page = new WorkRegistration[](end - offset);
+        for (uint256 i = offset; i < end; i++) {
+            page[i - offset] = registrations[ids[i]];
+        }
+        return page;
+    }
+
     /// @notice Get total number of works by a creator
     /// @param creator The creator's address
     /// @return uint256 Number of works
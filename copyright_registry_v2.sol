@@ -0,0 +1,338 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+/// @title Copyright Registry (v2 storage layout)
+/// @notice Register proof of work ownership on blockchain, with fixed-size keys
+///         and packed records to cut gas per registration
+contract CopyrightRegistryV2 {
+    address public owner;
+
+    /// @notice When false, title/type/metadata are only emitted in WorkRegistered
+    bool public immutable storeDetails;
+
+    struct WorkRecord {
+        bytes32 contentHash;     // SHA-256 hash of the work content (slot 0)
+        address creator;         // Wallet address of the creator (slot 1, 20 bytes)
+        uint64 timestamp;        // Registration timestamp (slot 1, 8 bytes)
+    }
+
+    struct WorkText {
+        string workTitle;        // Title of the work
+        string workType;         // Type: image, text, music, video, etc.
+        string metadata;         // Additional info (optional)
+    }
+
+    /// @dev Return shape of the view functions, same field order as v1
+    struct WorkRegistration {
+        bytes16 workId;
+        string workTitle;
+        string workType;
+        bytes32 contentHash;
+        address creator;
+        uint256 timestamp;
+        string metadata;
+    }
+
+    // Mapping from workId to packed registration record
+    mapping(bytes16 => WorkRecord) public records;
+
+    // Mapping from workId to text fields (only written when storeDetails)
+    mapping(bytes16 => WorkText) public texts;
+
+    // Mapping from creator address to their work IDs (two IDs per slot)
+    mapping(address => bytes16[]) public creatorWorks;
+
+    // Mapping from content hash to work ID (prevents duplicate content)
+    mapping(bytes32 => bytes16) public hashToWorkId;
+
+    struct Anchor {
+        address submitter;       // Account that committed the root (20 bytes)
+        uint64 timestamp;        // Commit timestamp (8 bytes)
+        uint32 workCount;        // Number of works under the root (4 bytes)
+    }
+
+    // Mapping from Merkle root to its commit (works kept off-chain with proofs)
+    mapping(bytes32 => Anchor) public anchors;
+
+    event WorkRegistered(
+        bytes16 indexed workId,
+        address indexed creator,
+        bytes32 indexed contentHash,
+        string workTitle,
+        string workType,
+        string metadata,
+        uint256 timestamp
+    );
+
+    event RootAnchored(
+        bytes32 indexed root,
+        address indexed submitter,
+        uint256 workCount,
+        uint256 timestamp
+    );
+
+    modifier onlyOwner() {
+        require(msg.sender == owner, "Only owner can perform this action");
+        _;
+    }
+
+    constructor(bool storeDetails_) {
+        owner = msg.sender;
+        storeDetails = storeDetails_;
+    }
+
+    /// @notice Register a new work on the blockchain
+    /// @param workId Unique identifier for the work (ASCII, zero-padded)
+    /// @param workTitle Title of the work
+    /// @param workType Type of work (image, text, music, etc.)
+    /// @param contentHash SHA-256 hash of the work content
+    /// @param metadata Additional metadata (JSON string or URI)
+    function registerWork(
+        bytes16 workId,
+        string memory workTitle,
+        string memory workType,
+        bytes32 contentHash,
+        string memory metadata
+    ) public {
+        _registerWork(workId, workTitle, workType, contentHash, metadata);
+    }
+
+    /// @notice Register several works in one transaction
+    /// @dev Arrays are parallel; each registered work emits WorkRegistered
+    /// @param skipDuplicates Skip works whose ID or content is already registered
+    ///        instead of reverting the whole batch
+    /// @return registered Number of works registered
+    function registerWorks(
+        bytes16[] memory workIds,
+        string[] memory workTitles,
+        string[] memory workTypes,
+        bytes32[] memory contentHashes,
+        string[] memory metadata,
+        bool skipDuplicates
+    ) public returns (uint256 registered) {
+        require(
+            workTitles.length == workIds.length &&
+            workTypes.length == workIds.length &&
+            contentHashes.length == workIds.length &&
+            metadata.length == workIds.length,
+            "Array lengths differ"
+        );
+        for (uint256 i = 0; i < workIds.length; i++) {
+            if (skipDuplicates && _isRegistered(workIds[i], contentHashes[i])) {
+                continue;
+            }
+            _registerWork(workIds[i], workTitles[i], workTypes[i], contentHashes[i], metadata[i]);
+            registered++;
+        }
+    }
+
+    /// @dev True if the work ID or the content hash is already taken
+    function _isRegistered(bytes16 workId, bytes32 contentHash)
+        internal
+        view
+        returns (bool)
+    {
+        return records[workId].creator != address(0) ||
+               hashToWorkId[contentHash] != bytes16(0);
+    }
+
+    /// @dev Store one registration, reverting on duplicates
+    function _registerWork(
+        bytes16 workId,
+        string memory workTitle,
+        string memory workType,
+        bytes32 contentHash,
+        string memory metadata
+    ) internal {
+        require(workId != bytes16(0) && contentHash != bytes32(0), "Empty work ID or hash");
+        require(records[workId].creator == address(0), "Work ID already registered");
+        require(
+            hashToWorkId[contentHash] == bytes16(0),
+            "This content already registered with different ID"
+        );
+
+        records[workId] = WorkRecord({
+            contentHash: contentHash,
+            creator: msg.sender,
+            timestamp: uint64(block.timestamp)
+        });
+        if (storeDetails) {
+            texts[workId] = WorkText(workTitle, workType, metadata);
+        }
+        creatorWorks[msg.sender].push(workId);
+        hashToWorkId[contentHash] = workId;
+
+        emit WorkRegistered(workId, msg.sender, contentHash, workTitle, workType, metadata, block.timestamp);
+    }
+
+    /// @notice Commit the Merkle root of a batch of registrations kept off-chain (owner
+    ///         only, so an anchored root always comes from the registry operator)
+    /// @dev Leaf: keccak256(abi.encodePacked(keccak256(abi.encode(workId, contentHash,
+    ///      creator, metadata)))) with workId and contentHash (lowercase hex, no 0x) as
+    ///      strings; pairs are hashed in sorted order, an odd node moves up unchanged
+    /// @param root Merkle root of the batch
+    /// @param workCount Number of works in the batch
+    function anchorRoot(bytes32 root, uint32 workCount) public onlyOwner {
+        require(root != bytes32(0), "Empty root");
+        require(anchors[root].submitter == address(0), "Root already anchored");
+        anchors[root] = Anchor({
+            submitter: msg.sender,
+            timestamp: uint64(block.timestamp),
+            workCount: workCount
+        });
+        emit RootAnchored(root, msg.sender, workCount, block.timestamp);
+    }
+
+    /// @notice Check that a leaf is included under an anchored root
+    /// @param leaf Leaf hash of the work (see anchorRoot)
+    /// @param proof Sibling hashes from the leaf up to the root
+    /// @param root Anchored Merkle root
+    /// @return bool True if the root is anchored and the proof leads to it
+    function verifyAnchored(bytes32 leaf, bytes32[] calldata proof, bytes32 root)
+        public
+        view
+        returns (bool)
+    {
+        if (anchors[root].submitter == address(0)) {
+            return false;
+        }
+        bytes32 node = leaf;
+        for (uint256 i = 0; i < proof.length; i++) {
+            node = node < proof[i]
+                ? keccak256(abi.encodePacked(node, proof[i]))
+                : keccak256(abi.encodePacked(proof[i], node));
+        }
+        return node == root;
+    }
+
+    /// @notice Verify if a content hash matches a registered work
+    /// @param workId The work identifier
+    /// @param contentHash The hash to verify
+    /// @return bool True if hash matches
+    function verifyWork(bytes16 workId, bytes32 contentHash)
+        public
+        view
+        returns (bool)
+    {
+        return contentHash != bytes32(0) && records[workId].contentHash == contentHash;
+    }
+
+    /// @dev Assemble the view shape (empty entry if not found)
+    function _details(bytes16 workId) internal view returns (WorkRegistration memory reg) {
+        WorkRecord storage record = records[workId];
+        if (record.creator == address(0)) {
+            return reg;
+        }
+        reg.workId = workId;
+        reg.contentHash = record.contentHash;
+        reg.creator = record.creator;
+        reg.timestamp = record.timestamp;
+        if (storeDetails) {
+            WorkText storage text = texts[workId];
+            reg.workTitle = text.workTitle;
+            reg.workType = text.workType;
+            reg.metadata = text.metadata;
+        }
+    }
+
+    /// @notice Get full details of a registered work
+    /// @dev Title/type/metadata are empty unless storeDetails; read them from events
+    /// @param workId The work identifier
+    /// @return WorkRegistration struct with all details
+    function getWorkDetails(bytes16 workId)
+        public
+        view
+        returns (WorkRegistration memory)
+    {
+        require(records[workId].creator != address(0), "Work not found");
+        return _details(workId);
+    }
+
+    /// @notice Get full details of several works in one call
+    /// @param workIds The work identifiers
+    /// @return WorkRegistration[] Details in the same order (empty entry if not found)
+    function getWorksDetails(bytes16[] calldata workIds)
+        public
+        view
+        returns (WorkRegistration[] memory)
+    {
+        WorkRegistration[] memory result = new WorkRegistration[](workIds.length);
+        for (uint256 i = 0; i < workIds.length; i++) {
+            result[i] = _details(workIds[i]);
+        }
+        return result;
+    }
+
+    /// @notice Check if content hash is already registered
+    /// @param contentHash The hash to check
+    /// @return bytes16 The work ID if registered, zero otherwise
+    function checkContentExists(bytes32 contentHash)
+        public
+        view
+        returns (bytes16)
+    {
+        return hashToWorkId[contentHash];
+    }
+
+    /// @notice Check several content hashes in one call
+    /// @param contentHashes The hashes to check
+    /// @return bytes16[] Work IDs in the same order (zero if not registered)
+    function checkContentsExist(bytes32[] calldata contentHashes)
+        public
+        view
+        returns (bytes16[] memory)
+    {
+        bytes16[] memory result = new bytes16[](contentHashes.length);
+        for (uint256 i = 0; i < contentHashes.length; i++) {
+            result[i] = hashToWorkId[contentHashes[i]];
+        }
+        return result;
+    }
+
+    /// @notice Get all works registered by a creator
+    /// @param creator The creator's address
+    /// @return bytes16[] Array of work IDs
+    function getCreatorWorks(address creator)
+        public
+        view
+        returns (bytes16[] memory)
+    {
+        return creatorWorks[creator];
+    }
+
+    /// @notice Get a page of a creator's works with full details
+    /// @param creator The creator's address
+    /// @param offset Index of the first work to return
+    /// @param limit Maximum number of works to return
+    /// @return WorkRegistration[] Works in registration order (empty past the end)
+    function getCreatorWorksPage(address creator, uint256 offset, uint256 limit)
+        public
+        view
+        returns (WorkRegistration[] memory)
+    {
+        bytes16[] storage ids = creatorWorks[creator];
+        if (offset >= ids.length) {
+            return new WorkRegistration[](0);
+        }
+        uint256 end = ids.length;
+        if (limit < end - offset) {
+            end = offset + limit;
+        }
+        WorkRegistration[] memory page = new WorkRegistration[](end - offset);
+        for (uint256 i = offset; i < end; i++) {
+            page[i - offset] = _details(ids[i]);
+        }
+        return page;
+    }
+
+    /// @notice Get total number of works by a creator
+    /// @param creator The creator's address
+    /// @return uint256 Number of works
+    function getCreatorWorkCount(address creator)
+        public
+        view
+        returns (uint256)
+    {
+        return creatorWorks[creator].length;
+    }
+}
@@ -1,8 +1,10 @@
 from web3 import Web3
-import json
 from getpass import getpass
 import sys
 import config
+import confirmation_tracker
+import registry_client
+import signer
 
 # Configuration
 HTTP_PROVIDER = config.RPC_URL
@@ -12,32 +14,36 @@ CHAIN_ID = config.CHAIN_ID
 
 def deploy_contract():
     # Connect to blockchain
-    w3 = Web3(Web3.HTTPProvider(HTTP_PROVIDER))
+    w3 = Web3(registry_client.make_provider(HTTP_PROVIDER))
     if not w3.is_connected():
         print("✗ Failed to connect to blockchain")
         sys.exit(1)
     print("✓ Connected to blockchain")
 
     # Unlock account
-    with open(KEY_UTC_FILE) as keyfile:
-        key_data = keyfile.read()
-        pwd = getpass("Account Password: ")
-        try:
-            private_key = w3.eth.account.decrypt(key_data, pwd)
-        except Exception as e:
-            print(f"✗ Failed to decrypt key: {e}")
-            sys.exit(1)
+    key_signer = signer.Signer(KEY_UTC_FILE)
+    pwd = getpass("Account Password: ")
+    try:
+        account = key_signer.get_account(pwd)
+    except Exception as e:
+        print(f"✗ Failed to decrypt key: {e}")
+        sys.exit(1)
     print("✓ Account unlocked")
 
     # Load contract ABI and bytecode
     try:
-        with open("build/CopyrightRegistry.abi", "r") as f:
-            contract_abi = json.load(f)
-        with open("build/CopyrightRegistry.bin", "r") as f:
+        contract_abi = registry_client.load_abi()
+        with open(config.BIN_FILE, "r") as f:
             contract_bytecode = f.read().strip()
     except FileNotFoundError as e:
         print(f"✗ Contract files not found: {e}")
-        print("  Run: python compile_contract.py copyright_registry.sol")
+        print("  Run: solc --evm-version london copyright_registry.sol copyright_registry_v2.sol --abi --bin -o build --overwrite")
+        sys.exit(1)
+    # The .abi and .bin must come from the same solc run
+    missing = registry_client.missing_functions(contract_abi, contract_bytecode)
+    if missing:
+        print(f"✗ {config.BIN_FILE} lacks functions its ABI declares: {', '.join(missing)}")
+        print("  Recompile both: solc --evm-version london copyright_registry.sol copyright_registry_v2.sol --abi --bin -o build --overwrite")
         sys.exit(1)
     print("✓ Contract files loaded")
 
@@ -45,7 +51,13 @@ def deploy_contract():
     CopyrightRegistry = w3.eth.contract(abi=contract_abi, bytecode=contract_bytecode)
     nonce = w3.eth.get_transaction_count(DEPLOYER_ADDRESS)
 
-    transaction = CopyrightRegistry.constructor().build_transaction({
+    # v2 takes whether to keep title/type/metadata in storage (else events only)
+    if config.CONTRACT_VERSION == 2:
+        constructor = CopyrightRegistry.constructor(config.REGISTRY_STORE_DETAILS)
+        print(f"✓ Deploying v2 layout (store details: {config.REGISTRY_STORE_DETAILS})")
+    else:
+        constructor = CopyrightRegistry.constructor()
+    transaction = constructor.build_transaction({
         "chainId": CHAIN_ID,
         "from": DEPLOYER_ADDRESS,
         "nonce": nonce,
@@ -54,7 +66,7 @@ def deploy_contract():
     })
 
     # Sign and send transaction
-    signed_txn = w3.eth.account.sign_transaction(transaction, private_key=private_key)
+    signed_txn = account.sign_transaction(transaction)
     tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
     
     print(f"\n📤 Deployment transaction sent")
@@ -62,13 +74,13 @@ def deploy_contract():
 
     # Wait for confirmation
     print("\n⏳ Waiting for confirmation...")
-    tx_receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    tx_receipt = confirmation_tracker.wait_for_receipt(w3, tx_hash)
     
-    contract_address = tx_receipt.contractAddress
+    contract_address = tx_receipt["contractAddress"]
     print(f"\n✅ Contract deployed successfully!")
     print(f"   Address: {contract_address}")
-    print(f"   Block: {tx_receipt.blockNumber}")
-    print(f"   Gas used: {tx_receipt.gasUsed}")
+    print(f"   Block: {tx_receipt['blockNumber']}")
+    print(f"   Gas used: {tx_receipt['gasUsed']}")
 
     # Save contract address
     with open("contract_address.txt", "w") as f:
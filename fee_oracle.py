@@ -0,0 +1,231 @@
+"""Transaction fees, gas limits and the sender's balance with few RPC calls.
+
+Each registration used to ask the node for the gas price and a gas estimate,
+and the CLI also asked for the balance. FeeOracle answers these locally:
+
+- Fees are read once per block. A single JSON-RPC batch fetches the latest
+  block, plus the priority fee and the sender's balance when needed. Since
+  London is active from genesis (genesis.json), the block's baseFeePerGas
+  gives EIP-1559 type-2 fees:
+  maxFeePerGas = FEE_BASE_MULTIPLIER * base fee + priority fee.
+  A transaction therefore stays includable while the base fee rises over
+  several full blocks. The priority fee is FEE_PRIORITY_GWEI, or the node's
+  eth_maxPriorityFeePerGas when that is unset. Chains without a base fee, or
+  FEE_EIP1559=0, get a legacy gasPrice. The head is re-read after
+  FEE_CACHE_TTL seconds, or sooner when a block follower calls
+  observe_block().
+- registerWork gas is computed from the byte lengths of its arguments
+  (register_work_gas) instead of calling eth_estimateGas. The model counts
+  the intrinsic and calldata gas exactly, then adds the storage slots
+  written, the words copied and a fixed execution cost measured on
+  copyright_registry.sol, all times GAS_MODEL_MARGIN. The v2 layout and
+  GAS_MODEL_ENABLED=0 still estimate.
+- Each sender's balance is read with the head, then reduced locally by the
+  fees in the receipts of its own transactions (record_receipt, called by
+  the receipt confirmer). It is re-read every BALANCE_REFRESH seconds to
+  pick up incoming transfers.
+"""
+from eth_abi import encode
+from web3 import Web3
+import threading
+import time
+import config
+import metrics
+
+GWEI = 10 ** 9
+TX_GAS = 21000
+
+# registerWork on copyright_registry.sol (measured on py-evm; within 7% above
+# the gas used): a fresh storage slot, each 32-byte word of an argument
+# (copying, hashing, log data), and the rest of execution including a
+# creator's first creatorWorks push
+REGISTER_SLOT_GAS = 22500
+REGISTER_WORD_GAS = 700
+REGISTER_EXECUTION_GAS = 81000
+REGISTER_SELECTOR_GAS = 4 * 16  # four non-zero bytes
+FALLBACK_GAS_LIMIT = 500000
+
+_oracles = {}
+_oracles_lock = threading.Lock()
+
+
+def _words(length):
+    return -(-length // 32)
+
+
+def _storage_slots(length):
+    """Storage slots a Solidity string of length bytes occupies"""
+    if length == 0:
+        return 0
+    return 1 if length < 32 else 1 + _words(length)
+
+
+def calldata_gas(data):
+    """Intrinsic gas of transaction data (EIP-2028)"""
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
+
+
+def register_work_gas(work_id, title, work_type, content_hash, metadata):
+    """Gas limit for registerWork with these arguments (v1 layout)"""
+    args = [work_id, title, work_type, content_hash, metadata]
+    lengths = [len(value.encode()) for value in args]
+    # The work ID is stored three times: the record, the creator's list and the hash index
+    slots = 2 * _storage_slots(lengths[0]) + sum(_storage_slots(length) for length in lengths)
+    gas = (TX_GAS + REGISTER_SELECTOR_GAS + calldata_gas(encode(["string"] * 5, args))
+           + REGISTER_EXECUTION_GAS + REGISTER_SLOT_GAS * slots
+           + REGISTER_WORD_GAS * sum(_words(length) for length in lengths))
+    return int(gas * config.GAS_MODEL_MARGIN)
+
+
+def register_work_gas_limit(contract, sender, *args):
+    """Gas limit for registerWork(*args): the size model, or eth_estimateGas + 20%"""
+    if config.GAS_MODEL_ENABLED and config.CONTRACT_VERSION == 1:
+        return register_work_gas(*args)
+    try:
+        return int(contract.functions.registerWork(*args).estimate_gas({'from': sender}) * 1.2)
+    except Exception as e:
+        metrics.record_error(e, 'estimate_gas')
+        return FALLBACK_GAS_LIMIT
+
+
+def max_fee_per_gas(fees):
+    """Most a transaction with these fee fields can pay per unit of gas"""
+    return fees.get("maxFeePerGas", fees.get("gasPrice", 0))
+
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else value
+
+
+class FeeOracle:
+    """Per-process cache of the chain head's fees and the senders' balances"""
+
+    def __init__(self, w3):
+        self.w3 = w3
+        self._lock = threading.Lock()
+        self._head = None       # {"number", "base_fee", "priority_fee", "gas_price"}
+        self._head_at = 0.0
+        self._balances = {}     # address -> {"balance", "block", "fetched_at"}
+
+    def _read(self, address=None):
+        """Latest block, the fee inputs it lacks and address's balance; one batch where supported"""
+        want_priority = config.FEE_EIP1559 and config.FEE_PRIORITY_GWEI is None
+        requests = [("eth_getBlockByNumber", ["latest", False])]
+        if want_priority:
+            requests.append(("eth_maxPriorityFeePerGas", []))
+        if not config.FEE_EIP1559:
+            requests.append(("eth_gasPrice", []))
+        if address:
+            requests.append(("eth_getBalance", [address, "latest"]))
+        results = None
+        try:
+            responses = self.w3.provider.make_batch_request(requests)
+            if isinstance(responses, list) and all("result" in response for response in responses):
+                results = [response["result"] for response in responses]
+        except (NotImplementedError, AttributeError, ValueError, OSError):
+            pass
+        if results is None:
+            # Provider without batch support: one call each
+            calls = {
+                "eth_getBlockByNumber": lambda: self.w3.eth.get_block("latest"),
+                "eth_maxPriorityFeePerGas": lambda: self.w3.eth.max_priority_fee,
+                "eth_gasPrice": lambda: self.w3.eth.gas_price,
+                "eth_getBalance": lambda: self.w3.eth.get_balance(address, "latest"),
+            }
+            results = [calls[method]() for method, _ in requests]
+
+        block = results.pop(0)
+        head = {
+            "number": _int(block["number"]),
+            "base_fee": _int(block.get("baseFeePerGas")),
+            "priority_fee": _int(results.pop(0)) if want_priority else None,
+            "gas_price": None if config.FEE_EIP1559 else _int(results.pop(0)),
+        }
+        balance = _int(results.pop(0)) if address else None
+        return head, balance
+
+    def observe_block(self, block, priority_fee=None):
+        """Take fees from block, a newer head seen by a block follower"""
+        with self._lock:
+            if self._head is not None and _int(block["number"]) <= self._head["number"]:
+                return
+            previous = self._head or {}
+            self._head = {
+                "number": _int(block["number"]),
+                "base_fee": _int(block.get("baseFeePerGas")),
+                # The node's suggestion changes slowly; keep it until the next read
+                "priority_fee": priority_fee or previous.get("priority_fee"),
+                "gas_price": previous.get("gas_price"),
+            }
+            self._head_at = time.monotonic()
+
+    def head(self):
+        """Cached head (re-read after FEE_CACHE_TTL seconds)"""
+        with self._lock:
+            if self._head is not None and time.monotonic() - self._head_at < config.FEE_CACHE_TTL:
+                return self._head
+        return self._refresh()[0]
+
+    def _refresh(self, address=None):
+        head, balance = self._read(address)
+        with self._lock:
+            if self._head is None or head["number"] >= self._head["number"]:
+                self._head, self._head_at = head, time.monotonic()
+            if balance is not None:
+                self._balances[address] = {
+                    "balance": balance, "block": head["number"], "fetched_at": time.monotonic(),
+                }
+        return head, balance
+
+    def fees(self):
+        """Fee fields for build_transaction: type-2 maxFeePerGas/maxPriorityFeePerGas, or gasPrice"""
+        head = self.head()
+        if config.FEE_EIP1559 and head["base_fee"] is not None:
+            priority_fee = head["priority_fee"]
+            if config.FEE_PRIORITY_GWEI is not None:
+                priority_fee = int(config.FEE_PRIORITY_GWEI * GWEI)
+            elif priority_fee is None:
+                priority_fee = self.w3.eth.max_priority_fee
+                with self._lock:
+                    head["priority_fee"] = priority_fee
+            return {
+                "maxFeePerGas": int(head["base_fee"] * config.FEE_BASE_MULTIPLIER) + priority_fee,
+                "maxPriorityFeePerGas": priority_fee,
+            }
+        gas_price = head["gas_price"]
+        if gas_price is None:
+            gas_price = self.w3.eth.gas_price
+            with self._lock:
+                head["gas_price"] = gas_price
+        return {"gasPrice": gas_price}
+
+    def balance(self, address):
+        """address's balance: read with the head at most every BALANCE_REFRESH seconds"""
+        address = Web3.to_checksum_address(address)
+        with self._lock:
+            entry = self._balances.get(address)
+            if entry is not None and time.monotonic() - entry["fetched_at"] < config.BALANCE_REFRESH:
+                return entry["balance"]
+        return self._refresh(address)[1]
+
+    def record_receipt(self, receipt):
+        """Subtract a mined transaction's fee from its sender's local balance"""
+        sender = receipt.get("from")
+        if not sender:
+            return
+        with self._lock:
+            entry = self._balances.get(Web3.to_checksum_address(sender))
+            # Balances read at or after the receipt's block already include it
+            if entry is None or receipt["blockNumber"] <= entry["block"]:
+                return
+            entry["balance"] -= receipt["gasUsed"] * receipt.get("effectiveGasPrice", 0)
+
+
+def get_oracle(w3):
+    """Process-wide FeeOracle for w3"""
+    with _oracles_lock:
+        oracle = _oracles.get(id(w3))
+        if oracle is None or oracle.w3 is not w3:
+            oracle = _oracles[id(w3)] = FeeOracle(w3)
+        return oracle
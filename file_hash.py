@@ -0,0 +1,133 @@
+"""SHA-256 of files on disk, shared by the CLIs.
+
+Digests are remembered in a SQLite table under STATE_DIR keyed by
+(device, inode, size, mtime_ns), so re-verifying an unchanged file costs
+one stat() and no content reads. Files at least HASH_MMAP_THRESHOLD bytes
+are hashed through mmap (no copy into Python buffers) when HASH_MMAP=1.
+"""
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import config
+
+READ_BUFFER = 1024 * 1024
+
+# A file modified within this many seconds of being hashed may change again
+# without its mtime moving (coarse timestamps), so its digest is not cached
+RACY_WINDOW = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS file_hashes (
+    dev          INTEGER NOT NULL,
+    inode        INTEGER NOT NULL,
+    size         INTEGER NOT NULL,
+    mtime_ns     INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    hashed_at    REAL NOT NULL,
+    PRIMARY KEY (dev, inode)
+);
+"""
+
+
+class HashCache:
+    """SQLite map of (dev, inode) -> digest, valid while size and mtime match"""
+
+    def __init__(self, path=None):
+        self.path = path or config.HASH_CACHE_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, st):
+        """Cached digest for a stat result, or None if unknown or changed"""
+        row = self._conn().execute(
+            "SELECT content_hash FROM file_hashes "
+            "WHERE dev = ? AND inode = ? AND size = ? AND mtime_ns = ?",
+            (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, st, content_hash):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?, ?, ?)",
+                (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, content_hash, time.time()),
+            )
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide HashCache per config, or None if disabled or unavailable"""
+    global _default_cache
+    if not config.HASH_CACHE_ENABLED:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            try:
+                _default_cache = HashCache()
+            except sqlite3.Error as e:
+                print(f"⚠️  File hash cache unavailable: {e}")
+                _default_cache = False
+    return _default_cache or None
+
+
+def hash_contents(filepath, size=None):
+    """SHA-256 hex of a file's bytes, always reading the content"""
+    if size is None:
+        size = os.path.getsize(filepath)
+    sha256_hash = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        if config.HASH_MMAP and size >= config.HASH_MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                sha256_hash.update(mapped)
+            return sha256_hash.hexdigest()
+        buffer = bytearray(READ_BUFFER)
+        view = memoryview(buffer)
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            sha256_hash.update(view[:n])
+    return sha256_hash.hexdigest()
+
+
+def calculate_file_hash(filepath, cache=None):
+    """
+    Calculate SHA-256 hash of a file, from the hash cache when the file is
+    unchanged (cache=None uses the default cache, cache=False skips it)
+    """
+    if cache is None:
+        cache = default_cache()
+    if not cache:
+        return hash_contents(filepath)
+
+    st = os.stat(filepath)
+    try:
+        cached = cache.get(st)
+    except sqlite3.Error:
+        cached = None
+    if cached:
+        return cached
+
+    content_hash = hash_contents(filepath, st.st_size)
+    after = os.stat(filepath)
+    unchanged = (after.st_size, after.st_mtime_ns) == (st.st_size, st.st_mtime_ns)
+    if unchanged and time.time() - st.st_mtime_ns / 1e9 > RACY_WINDOW:
+        try:
+            cache.set(st, content_hash)
+        except sqlite3.Error:
+            pass
+    return content_hash
@@ -0,0 +1,314 @@
+"""Local read replica of the CopyrightRegistry contract.
+
+Follows WorkRegistered events block by block and stores the registrations
+in SQLite so that /verify, /my-works and the CLIs can answer reads without
+an eth_call per lookup.
+
+Run standalone (recommended for multi-worker deployments):
+    python indexer.py
+"""
+from web3 import Web3
+import sqlite3
+import sys
+import threading
+import time
+import config
+import registry_client
+import registry_v2
+import read_cache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS works (
+    work_id      TEXT PRIMARY KEY,
+    title        TEXT NOT NULL,
+    type         TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    creator      TEXT NOT NULL,
+    timestamp    INTEGER NOT NULL,
+    metadata     TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash      TEXT NOT NULL,
+    log_index    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_works_hash ON works (content_hash);
+CREATE INDEX IF NOT EXISTS idx_works_creator ON works (creator, block_number, log_index);
+CREATE INDEX IF NOT EXISTS idx_works_block ON works (block_number);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+WORK_COLUMNS = "work_id, title, type, content_hash, creator, timestamp, metadata"
+
+
+class WorkIndex:
+    """SQLite store for indexed registrations (one connection per thread)"""
+
+    def __init__(self, path=None):
+        self.path = path or config.INDEX_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ----- checkpoint -----
+
+    def get_meta(self, key, default=None):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def last_block(self):
+        """Last fully indexed block number, or None if nothing indexed yet"""
+        value = self.get_meta("last_block")
+        return int(value) if value is not None else None
+
+    def synced_at(self):
+        """Unix time of the last poll that caught up with the chain head"""
+        return float(self.get_meta("synced_at", 0))
+
+    def is_fresh(self, max_age=None):
+        """True if the replica caught up with the chain within max_age seconds"""
+        if max_age is None:
+            max_age = config.INDEX_MAX_AGE
+        return time.time() - self.synced_at() <= max_age
+
+    # ----- reads -----
+
+    def get_work(self, work_id):
+        """Return registration tuple in getWorkDetails order, or None"""
+        return self._conn().execute(
+            f"SELECT {WORK_COLUMNS} FROM works WHERE work_id = ?", (work_id,)
+        ).fetchone()
+
+    def find_by_hash(self, content_hash):
+        """Return work ID registered with content_hash, or empty string"""
+        row = self._conn().execute(
+            "SELECT work_id FROM works WHERE content_hash = ?", (content_hash,)
+        ).fetchone()
+        return row[0] if row else ""
+
+    def creator_work_ids(self, creator):
+        """Return a creator's work IDs in registration order"""
+        rows = self._conn().execute(
+            "SELECT work_id FROM works WHERE creator = ? ORDER BY block_number, log_index",
+            (Web3.to_checksum_address(creator),),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def count_creator_works(self, creator):
+        """Number of works indexed for a creator"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM works WHERE creator = ?",
+            (Web3.to_checksum_address(creator),),
+        ).fetchone()[0]
+
+    def creator_works_page(self, creator, offset, limit):
+        """Registration tuples for one page of a creator's works"""
+        return self._conn().execute(
+            f"SELECT {WORK_COLUMNS} FROM works WHERE creator = ? "
+            "ORDER BY block_number, log_index LIMIT ? OFFSET ?",
+            (Web3.to_checksum_address(creator), limit, offset),
+        ).fetchall()
+
+    # ----- writes (indexer only) -----
+
+    def apply_range(self, works, block_hashes, last_block, synced):
+        """Store a processed block range atomically and advance the checkpoint"""
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO works VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", works
+            )
+            conn.executemany("INSERT OR REPLACE INTO blocks VALUES (?, ?)", block_hashes)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('last_block', ?)", (str(last_block),)
+            )
+            conn.execute(
+                "DELETE FROM blocks WHERE number < ?", (last_block - config.INDEX_REORG_DEPTH,)
+            )
+            if synced:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('synced_at', ?)", (str(time.time()),)
+                )
+
+    def known_blocks(self):
+        """Stored (number, hash) pairs, newest first"""
+        return self._conn().execute(
+            "SELECT number, hash FROM blocks ORDER BY number DESC"
+        ).fetchall()
+
+    def rollback_to(self, block_number):
+        """Drop everything indexed after block_number (chain reorganisation)"""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM works WHERE block_number > ?", (block_number,))
+            conn.execute("DELETE FROM blocks WHERE number > ?", (block_number,))
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('last_block', ?)", (str(block_number),)
+            )
+
+
+class RegistryIndexer:
+    """Follows WorkRegistered events and keeps a WorkIndex up to date"""
+
+    def __init__(self, w3, contract, index, on_registered=None):
+        self.w3 = w3
+        self.contract = contract
+        self.index = index
+        # Called with the new works rows after each range that has any
+        self.on_registered = on_registered
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _check_reorg(self):
+        """Roll the index back to the newest stored block still on the canonical chain"""
+        known = self.index.known_blocks()
+        for number, block_hash in known:
+            try:
+                current = self.w3.eth.get_block(number)["hash"].hex()
+            except Exception:
+                continue
+            if current == block_hash:
+                if number != known[0][0]:
+                    print(f"⚠️  Reorg detected, rolling replica back to block {number}")
+                    self.index.rollback_to(number)
+                return
+        if known:
+            # Reorg deeper than INDEX_REORG_DEPTH: rebuild from the start block
+            print("⚠️  Reorg deeper than stored history, rebuilding replica")
+            self.index.rollback_to(config.INDEX_START_BLOCK - 1)
+
+    def _resolve(self, log):
+        """Turn a WorkRegistered log into a works row"""
+        if "workType" in log["args"]:
+            # v2 events carry every field, no lookup needed
+            return registry_v2.event_row(log) + (
+                log["blockNumber"], log["transactionHash"].hex(), log["logIndex"],
+            )
+        # workId is an indexed string (only its keccak is in the topic),
+        # so look it up through the content hash emitted in the data.
+        content_hash = log["args"]["contentHash"]
+        work_id = self.contract.functions.checkContentExists(content_hash).call()
+        details = self.contract.functions.getWorkDetails(work_id).call()
+        return (
+            details[0], details[1], details[2], details[3], details[4], details[5], details[6],
+            log["blockNumber"], log["transactionHash"].hex(), log["logIndex"],
+        )
+
+    def sync_once(self):
+        """Index up to INDEX_BATCH_BLOCKS new blocks; returns True when caught up"""
+        self._check_reorg()
+        head = self.w3.eth.block_number - config.INDEX_CONFIRMATIONS
+        last = self.index.last_block()
+        from_block = config.INDEX_START_BLOCK if last is None else last + 1
+        if from_block > head:
+            self.index.apply_range([], [], from_block - 1, synced=True)
+            return True
+
+        to_block = min(head, from_block + config.INDEX_BATCH_BLOCKS - 1)
+        logs = self.contract.events.WorkRegistered().get_logs(
+            from_block=from_block, to_block=to_block
+        )
+        works = [self._resolve(log) for log in logs]
+        block_hashes = {log["blockNumber"]: log["blockHash"].hex() for log in logs}
+        block_hashes[to_block] = self.w3.eth.get_block(to_block)["hash"].hex()
+        self.index.apply_range(works, list(block_hashes.items()), to_block, synced=to_block == head)
+        if works and self.on_registered:
+            self.on_registered(works)
+        return to_block == head
+
+    def run(self):
+        """Poll the chain until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                caught_up = self.sync_once()
+            except Exception as e:
+                print(f"✗ Indexer error: {e}")
+                caught_up = True
+            if caught_up:
+                self._stop.wait(config.INDEX_POLL_INTERVAL)
+
+    def start(self):
+        """Run the indexer in a daemon thread"""
+        self._thread = threading.Thread(target=self.run, name="registry-indexer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+# ----- Replica-aware reads -----
+# Registrations are immutable, so a replica hit is always valid. Misses fall
+# back to the chain because the replica trails the head by a few blocks.
+
+def get_work_details(contract, work_id, index=None):
+    """getWorkDetails, served from the replica when possible"""
+    if index:
+        row = index.get_work(work_id)
+        if row:
+            return registry_v2.to_record(row)
+    return contract.functions.getWorkDetails(work_id).call()
+
+
+def find_work_by_hash(contract, content_hash, index=None):
+    """checkContentExists, served from the replica when possible"""
+    if index:
+        work_id = index.find_by_hash(content_hash)
+        if work_id:
+            return work_id
+    return contract.functions.checkContentExists(content_hash).call()
+
+
+def get_creator_work_ids(contract, creator, index=None):
+    """getCreatorWorks, served from the replica only if it is fresh"""
+    if index and index.is_fresh():
+        return index.creator_work_ids(creator)
+    return contract.functions.getCreatorWorks(creator).call()
+
+
+def open_index():
+    """Open the local replica if enabled, else None"""
+    if not config.INDEX_ENABLED:
+        return None
+    try:
+        return WorkIndex()
+    except sqlite3.Error as e:
+        print(f"⚠️  Read replica unavailable: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        sys.exit(1)
+    print("✓ Connected to blockchain")
+
+    if not config.CONTRACT_ADDRESS:
+        sys.exit(1)
+    contract = registry_client.get_contract(w3)
+
+    index = WorkIndex()
+    print(f"✓ Replica at {index.path} (last block: {index.last_block()})")
+
+    # Invalidate the web workers' shared read cache as works are registered
+    cache = read_cache.open_cache() if config.READ_CACHE_SHARED else None
+    print("⏳ Following WorkRegistered events... (Ctrl+C to stop)")
+    try:
+        RegistryIndexer(w3, contract, index,
+                        on_registered=cache.clear_negatives if cache else None).run()
+    except KeyboardInterrupt:
+        print("\n✓ Indexer stopped")
@@ -1,14 +1,16 @@
-from web3 import Web3
-import json
 import sys
 from datetime import datetime
 import config
+import indexer
+import batch_reads
+import registry_client
 
-def list_creator_works(creator_address=None):
-    """List all works registered by a creator"""
+def list_creator_works(creator_address=None, use_replica=False, page=None, page_size=None):
+    """List works registered by a creator (all pages, or only the given page)"""
+    page_size = page_size or config.WORKS_PAGE_SIZE
     
     # Connect to blockchain
-    w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
+    w3 = registry_client.get_web3()
     if not w3.is_connected():
         print("✗ Cannot connect to blockchain")
         return False
@@ -18,9 +20,8 @@ def list_creator_works(creator_address=None):
     if not config.CONTRACT_ADDRESS:
         return False
     
-    with open(config.ABI_FILE, "r") as f:
-        abi = json.load(f)
-    contract = w3.eth.contract(address=config.CONTRACT_ADDRESS, abi=abi)
+    contract = registry_client.get_contract(w3)
+    index = indexer.open_index() if use_replica else None
 
     # Use default account if none provided
     if not creator_address:
@@ -29,27 +30,36 @@ def list_creator_works(creator_address=None):
     print(f"📋 Listing works for: {creator_address}\n")
 
     try:
-        # Get all work IDs for creator
-        work_ids = contract.functions.getCreatorWorks(creator_address).call()
+        # Walk the creator's works one page at a time so each call stays small
+        offset = (page - 1) * page_size if page else 0
+        total, works = batch_reads.get_creator_works_page(
+            w3, contract, creator_address, offset, page_size, index
+        )
         
-        if not work_ids:
+        if not total:
             print("No works registered by this creator")
             return True
         
-        print(f"Total works: {len(work_ids)}\n")
+        print(f"Total works: {total}\n")
         print("═" * 80)
         
-        # Get details for each work
-        for i, work_id in enumerate(work_ids, 1):
-            work_details = contract.functions.getWorkDetails(work_id).call()
-            
-            print(f"\n{i}. Work ID: {work_details[0]}")
-            print(f"   Title:        {work_details[1]}")
-            print(f"   Type:         {work_details[2]}")
-            print(f"   Content Hash: {work_details[3][:16]}...{work_details[3][-16:]}")
-            print(f"   Registered:   {datetime.fromtimestamp(work_details[5]).strftime('%Y-%m-%d %H:%M:%S UTC')}")
-            if work_details[6]:
-                print(f"   Metadata:     {work_details[6]}")
+        i = offset
+        while works:
+            for work_details in works:
+                i += 1
+                print(f"\n{i}. Work ID: {work_details[0]}")
+                print(f"   Title:        {work_details[1]}")
+                print(f"   Type:         {work_details[2]}")
+                print(f"   Content Hash: {work_details[3][:16]}...{work_details[3][-16:]}")
+                print(f"   Registered:   {datetime.fromtimestamp(work_details[5]).strftime('%Y-%m-%d %H:%M:%S UTC')}")
+                if work_details[6]:
+                    print(f"   Metadata:     {work_details[6]}")
+            if page:
+                break
+            offset += page_size
+            _, works = batch_reads.get_creator_works_page(
+                w3, contract, creator_address, offset, page_size, index
+            )
         
         print("\n" + "═" * 80)
         return True
@@ -59,5 +69,24 @@ def list_creator_works(creator_address=None):
         return False
 
 if __name__ == "__main__":
-    creator_address = sys.argv[1] if len(sys.argv) > 1 else None
-    list_creator_works(creator_address)
\ No newline at end of file
+    use_replica = False
+    page = None
+    page_size = None
+    creator_address = None
+    
+    i = 1
+    while i < len(sys.argv):
+        if sys.argv[i] == "--replica":
+            use_replica = True
+            i += 1
+        elif sys.argv[i] == "--page" and i + 1 < len(sys.argv):
+            page = max(int(sys.argv[i + 1]), 1)
+            i += 2
+        elif sys.argv[i] == "--limit" and i + 1 < len(sys.argv):
+            page_size = max(int(sys.argv[i + 1]), 1)
+            i += 2
+        else:
+            creator_address = sys.argv[i]
+            i += 1
+    
+    list_creator_works(creator_address, use_replica, page, page_size)
\ No newline at end of file
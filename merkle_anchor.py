@@ -0,0 +1,416 @@
+"""Merkle-batched anchoring of registrations.
+
+Instead of storing every WorkRegistration in the contract, the anchorer
+takes the web app's 'queued' registrations every ANCHOR_INTERVAL seconds,
+builds a Merkle tree over them and commits only the root with
+anchorRoot(root, count): one small transaction per window however many
+works it holds. Each work keeps its inclusion proof in a local SQLite store
+(ANCHOR_DB); /verify and verify_work.py check a proof by recomputing the
+leaf from the work's fields, folding the proof up to the root and reading
+the root's commit from the contract, so the store itself is not trusted.
+Only roots committed by the contract owner or ACCOUNT_ADDRESS count.
+
+Leaf: keccak256(keccak256(abi.encode(string workId, string contentHash,
+address creator, string metadata))), contentHash as lowercase hex without
+0x. Pairs are hashed in sorted order (so proofs need no left/right flags)
+and an odd node moves up a level unchanged. The contract's verifyAnchored()
+checks proofs the same way.
+
+Run the anchorer standalone (recommended for multi-worker deployments):
+    python merkle_anchor.py
+"""
+from eth_abi import encode
+from web3 import Web3
+from web3.exceptions import ContractLogicError
+from getpass import getpass
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import config
+import fee_oracle
+import nonce_manager
+import registration_queue
+import registry_client
+import registry_v2
+import signer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS anchors (
+    root       TEXT PRIMARY KEY,
+    work_count INTEGER NOT NULL,
+    tx_hash    TEXT,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS proofs (
+    work_id      TEXT PRIMARY KEY,
+    title        TEXT NOT NULL,
+    type         TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    creator      TEXT NOT NULL,
+    metadata     TEXT NOT NULL,
+    root         TEXT NOT NULL,
+    leaf_index   INTEGER NOT NULL,
+    proof        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_proofs_hash ON proofs (content_hash);
+CREATE INDEX IF NOT EXISTS idx_proofs_root ON proofs (root);
+"""
+
+PROOF_COLUMNS = "work_id, title, type, content_hash, creator, metadata, root, leaf_index, proof"
+
+
+def normalize_hash(h):
+    h = h.strip().lower()
+    return h[2:] if h.startswith("0x") else h
+
+
+def leaf_hash(work_id, content_hash, creator, metadata):
+    """Leaf of one work (bytes32)"""
+    encoded = encode(
+        ["string", "string", "address", "string"],
+        [work_id, normalize_hash(content_hash), Web3.to_checksum_address(creator), metadata],
+    )
+    return Web3.keccak(Web3.keccak(encoded))
+
+
+def _parent(a, b):
+    return Web3.keccak(a + b if a < b else b + a)
+
+
+def build_levels(leaves):
+    """Tree over leaves as a list of levels, leaves first and [root] last"""
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_parent(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def proof_for(levels, index):
+    """Sibling hashes from leaf index up to the root"""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(level[sibling])
+        index //= 2
+    return proof
+
+
+def compute_root(leaf, proof):
+    """Fold proof onto leaf"""
+    node = leaf
+    for sibling in proof:
+        node = _parent(node, sibling)
+    return node
+
+
+class AnchorStore:
+    """SQLite store of committed roots and per-work inclusion proofs"""
+
+    def __init__(self, path=None):
+        self.path = path or config.ANCHOR_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add_batch(self, works, levels):
+        """Store the proofs of works (queue rows, in leaf order); returns the 0x root"""
+        root = Web3.to_hex(levels[-1][0])
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT INTO anchors (root, work_count, tx_hash, created_at) VALUES (?, ?, NULL, ?)",
+                (root, len(works), time.time()),
+            )
+            conn.executemany(
+                f"INSERT INTO proofs ({PROOF_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (work["work_id"], work["title"], work["type"], work["content_hash"],
+                     work["creator"], work["metadata"], root, i,
+                     json.dumps([Web3.to_hex(node) for node in proof_for(levels, i)]))
+                    for i, work in enumerate(works)
+                ],
+            )
+        return root
+
+    def set_tx_hash(self, root, tx_hash):
+        with self._conn() as conn:
+            conn.execute("UPDATE anchors SET tx_hash = ? WHERE root = ?", (tx_hash, root))
+
+    def discard(self, root):
+        """Forget a root that was never sent, and its proofs"""
+        with self._conn() as conn:
+            conn.execute("DELETE FROM proofs WHERE root = ?", (root,))
+            conn.execute("DELETE FROM anchors WHERE root = ?", (root,))
+
+    def get(self, work_id):
+        """Proof record of work_id (proof as a list of 0x-hex siblings), or None"""
+        row = self._conn().execute(
+            f"SELECT {PROOF_COLUMNS} FROM proofs WHERE work_id = ?", (work_id,)
+        ).fetchone()
+        return self._record(row)
+
+    def find_by_hash(self, content_hash):
+        """Proof records for content_hash (with or without 0x), newest first"""
+        h = normalize_hash(content_hash)
+        rows = self._conn().execute(
+            f"SELECT {PROOF_COLUMNS} FROM proofs WHERE content_hash IN (?, ?) ORDER BY rowid DESC",
+            (h, "0x" + h),
+        ).fetchall()
+        return [self._record(row) for row in rows]
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "roots": conn.execute("SELECT COUNT(*) FROM anchors").fetchone()[0],
+            "works": conn.execute("SELECT COUNT(*) FROM proofs").fetchone()[0],
+        }
+
+    @staticmethod
+    def _record(row):
+        if row is None:
+            return None
+        record = dict(row)
+        record["proof"] = json.loads(record["proof"])
+        return record
+
+
+def open_store():
+    """Process-wide proof store, or None if anchoring was never used here"""
+    if not config.ANCHOR_REGISTER and not os.path.exists(config.ANCHOR_DB):
+        return None
+    return AnchorStore()
+
+
+def proof_bundle(record):
+    """Self-contained proof of one work, checkable against the contract alone"""
+    return {
+        "work_id": record["work_id"],
+        "title": record["title"],
+        "type": record["type"],
+        "content_hash": record["content_hash"],
+        "creator": record["creator"],
+        "metadata": record["metadata"],
+        "leaf": Web3.to_hex(leaf_hash(
+            record["work_id"], record["content_hash"], record["creator"], record["metadata"]
+        )),
+        "leaf_index": record["leaf_index"],
+        "proof": record["proof"],
+        "root": record["root"],
+        "contract": config.CONTRACT_ADDRESS,
+        "chain_id": config.CHAIN_ID,
+    }
+
+
+# Contract address -> owner(), read once per process
+_owners = {}
+
+
+def trusted_submitters(contract):
+    """Lowercase addresses whose roots count: the registry owner and the service account"""
+    if contract.address not in _owners:
+        _owners[contract.address] = contract.functions.owner().call()
+    trusted = {_owners[contract.address].lower()}
+    if config.ACCOUNT_ADDRESS:
+        trusted.add(config.ACCOUNT_ADDRESS.lower())
+    return trusted
+
+
+def check_proof(contract, record, roots=None):
+    """
+    Verify record (a proof record or bundle) against the chain. Returns
+    {"valid", "root", "submitter", "anchored_at", "error"}; valid only if the
+    leaf rebuilt from the record's fields leads to its root and the root was
+    committed in the contract by a trusted submitter (contracts deployed before
+    anchorRoot was owner-only let anyone commit a root). roots caches anchors()
+    answers across calls.
+    """
+    result = {"valid": False, "root": record["root"], "submitter": None,
+              "anchored_at": None, "error": None}
+    leaf = leaf_hash(record["work_id"], record["content_hash"], record["creator"], record["metadata"])
+    proof = [bytes.fromhex(normalize_hash(node)) for node in record["proof"]]
+    if Web3.to_hex(compute_root(leaf, proof)) != record["root"].lower():
+        result["error"] = "Inclusion proof does not lead to the root"
+        return result
+
+    if roots is not None and record["root"] in roots:
+        anchor = roots[record["root"]]
+    else:
+        anchor = contract.functions.anchors(bytes.fromhex(normalize_hash(record["root"]))).call()
+        if roots is not None:
+            roots[record["root"]] = anchor
+    submitter, timestamp, _ = anchor
+    if int(submitter, 16) == 0:
+        result["error"] = "Merkle root not anchored on-chain (yet)"
+        return result
+    if submitter.lower() not in trusted_submitters(contract):
+        result.update(submitter=submitter, anchored_at=timestamp,
+                      error=f"Merkle root committed by {submitter}, not the registry owner or service account")
+        return result
+    result.update(valid=True, submitter=submitter, anchored_at=timestamp)
+    return result
+
+
+def to_registration(record, check):
+    """Verified proof record as a WorkRegistration (timestamp of the root commit)"""
+    return registry_v2.WorkRegistration(
+        record["work_id"], record["title"], record["type"], record["content_hash"],
+        record["creator"], check["anchored_at"], record["metadata"],
+    )
+
+
+def find_anchored(contract, store, work_id=None, content_hash=None, roots=None):
+    """
+    (record, check) of an anchored work by ID or content hash, preferring a
+    valid proof; None if the store has no such work
+    """
+    if store is None:
+        return None
+    if work_id:
+        records = [record for record in [store.get(work_id)] if record]
+    else:
+        records = store.find_by_hash(content_hash)
+    found = None
+    for record in records:
+        check = check_proof(contract, record, roots)
+        if check["valid"]:
+            return record, check
+        found = found or (record, check)
+    return found
+
+
+def send_anchor(w3, contract, account, nonces, root, work_count, fees=None):
+    """Sign and broadcast one anchorRoot transaction; returns its tx hash"""
+    call = contract.functions.anchorRoot(bytes.fromhex(root[2:]), work_count)
+    try:
+        gas_limit = int(call.estimate_gas({'from': account.address}) * 1.2)
+    except Exception as e:
+        # A revert (e.g. the account is not the owner) would only burn gas on-chain;
+        # eth-tester raises its own TransactionFailed instead of ContractLogicError
+        if isinstance(e, ContractLogicError) or type(e).__name__ == "TransactionFailed":
+            raise
+        gas_limit = 150000
+    nonce = nonces.allocate()
+    try:
+        tx = call.build_transaction({
+            'from': account.address,
+            'nonce': nonce,
+            'gas': gas_limit,
+            'chainId': config.CHAIN_ID,
+            **(fees or fee_oracle.get_oracle(w3).fees())
+        })
+        signed_tx = account.sign_transaction(tx)
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+    except Exception:
+        nonces.release(nonce)
+        raise
+    nonces.mark_sent(nonce, tx_hash, tx)
+    return Web3.to_hex(tx_hash)
+
+
+class Anchorer:
+    """Background worker that commits queued registrations as one Merkle root per window"""
+
+    def __init__(self, w3, contract, queue, store, key_signer=None):
+        self.w3 = w3
+        self.contract = contract
+        self.queue = queue
+        self.store = store
+        self.signer = key_signer or signer.get_signer()
+        self._stop = threading.Event()
+
+    def anchor_once(self):
+        """Anchor everything queued now (up to ANCHOR_MAX_WORKS); returns number of works"""
+        queued = self.queue.queued(limit=config.ANCHOR_MAX_WORKS)
+        if not queued:
+            return 0
+        try:
+            account = self.signer.get_account()
+        except signer.SignerLocked:
+            print(f"⚠️  {len(queued)} queued registrations waiting for the signer to be unlocked")
+            return 0
+
+        nonces = nonce_manager.for_account(self.w3, account.address)
+        if nonces.needs_repair():
+            nonces.repair(account, on_replaced=self.queue.replace_tx_hash)
+
+        levels = build_levels([
+            leaf_hash(work["work_id"], work["content_hash"], work["creator"], work["metadata"])
+            for work in queued
+        ])
+        # Proofs are stored before the root is sent, so a crash can't lose them
+        root = self.store.add_batch(queued, levels)
+        try:
+            tx_hash = send_anchor(self.w3, self.contract, account, nonces, root, len(queued))
+        except Exception as e:
+            self.store.discard(root)
+            for work in queued:
+                self.queue.mark_failed(work["work_id"], f"Anchor send failed: {e}")
+            return 0
+        self.store.set_tx_hash(root, tx_hash)
+        self.queue.mark_submitted([work["work_id"] for work in queued], tx_hash)
+        return len(queued)
+
+    def run(self):
+        """Anchor once per ANCHOR_INTERVAL until stop() is called"""
+        while not self._stop.is_set():
+            try:
+                self.anchor_once()
+            except Exception as e:
+                print(f"✗ Anchorer error: {e}")
+            self._stop.wait(config.ANCHOR_INTERVAL)
+
+    def start(self):
+        """Run the anchorer in a daemon thread"""
+        threading.Thread(target=self.run, name="merkle-anchorer", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+if __name__ == "__main__":
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        sys.exit(1)
+    print("✓ Connected to blockchain")
+
+    contract = registry_client.get_contract(w3)
+
+    # The anchorer signs on its own, so it needs its own unlocked key
+    key_signer = signer.get_signer()
+    try:
+        account = key_signer.unlock(getpass("Account Password: "), ttl=float("inf"))
+    except Exception as e:
+        print(f"✗ Failed to decrypt account: {e}")
+        sys.exit(1)
+    print(f"✓ Using account: {account.address}")
+    owner = contract.functions.owner().call()
+    if owner.lower() != account.address.lower():
+        print(f"⚠️  The contract owner is {owner}; anchorRoot reverts for other accounts")
+
+    queue = registration_queue.RegistrationQueue()
+    store = AnchorStore()
+    print(f"✓ Registration queue at {queue.path}, proofs at {store.path}")
+    print(f"⏳ Anchoring queued registrations every {config.ANCHOR_INTERVAL:.0f}s... (Ctrl+C to stop)")
+    try:
+        Anchorer(w3, contract, queue, store, key_signer).run()
+    except KeyboardInterrupt:
+        print("\n✓ Anchorer stopped")
@@ -0,0 +1,295 @@
+"""In-process metrics in Prometheus text format.
+
+Counters and histograms are kept per process and served by app.py on
+/metrics (METRICS_ENABLED):
+
+- registry_http_request_seconds: request latency by endpoint and status
+- registry_phase_seconds: time per phase of a request (upload, estimate_gas,
+  send, ...), so a slow /register shows which step is slow
+- registry_rpc_calls_total / registry_rpc_seconds: JSON-RPC traffic by
+  method and, for eth_call / eth_estimateGas, by contract function;
+  registry_rpc_calls_per_request shows the fan-out of each endpoint
+- registry_tx_gas_used / registry_work_gas_used: gas of mined registration
+  transactions, and each work's share of it
+- registry_errors_total: exceptions by endpoint, phase and type, including
+  the ones the views turn into flash messages
+
+Each request gets a Trace (start_trace/finish_trace) that collects its
+phases and RPC calls for the optional Server-Timing header
+(METRICS_TIMING_HEADER) and the slow-request log (METRICS_SLOW_REQUEST).
+Processes run with several workers expose one set of metrics each.
+"""
+from contextlib import contextmanager
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+GAS_BUCKETS = (21000, 50000, 100000, 150000, 200000, 300000, 500000,
+               1000000, 2000000, 5000000, 10000000, 30000000)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+# Selector label for eth_call / eth_estimateGas data not in the registry ABI
+OTHER_FUNCTION = "other"
+
+_metrics = []
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label combination"""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _metrics.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames), 0)
+
+    def by(self, labelname):
+        """{label value: total} summed over the other labels"""
+        position = self.labelnames.index(labelname)
+        totals = {}
+        with self._lock:
+            for key, value in self._values.items():
+                totals[key[position]] = totals.get(key[position], 0) + value
+        return totals
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Histogram:
+    """Bucketed distribution per label combination"""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # labels -> [per-bucket counts (last: +Inf), sum]
+        _metrics.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0]
+            state[0][index] += 1
+            state[1] += value
+
+    def count(self, **labels):
+        state = self._values.get(tuple(str(labels.get(name, "")) for name in self.labelnames))
+        return sum(state[0]) if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                yield self.name + "_bucket", pairs + [("le", _number(bound))], cumulative
+            yield self.name + "_sum", pairs, total
+            yield self.name + "_count", pairs, cumulative
+
+
+REQUEST_SECONDS = Histogram(
+    "registry_http_request_seconds", "HTTP request latency", ("endpoint", "method", "status"))
+PHASE_SECONDS = Histogram(
+    "registry_phase_seconds", "Time spent in each phase of a request", ("endpoint", "phase"))
+RPC_CALLS = Counter(
+    "registry_rpc_calls_total", "JSON-RPC calls by method and contract function", ("method", "function"))
+RPC_SECONDS = Histogram(
+    "registry_rpc_seconds", "JSON-RPC round-trip time (batch: whole batch)", ("method",))
+RPC_ERRORS = Counter(
+    "registry_rpc_errors_total", "Failed JSON-RPC calls", ("method", "error"))
+RPC_PER_REQUEST = Histogram(
+    "registry_rpc_calls_per_request", "JSON-RPC calls made while serving one request",
+    ("endpoint",), COUNT_BUCKETS)
+TX_GAS_USED = Histogram(
+    "registry_tx_gas_used", "Gas used by mined registration transactions", ("kind",), GAS_BUCKETS)
+WORK_GAS_USED = Histogram(
+    "registry_work_gas_used", "Gas used per registered work (share of its transaction)", ("kind",), GAS_BUCKETS)
+REGISTRATIONS = Counter(
+    "registry_registrations_total", "Registrations resolved by the receipt confirmer", ("status",))
+CONFIRMATION_SECONDS = Histogram(
+    "registry_confirmation_seconds", "Time from submission to a resolved receipt", ("status",),
+    (1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 1800))
+ERRORS = Counter(
+    "registry_errors_total", "Exceptions by endpoint, phase and type", ("endpoint", "phase", "error"))
+
+
+def render():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in _metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, pairs, value in metric.samples():
+            lines.append(f"{name}{_labels(pairs)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Phases and RPC calls of one request"""
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.phases = []
+        self.rpc_calls = 0
+        self.rpc_seconds = 0.0
+        self.elapsed = None
+
+    def server_timing(self):
+        """Server-Timing header value (durations in milliseconds)"""
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.phases]
+        entries.append(f'rpc;dur={self.rpc_seconds * 1000:.1f};desc="{self.rpc_calls} calls"')
+        entries.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(entries)
+
+    def summary(self):
+        """One line for logs: slowest phases first"""
+        phases = sorted(self.phases, key=lambda phase: -phase[1])
+        parts = [f"{name} {seconds:.3f}s" for name, seconds in phases]
+        parts.append(f"{self.rpc_calls} RPC calls {self.rpc_seconds:.3f}s")
+        return ", ".join(parts)
+
+
+_local = threading.local()
+
+
+def start_trace(endpoint):
+    _local.trace = Trace(endpoint)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def finish_trace(method=None, status=None):
+    """Close this thread's trace and record the request; returns it (or None)"""
+    trace = current_trace()
+    if trace is None:
+        return None
+    _local.trace = None
+    trace.elapsed = time.perf_counter() - trace.started
+    REQUEST_SECONDS.observe(trace.elapsed, endpoint=trace.endpoint, method=method, status=status)
+    RPC_PER_REQUEST.observe(trace.rpc_calls, endpoint=trace.endpoint)
+    return trace
+
+
+@contextmanager
+def phase(name):
+    """Time a block as one phase of the current request"""
+    trace = current_trace()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        PHASE_SECONDS.observe(elapsed, endpoint=trace.endpoint if trace else "", phase=name)
+        if trace is not None:
+            trace.phases.append((name, elapsed))
+
+
+def record_error(error, phase=""):
+    """Count an exception, including ones a view handles itself"""
+    trace = current_trace()
+    ERRORS.inc(endpoint=trace.endpoint if trace else "", phase=phase, error=type(error).__name__)
+
+
+def _function_label(method, params, function_names):
+    if method not in ("eth_call", "eth_estimateGas") or not params or not isinstance(params[0], dict):
+        return ""
+    data = params[0].get("data") or params[0].get("input") or ""
+    if not isinstance(data, str):
+        data = "0x" + bytes(data).hex()
+    return function_names().get(data[:10].lower(), OTHER_FUNCTION)
+
+
+def _record_rpc(method, seconds, calls=1):
+    RPC_SECONDS.observe(seconds, method=method)
+    trace = current_trace()
+    if trace is not None:
+        trace.rpc_calls += calls
+        trace.rpc_seconds += seconds
+
+
+def instrument_provider(provider, function_names=dict):
+    """
+    Count and time every request the provider sends, single or batched.
+    function_names() maps 4-byte selectors ("0x12345678") to contract
+    function names for the function label.
+    """
+    make_request = provider.make_request
+
+    def timed_request(method, params):
+        RPC_CALLS.inc(method=method, function=_function_label(method, params, function_names))
+        started = time.perf_counter()
+        try:
+            response = make_request(method, params)
+        except Exception as e:
+            RPC_ERRORS.inc(method=method, error=type(e).__name__)
+            raise
+        finally:
+            _record_rpc(method, time.perf_counter() - started)
+        if isinstance(response, dict) and response.get("error"):
+            RPC_ERRORS.inc(method=method, error="rpc_error")
+        return response
+
+    provider.make_request = timed_request
+
+    make_batch_request = getattr(provider, "make_batch_request", None)
+    if make_batch_request is not None:
+        def timed_batch_request(requests_info):
+            for method, params in requests_info:
+                RPC_CALLS.inc(method=method, function=_function_label(method, params, function_names))
+            started = time.perf_counter()
+            try:
+                return make_batch_request(requests_info)
+            except Exception as e:
+                RPC_ERRORS.inc(method="batch", error=type(e).__name__)
+                raise
+            finally:
+                _record_rpc("batch", time.perf_counter() - started, len(requests_info))
+
+        provider.make_batch_request = timed_batch_request
+    return provider
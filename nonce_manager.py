@@ -0,0 +1,272 @@
+"""Local nonce allocation for the signer account.
+
+Querying get_transaction_count per transaction hands the same nonce to
+concurrent registrations, so one replaces or drops the other. NonceManager
+allocates nonces from a SQLite table instead: every allocation runs inside a
+BEGIN IMMEDIATE transaction, which serialises threads and processes (web
+workers, CLIs) that share the database.
+
+It also tracks every in-flight transaction so it can:
+- reuse nonces released by failed sends,
+- detect gaps (allocated but never broadcast) that block later transactions,
+- re-broadcast stuck transactions with bumped fees.
+"""
+from web3 import Web3
+import json
+import sqlite3
+import threading
+import time
+import config
+import fee_oracle
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+ALLOCATED = "allocated"  # reserved, not broadcast yet
+SENT = "sent"            # broadcast, waiting to be mined
+RELEASED = "released"    # send failed; nonce can be handed out again
+FILLING = "filling"      # claimed by repair() for a gap-filling transfer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nonces (
+    address    TEXT NOT NULL,
+    nonce      INTEGER NOT NULL,
+    status     TEXT NOT NULL,
+    tx_hash    TEXT,
+    tx_json    TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (address, nonce)
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    address   TEXT PRIMARY KEY,
+    next      INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class NonceManager:
+    """Thread- and process-safe nonce allocator for one account"""
+
+    def __init__(self, w3, address, path=None):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(address)
+        self.path = path or config.NONCE_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are managed explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _locked(self):
+        """Start a write transaction that excludes other threads and processes"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    def _sync(self, conn, force=False):
+        """Reconcile local state with the chain; returns the next free nonce"""
+        row = conn.execute(
+            "SELECT next, synced_at FROM accounts WHERE address = ?", (self.address,)
+        ).fetchone()
+        if row and not force and time.time() - row[1] < config.NONCE_SYNC_INTERVAL:
+            return row[0]
+
+        mined = self.w3.eth.get_transaction_count(self.address, "latest")
+        pending = self.w3.eth.get_transaction_count(self.address, "pending")
+        # Everything below the mined count is final
+        conn.execute(
+            "DELETE FROM nonces WHERE address = ? AND nonce < ?", (self.address, mined)
+        )
+        next_nonce = max(row[0] if row else 0, pending, mined)
+        conn.execute(
+            "INSERT OR REPLACE INTO accounts VALUES (?, ?, ?)",
+            (self.address, next_nonce, time.time()),
+        )
+        return next_nonce
+
+    def allocate(self):
+        """Reserve the next nonce (reusing released ones first)"""
+        conn = self._locked()
+        try:
+            next_nonce = self._sync(conn)
+            row = conn.execute(
+                "SELECT nonce FROM nonces WHERE address = ? AND status = ? ORDER BY nonce LIMIT 1",
+                (self.address, RELEASED),
+            ).fetchone()
+            if row:
+                nonce = row[0]
+            else:
+                nonce = next_nonce
+                conn.execute(
+                    "UPDATE accounts SET next = ? WHERE address = ?", (nonce + 1, self.address)
+                )
+            conn.execute(
+                "INSERT OR REPLACE INTO nonces VALUES (?, ?, ?, NULL, NULL, ?)",
+                (self.address, nonce, ALLOCATED, time.time()),
+            )
+            conn.execute("COMMIT")
+            return nonce
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def mark_sent(self, nonce, tx_hash, tx):
+        """Record a broadcast transaction (tx is the unsigned dict, kept for replacement)"""
+        self._conn().execute(
+            "UPDATE nonces SET status = ?, tx_hash = ?, tx_json = ?, updated_at = ? "
+            "WHERE address = ? AND nonce = ?",
+            (SENT, Web3.to_hex(tx_hash), json.dumps(dict(tx)), time.time(), self.address, nonce),
+        )
+
+    def release(self, nonce):
+        """Give back a nonce whose transaction was never broadcast"""
+        self._conn().execute(
+            "UPDATE nonces SET status = ?, updated_at = ? WHERE address = ? AND nonce = ?",
+            (RELEASED, time.time(), self.address, nonce),
+        )
+
+    def in_flight(self):
+        """Number of broadcast transactions not yet mined"""
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM nonces WHERE address = ? AND status = ?", (self.address, SENT)
+        ).fetchone()[0]
+
+    def sync(self):
+        """Force a reconcile with the chain (drops mined nonces)"""
+        conn = self._locked()
+        try:
+            self._sync(conn, force=True)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def needs_repair(self):
+        """True if there are gaps or stuck transactions (local check, no RPC)"""
+        return bool(self.find_gaps() or self.find_stuck())
+
+    def find_gaps(self, older_than=None):
+        """
+        Nonces reserved, released or left mid-fill by a crashed repair() but never
+        broadcast, older than older_than seconds
+        """
+        if older_than is None:
+            older_than = config.NONCE_STUCK_AFTER
+        rows = self._conn().execute(
+            "SELECT nonce FROM nonces WHERE address = ? AND status IN (?, ?, ?) AND updated_at < ? "
+            "ORDER BY nonce",
+            (self.address, ALLOCATED, RELEASED, FILLING, time.time() - older_than),
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def find_stuck(self, older_than=None):
+        """Broadcast transactions not mined after older_than seconds: [(nonce, tx_hash, tx)]"""
+        if older_than is None:
+            older_than = config.NONCE_STUCK_AFTER
+        rows = self._conn().execute(
+            "SELECT nonce, tx_hash, tx_json FROM nonces "
+            "WHERE address = ? AND status = ? AND updated_at < ? ORDER BY nonce",
+            (self.address, SENT, time.time() - older_than),
+        ).fetchall()
+        return [(nonce, tx_hash, json.loads(tx_json)) for nonce, tx_hash, tx_json in rows]
+
+    def _claim(self, nonce, statuses, tx_hash=None):
+        """
+        Take nonce for repair() if it is still in one of statuses, untouched for
+        NONCE_STUCK_AFTER seconds (and, for a stuck transaction, still tx_hash);
+        False if allocate() or another repair() got to it first
+        """
+        now = time.time()
+        query = ("UPDATE nonces SET status = ?, updated_at = ? WHERE address = ? AND nonce = ? "
+                 f"AND status IN ({', '.join('?' * len(statuses))}) AND updated_at < ?")
+        params = [FILLING if tx_hash is None else SENT, now, self.address, nonce, *statuses,
+                  now - config.NONCE_STUCK_AFTER]
+        if tx_hash is not None:
+            query += " AND tx_hash = ?"
+            params.append(tx_hash)
+        conn = self._locked()
+        try:
+            claimed = conn.execute(query, params).rowcount == 1
+            conn.execute("COMMIT")
+            return claimed
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _send(self, account, nonce, tx):
+        tx_hash = self.w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction)
+        self.mark_sent(nonce, tx_hash, tx)
+        return Web3.to_hex(tx_hash)
+
+    def repair(self, account, on_replaced=None):
+        """
+        Unblock the account's transaction queue: fill gaps with zero-value
+        self-transfers and re-broadcast stuck transactions with bumped fees.
+        on_replaced(old_tx_hash, new_tx_hash) is called for each
+        replacement. Returns the number of transactions sent.
+        """
+        self.sync()
+        sent = 0
+        fees = fee_oracle.get_oracle(self.w3).fees()
+        stuck = self.find_stuck()
+
+        for nonce in self.find_gaps():
+            # Claimed first, so allocate() can't hand out a released gap while it is filled
+            if not self._claim(nonce, (ALLOCATED, RELEASED, FILLING)):
+                continue
+            tx = {
+                "from": self.address,
+                "to": self.address,
+                "value": 0,
+                "nonce": nonce,
+                "gas": 21000,
+                "chainId": config.CHAIN_ID,
+                **fees,
+            }
+            try:
+                tx_hash = self._send(account, nonce, tx)
+                print(f"⚠️  Filled nonce gap {nonce} ({tx_hash})")
+                sent += 1
+            except Exception as e:
+                self.release(nonce)
+                print(f"✗ Could not fill nonce gap {nonce}: {e}")
+
+        for nonce, old_tx_hash, tx in stuck:
+            # Refreshing updated_at keeps a concurrent repair() from replacing it too
+            if not self._claim(nonce, (SENT,), old_tx_hash):
+                continue
+            # Geth requires at least a 10% bump of every fee field to replace a pending transaction
+            if "gasPrice" in tx:
+                tx["gasPrice"] = max(int(tx["gasPrice"] * config.NONCE_REPLACE_BUMP),
+                                     fee_oracle.max_fee_per_gas(fees))
+            else:
+                tx["maxPriorityFeePerGas"] = max(int(tx["maxPriorityFeePerGas"] * config.NONCE_REPLACE_BUMP),
+                                                 fees.get("maxPriorityFeePerGas", 0))
+                tx["maxFeePerGas"] = max(int(tx["maxFeePerGas"] * config.NONCE_REPLACE_BUMP),
+                                         fee_oracle.max_fee_per_gas(fees), tx["maxPriorityFeePerGas"])
+            try:
+                tx_hash = self._send(account, nonce, tx)
+                print(f"⚠️  Replaced stuck nonce {nonce} ({old_tx_hash} -> {tx_hash})")
+                if on_replaced:
+                    on_replaced(old_tx_hash, tx_hash)
+                sent += 1
+            except Exception as e:
+                print(f"✗ Could not replace stuck nonce {nonce}: {e}")
+
+        return sent
+
+
+def for_account(w3, address):
+    """Process-wide NonceManager for address"""
+    address = Web3.to_checksum_address(address)
+    with _managers_lock:
+        if address not in _managers:
+            _managers[address] = NonceManager(w3, address)
+        return _managers[address]
@@ -0,0 +1,61 @@
+"""Per-client limits for the bulk JSON API.
+
+Each client (remote address) has a token bucket refilled at `rate` items
+per second up to `burst`, and may run at most `max_inflight` bulk requests
+at once. A request costing more than the bucket holds is admitted once the
+bucket is full and leaves it in debt, so large batches are allowed but
+slow the same client down afterwards instead of everyone else.
+Limits are per process; each web worker keeps its own buckets.
+"""
+import threading
+import time
+
+# Buckets untouched for this long are dropped
+IDLE_EXPIRY = 600
+
+
+class ClientLimiter:
+    """Token bucket on looked-up items plus a cap on concurrent requests, per client"""
+
+    def __init__(self, rate, burst, max_inflight):
+        self.rate = rate
+        self.burst = burst
+        self.max_inflight = max_inflight
+        self._clients = {}  # client -> [tokens, updated_at, inflight]
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def acquire(self, client, cost):
+        """
+        Reserve cost items and one request slot for client. Returns 0 when
+        granted, else the number of seconds to wait before retrying.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            state = self._clients.setdefault(client, [self.burst, now, 0])
+            state[0] = min(self.burst, state[0] + (now - state[1]) * self.rate)
+            state[1] = now
+            if state[2] >= self.max_inflight:
+                return 1.0
+            need = min(cost, self.burst)
+            if state[0] < need:
+                return (need - state[0]) / self.rate
+            state[0] -= cost
+            state[2] += 1
+            return 0
+
+    def release(self, client):
+        """Free the request slot taken by acquire()"""
+        with self._lock:
+            state = self._clients.get(client)
+            if state and state[2]:
+                state[2] -= 1
+
+    def _prune(self, now):
+        if now - self._last_prune < IDLE_EXPIRY:
+            return
+        self._last_prune = now
+        for client in [c for c, s in self._clients.items()
+                       if not s[2] and now - s[1] > IDLE_EXPIRY]:
+            del self._clients[client]
@@ -0,0 +1,358 @@
+"""Read-through cache for contract view calls.
+
+getWorkDetails, checkContentExists and verifyWork answers never change once
+a work is registered (nor does owner), so positive results are cached until
+evicted by the LRU bound. Negative answers ("Work not found", empty work ID, False) can
+flip when a work is registered; they expire after READ_CACHE_NEGATIVE_TTL
+seconds and are dropped as soon as a WorkRegistered event is seen.
+
+Two tiers: an in-process LRU, and optionally a SQLite table under STATE_DIR
+shared by every web worker on the host (READ_CACHE_SHARED=1).
+"""
+from collections import OrderedDict
+from web3.exceptions import ContractLogicError
+import json
+import sqlite3
+import threading
+import time
+import config
+import registry_v2
+
+# Cached view functions and how to tell a negative answer
+CACHED = {
+    "getWorkDetails": lambda result: False,  # misses raise instead
+    "checkContentExists": lambda result: not result,
+    "verifyWork": lambda result: not result,
+    "owner": lambda result: False,  # set once by the constructor
+}
+
+# Values read back from the shared tier come as plain lists
+RESTORE = {
+    "getWorkDetails": registry_v2.to_record,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key        TEXT PRIMARY KEY,
+    value      TEXT NOT NULL,
+    negative   INTEGER NOT NULL,
+    expires_at REAL
+);
+"""
+
+
+def cache_key(address, name, args):
+    return json.dumps([address, name, list(args)])
+
+
+class LRUCache:
+    """Thread-safe in-process LRU; entries are (value, negative, expires_at)"""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] is not None and entry[2] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, negative, expires_at):
+        with self._lock:
+            self._entries[key] = (value, negative, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear_negatives(self):
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[1]]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SharedCache:
+    """SQLite cache table shared by the processes on this host"""
+
+    def __init__(self, path=None):
+        self.path = path or config.READ_CACHE_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value, negative, expires_at FROM cache "
+            "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        value = json.loads(row[0])
+        return (tuple(value) if isinstance(value, list) else value, bool(row[1]), row[2])
+
+    def set(self, key, value, negative, expires_at):
+        with self._conn() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), int(negative), expires_at),
+            )
+
+    def clear_negatives(self):
+        with self._conn() as conn:
+            conn.execute("DELETE FROM cache WHERE negative = 1 OR expires_at <= ?", (time.time(),))
+
+
+class ReadCache:
+    """LRU in front of an optional shared tier, with hit/miss counters"""
+
+    def __init__(self, max_size=None, negative_ttl=None, shared=None):
+        self.local = LRUCache(max_size or config.READ_CACHE_SIZE)
+        self.shared = shared
+        self.negative_ttl = config.READ_CACHE_NEGATIVE_TTL if negative_ttl is None else negative_ttl
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def get(self, key):
+        """Cached (value, negative) or None"""
+        entry = self.local.get(key)
+        if entry is None and self.shared:
+            try:
+                entry = self.shared.get(key)
+            except sqlite3.Error:
+                entry = None
+            if entry is not None:
+                self.local.set(key, *entry)
+                self._count("shared_hits")
+        elif entry is not None:
+            self._count("hits")
+        if entry is None:
+            self._count("misses")
+            return None
+        if entry[1]:
+            self._count("negative_hits")
+        return entry[0], entry[1]
+
+    def set(self, key, value, negative):
+        expires_at = time.time() + self.negative_ttl if negative else None
+        self.local.set(key, value, negative, expires_at)
+        if self.shared:
+            try:
+                self.shared.set(key, value, negative, expires_at)
+            except sqlite3.Error:
+                pass
+
+    def clear_negatives(self, *_):
+        """Drop every negative entry (a work was registered); usable as an event hook"""
+        self.local.clear_negatives()
+        if self.shared:
+            try:
+                self.shared.clear_negatives()
+            except sqlite3.Error:
+                pass
+        self._count("invalidations")
+
+    def stats(self):
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+            "size": len(self.local),
+            "max_size": self.local.max_size,
+            "evictions": self.local.evictions,
+            "invalidations": self.invalidations,
+            "shared": self.shared is not None,
+        }
+
+
+class _CachedCall:
+    """A bound view function whose call() goes through the cache"""
+
+    def __init__(self, cache, key, inner, is_negative, restore=None):
+        self.cache = cache
+        self.key = key
+        self.inner = inner
+        self.is_negative = is_negative
+        self.restore = restore
+        # Unwrapped function and decoder for batch_reads' JSON-RPC batches
+        self.function = getattr(inner, "function", inner)
+        if hasattr(inner, "decode"):
+            self.decode = inner.decode
+
+    def call(self, *args, **kwargs):
+        if args or kwargs:
+            # Historical reads (block_identifier, ...) bypass the cache
+            return self.inner.call(*args, **kwargs)
+        cached = self.cache.get(self.key)
+        if cached is not None:
+            value, negative = cached
+            if isinstance(value, dict) and "error" in value:
+                raise ContractLogicError(value["error"])
+            return self.restore(value) if self.restore else value
+        try:
+            value = self.inner.call()
+        except ContractLogicError as e:
+            # Revert such as "Work not found": a negative answer
+            self.cache.set(self.key, {"error": str(e)}, True)
+            raise
+        self.cache.set(self.key, value, self.is_negative(value))
+        return value
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+
+class _Functions:
+    def __init__(self, contract, cache):
+        self._contract = contract
+        self._cache = cache
+
+    def __getattr__(self, name):
+        function = getattr(self._contract.functions, name)
+        if name not in CACHED:
+            return function
+
+        def bind(*args):
+            key = cache_key(self._contract.address, name, args)
+            return _CachedCall(self._cache, key, function(*args), CACHED[name], RESTORE.get(name))
+        return bind
+
+
+class CachedContract:
+    """Contract whose immutable view calls are served through a ReadCache"""
+
+    def __init__(self, contract, cache):
+        self.contract = contract
+        self.cache = cache
+        self.address = contract.address
+        self.abi = contract.abi
+        self.events = contract.events
+        self.functions = _Functions(contract, cache)
+
+
+def read_many(contract, name, keys, fetch):
+    """
+    Answers of name(key) for each key, in order: cached ones from the cache,
+    the rest from fetch(missing_keys) (a batched read), which are then cached.
+    Unknown works come back as None.
+    """
+    if not isinstance(contract, CachedContract) or name not in CACHED:
+        return fetch(keys)
+    cache = contract.cache
+    results = {}
+    missing = []
+    for key in dict.fromkeys(keys):
+        cached = cache.get(cache_key(contract.address, name, (key,)))
+        if cached is None:
+            missing.append(key)
+        else:
+            value = cached[0]
+            if isinstance(value, dict) and "error" in value:
+                value = None
+            elif name in RESTORE:
+                value = RESTORE[name](value)
+            results[key] = value
+    if missing:
+        for key, value in zip(missing, fetch(missing)):
+            results[key] = value
+            if value is None:
+                # Same negative entry a reverted getWorkDetails call leaves
+                cache.set(cache_key(contract.address, name, (key,)), {"error": "Work not found"}, True)
+            else:
+                cache.set(cache_key(contract.address, name, (key,)), value, CACHED[name](value))
+    return [results[key] for key in keys]
+
+
+def wrap(contract, cache):
+    """Put cache in front of contract's view calls (no-op if cache is None)"""
+    if cache is None or contract is None:
+        return contract
+    return CachedContract(contract, cache)
+
+
+def open_cache():
+    """Process-wide cache per config, or None if disabled"""
+    if not config.READ_CACHE_ENABLED:
+        return None
+    shared = None
+    if config.READ_CACHE_SHARED:
+        try:
+            shared = SharedCache()
+        except sqlite3.Error as e:
+            print(f"⚠️  Shared read cache unavailable: {e}")
+    return ReadCache(shared=shared)
+
+
+class EventInvalidator:
+    """
+    Follows WorkRegistered events only to invalidate negative entries.
+    Used when the read replica (which has its own hook) is not running here.
+    """
+
+    def __init__(self, w3, contract, cache):
+        self.w3 = w3
+        self.contract = contract
+        self.cache = cache
+        self.last_block = None
+        self._stop = threading.Event()
+
+    def check_once(self):
+        head = self.w3.eth.block_number
+        if self.last_block is None:
+            self.last_block = head
+            return False
+        if head <= self.last_block:
+            return False
+        logs = self.contract.events.WorkRegistered().get_logs(
+            from_block=self.last_block + 1, to_block=head
+        )
+        self.last_block = head
+        if logs:
+            self.cache.clear_negatives()
+        return bool(logs)
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                self.check_once()
+            except Exception as e:
+                print(f"✗ Cache invalidator error: {e}")
+            self._stop.wait(config.READ_CACHE_POLL_INTERVAL)
+
+    def start(self):
+        """Run the invalidator in a daemon thread"""
+        threading.Thread(target=self.run, name="cache-invalidator", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
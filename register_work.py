@@ -1,19 +1,16 @@
-from web3 import Web3
 import json
-import hashlib
 import sys
 from getpass import getpass
 from datetime import datetime
 import uuid
 import config
-
-def calculate_file_hash(filepath):
-    """Calculate SHA-256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+import confirmation_tracker
+import nonce_manager
+import fee_oracle
+import read_cache
+import signer
+import registry_client
+from file_hash import calculate_file_hash
 
 def register_work(
     filepath,
@@ -25,7 +22,7 @@ def register_work(
     """Register a work on the blockchain"""
     
     # Connect to blockchain
-    w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
+    w3 = registry_client.get_web3()
     if not w3.is_connected():
         print("✗ Cannot connect to blockchain")
         return False
@@ -36,30 +33,28 @@ def register_work(
         return False
     
     try:
-        with open(config.ABI_FILE, "r") as f:
-            abi = json.load(f)
-        contract = w3.eth.contract(address=config.CONTRACT_ADDRESS, abi=abi)
+        # owner() never changes; with READ_CACHE_SHARED it is read once per host
+        contract = registry_client.get_contract(w3, cache=read_cache.open_cache())
         print(f"✓ Contract loaded at {config.CONTRACT_ADDRESS}")
     except Exception as e:
         print(f"✗ Failed to load contract: {e}")
         return False
 
-    # Unlock account
+    # Unlock account (the keystore is only decrypted once per process)
     try:
-        with open(config.UTC_KEYSTORE_FILE) as keyfile:
-            encrypted_key = keyfile.read()
-            if not account_password:
-                account_password = getpass("Account Password: ")
-            private_key = w3.eth.account.decrypt(encrypted_key, account_password)
+        key_signer = signer.get_signer()
+        if not key_signer.is_unlocked() and not account_password:
+            account_password = getpass("Account Password: ")
+        account = key_signer.get_account(account_password)
     except Exception as e:
         print(f"✗ Failed to decrypt account: {e}")
         return False
     
-    account = w3.eth.account.from_key(private_key)
     print(f"✓ Using account: {account.address}")
 
-    # Check account balance
-    balance = w3.eth.get_balance(account.address)
+    # Check account balance (read together with the fees of the latest block)
+    oracle = fee_oracle.get_oracle(w3)
+    balance = oracle.balance(account.address)
     balance_eth = w3.from_wei(balance, 'ether')
     print(f"✓ Account balance: {balance_eth} ETH")
     
@@ -114,38 +109,27 @@ def register_work(
         print(f"⚠️  Could not check contract owner: {e}")
 
     # Build transaction with proper gas estimation
+    nonce = None
     try:
         print("\n🔧 Building transaction...")
         
-        # Get current nonce
-        nonce = w3.eth.get_transaction_count(account.address)
-        print(f"   Nonce: {nonce}")
-        
-        # Estimate gas
-        try:
-            gas_estimate = contract.functions.registerWork(
-                work_id,
-                work_title,
-                work_type,
-                content_hash,
-                metadata
-            ).estimate_gas({'from': account.address})
-            
-            # Add 20% buffer to gas estimate
-            gas_limit = int(gas_estimate * 1.2)
-            print(f"   Gas estimate: {gas_estimate}")
-            print(f"   Gas limit (with buffer): {gas_limit}")
-        except Exception as e:
-            print(f"   Gas estimation failed: {e}")
-            print(f"   Using default gas limit: 500000")
-            gas_limit = 500000
+        # Gas limit from the argument sizes (or eth_estimateGas, see GAS_MODEL_ENABLED)
+        gas_limit = fee_oracle.register_work_gas_limit(
+            contract, account.address, work_id, work_title, work_type, content_hash, metadata
+        )
+        print(f"   Gas limit: {gas_limit}")
         
-        # Get current gas price
-        gas_price = w3.eth.gas_price
-        print(f"   Gas price: {w3.from_wei(gas_price, 'gwei')} Gwei")
+        # Fees of the latest block: EIP-1559 max fee / priority fee, or a legacy gas price
+        fees = oracle.fees()
+        max_fee = fee_oracle.max_fee_per_gas(fees)
+        if 'maxFeePerGas' in fees:
+            print(f"   Max fee: {w3.from_wei(max_fee, 'gwei')} Gwei "
+                  f"(priority {w3.from_wei(fees['maxPriorityFeePerGas'], 'gwei')} Gwei)")
+        else:
+            print(f"   Gas price: {w3.from_wei(max_fee, 'gwei')} Gwei")
         
-        # Calculate transaction cost
-        tx_cost = gas_limit * gas_price
+        # Calculate transaction cost (at most)
+        tx_cost = gas_limit * max_fee
         tx_cost_eth = w3.from_wei(tx_cost, 'ether')
         print(f"   Estimated cost: {tx_cost_eth} ETH")
         
@@ -155,6 +139,13 @@ def register_work(
             print(f"   Available: {balance_eth} ETH")
             return False
         
+        # Reserve a nonce from the shared allocator (safe alongside the web app)
+        nonces = nonce_manager.for_account(w3, account.address)
+        if nonces.needs_repair():
+            nonces.repair(account)
+        nonce = nonces.allocate()
+        print(f"   Nonce: {nonce}")
+        
         # Build transaction
         tx = contract.functions.registerWork(
             work_id,
@@ -166,13 +157,15 @@ def register_work(
             'from': account.address,
             'nonce': nonce,
             'gas': gas_limit,
-            'gasPrice': gas_price,
-            'chainId': config.CHAIN_ID
+            'chainId': config.CHAIN_ID,
+            **fees
         })
         
         print("✓ Transaction built successfully")
         
     except Exception as e:
+        if nonce is not None:
+            nonces.release(nonce)
         print(f"✗ Failed to build transaction: {e}")
         print(f"\nDebug info:")
         print(f"  work_id: {work_id}")
@@ -189,31 +182,36 @@ def register_work(
         
         print("📤 Sending transaction...")
         tx_hash = w3.eth.send_raw_transaction(signed_tx.raw_transaction)
+        nonces.mark_sent(nonce, tx_hash, tx)
         print(f"✓ Transaction sent: {tx_hash.hex()}")
         
     except ValueError as e:
+        nonces.release(nonce)
         print(f"✗ Transaction rejected: {e}")
         return False
     except Exception as e:
+        nonces.release(nonce)
         print(f"✗ Failed to send transaction: {e}")
         return False
 
     # Wait for confirmation
     try:
-        print("\n⏳ Waiting for confirmation...")
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+        print(f"\n⏳ Waiting for confirmation ({config.CONFIRM_DEPTH} block(s))...")
+        receipt = confirmation_tracker.wait_for_receipt(w3, tx_hash, timeout=120)
+        
+        oracle.record_receipt(receipt)
         
-        print(f"\n📦 Transaction mined in block {receipt.blockNumber}")
-        print(f"   Status: {receipt.status}")
-        print(f"   Gas used: {receipt.gasUsed}")
+        print(f"\n📦 Transaction mined in block {receipt['blockNumber']}")
+        print(f"   Status: {receipt['status']}")
+        print(f"   Gas used: {receipt['gasUsed']}")
         
-        if receipt.status == 1:
+        if receipt['status'] == 1:
             print(f"\n✅ Work registered successfully!")
             print(f"   Work ID: {work_id}")
             print(f"   Title: {work_title}")
             print(f"   Type: {work_type}")
             print(f"   Hash: {content_hash}")
-            print(f"   Block: {receipt.blockNumber}")
+            print(f"   Block: {receipt['blockNumber']}")
             print(f"   Creator: {account.address}")
             
             # Save registration info
@@ -224,8 +222,8 @@ def register_work(
                 "content_hash": content_hash,
                 "creator": account.address,
                 "tx_hash": tx_hash.hex(),
-                "block_number": receipt.blockNumber,
-                "gas_used": receipt.gasUsed,
+                "block_number": receipt['blockNumber'],
+                "gas_used": receipt['gasUsed'],
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -236,12 +234,12 @@ def register_work(
             
             return True
         else:
-            print(f"\n✗ Transaction failed (status: {receipt.status})")
+            print(f"\n✗ Transaction failed (status: {receipt['status']})")
             
             # Try to get revert reason
             try:
                 tx_receipt = w3.eth.get_transaction(tx_hash)
-                w3.eth.call(tx_receipt, receipt.blockNumber)
+                w3.eth.call(tx_receipt, receipt['blockNumber'])
             except Exception as e:
                 print(f"   Revert reason: {e}")
             
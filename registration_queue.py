@@ -0,0 +1,384 @@
+"""Pending registration tracking for the web app.
+
+/register broadcasts the registerWork transaction, records it here as
+'pending' and returns immediately. A background ReceiptConfirmer watches all
+pending transactions with one confirmation_tracker.ConfirmationTracker,
+which matches each new block against them, and marks them 'confirmed' or
+'failed' once CONFIRM_DEPTH blocks deep. A reorg that drops a confirmed
+transaction's block puts its registrations back to 'pending'.
+
+A transaction not mined within CONFIRM_TIMEOUT is still valid: it may be
+mined late or re-sent with higher fees by nonce_manager.repair. Its
+registrations become 'expired' and stay watched (and keep their stored
+upload); they only fail once another transaction has taken their nonce.
+
+While the signer is unlocked, the confirmer also runs nonce_manager.repair
+for its account after each block, so /register never does.
+
+With BATCH_REGISTER enabled, /register records the work as 'queued' instead
+and batch_submitter.py packs queued works into registerWorks transactions;
+each work then moves to 'pending' with its batch's tx_hash. ANCHOR_REGISTER
+queues the same way, but merkle_anchor.py commits only a Merkle root of the
+queued works (anchorRoot) and keeps their inclusion proofs.
+
+Run the confirmer standalone (recommended for multi-worker deployments):
+    python registration_queue.py [--repair]
+"""
+from web3.exceptions import TransactionNotFound
+from getpass import getpass
+import sqlite3
+import sys
+import threading
+import time
+import config
+import confirmation_tracker
+import fee_oracle
+import metrics
+import nonce_manager
+import registry_client
+import registry_v2
+import signer
+
+QUEUED = "queued"
+PENDING = "pending"
+EXPIRED = "expired"  # not mined within CONFIRM_TIMEOUT, still watched
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    work_id      TEXT PRIMARY KEY,
+    title        TEXT NOT NULL,
+    type         TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    metadata     TEXT NOT NULL,
+    creator      TEXT NOT NULL,
+    tx_hash      TEXT,
+    status       TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    updated_at   REAL NOT NULL,
+    block_number INTEGER,
+    gas_used     INTEGER,
+    error        TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_registrations_status ON registrations (status, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_registrations_hash ON registrations (content_hash);
+"""
+
+COLUMNS = (
+    "work_id, title, type, content_hash, metadata, creator, tx_hash, status, "
+    "submitted_at, updated_at, block_number, gas_used, error"
+)
+
+
+class RegistrationQueue:
+    """SQLite store of submitted registrations and their status"""
+
+    def __init__(self, path=None):
+        self.path = path or config.QUEUE_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add_pending(self, work_id, title, work_type, content_hash, metadata, creator, tx_hash):
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO registrations ({COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, NULL, NULL)",
+                (work_id, title, work_type, content_hash, metadata, creator, tx_hash,
+                 PENDING, now, now),
+            )
+
+    def add_queued(self, work_id, title, work_type, content_hash, metadata, creator):
+        """Record a work to be sent in the next registerWorks batch"""
+        now = time.time()
+        with self._conn() as conn:
+            conn.execute(
+                f"INSERT INTO registrations ({COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, ?, ?, ?, NULL, NULL, NULL)",
+                (work_id, title, work_type, content_hash, metadata, creator,
+                 QUEUED, now, now),
+            )
+
+    def queued(self, limit=1000):
+        """Oldest queued works first"""
+        rows = self._conn().execute(
+            f"SELECT {COLUMNS} FROM registrations WHERE status = ? "
+            "ORDER BY submitted_at LIMIT ?",
+            (QUEUED, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def mark_submitted(self, work_ids, tx_hash):
+        """Move queued works to pending under the batch transaction"""
+        with self._conn() as conn:
+            conn.executemany(
+                "UPDATE registrations SET status = ?, tx_hash = ?, updated_at = ? "
+                "WHERE work_id = ? AND status = ?",
+                [(PENDING, tx_hash, time.time(), work_id, QUEUED) for work_id in work_ids],
+            )
+
+    def get(self, work_id):
+        """Registration row as a dict, or None"""
+        row = self._conn().execute(
+            f"SELECT {COLUMNS} FROM registrations WHERE work_id = ?", (work_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def find_pending_by_hash(self, content_hash):
+        """Work ID of a queued, pending or expired registration for content_hash, or empty string"""
+        row = self._conn().execute(
+            "SELECT work_id FROM registrations WHERE content_hash = ? AND status IN (?, ?, ?)",
+            (content_hash, QUEUED, PENDING, EXPIRED),
+        ).fetchone()
+        return row["work_id"] if row else ""
+
+    def failed_work_ids(self):
+        """Work IDs of every failed registration"""
+        rows = self._conn().execute(
+            "SELECT work_id FROM registrations WHERE status = ?", (FAILED,)
+        ).fetchall()
+        return [row["work_id"] for row in rows]
+
+    def pending(self, limit=1000):
+        """Oldest pending and expired registrations (sent, not resolved) first"""
+        rows = self._conn().execute(
+            f"SELECT {COLUMNS} FROM registrations WHERE status IN (?, ?) "
+            "ORDER BY submitted_at LIMIT ?",
+            (PENDING, EXPIRED, limit),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def replace_tx_hash(self, old_tx_hash, new_tx_hash):
+        """Follow a pending or expired registration to its replacement transaction"""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE registrations SET tx_hash = ?, updated_at = ? "
+                "WHERE tx_hash = ? AND status IN (?, ?)",
+                (new_tx_hash, time.time(), old_tx_hash, PENDING, EXPIRED),
+            )
+
+    def mark_confirmed(self, work_id, block_number, gas_used):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE registrations SET status = ?, block_number = ?, gas_used = ?, "
+                "error = NULL, updated_at = ? WHERE work_id = ?",
+                (CONFIRMED, block_number, gas_used, time.time(), work_id),
+            )
+
+    def mark_expired(self, work_id, error):
+        """Flag a registration whose transaction is overdue but may still be mined"""
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE registrations SET status = ?, error = ?, updated_at = ? "
+                "WHERE work_id = ? AND status = ?",
+                (EXPIRED, error, time.time(), work_id, PENDING),
+            )
+
+    def mark_failed(self, work_id, error, block_number=None, gas_used=None):
+        with self._conn() as conn:
+            conn.execute(
+                "UPDATE registrations SET status = ?, error = ?, block_number = ?, "
+                "gas_used = ?, updated_at = ? WHERE work_id = ?",
+                (FAILED, error, block_number, gas_used, time.time(), work_id),
+            )
+
+    def reopen(self, tx_hashes):
+        """Put registrations resolved by these transactions back to pending (reorg); returns how many"""
+        with self._conn() as conn:
+            return sum(conn.execute(
+                "UPDATE registrations SET status = ?, block_number = NULL, gas_used = NULL, "
+                "error = NULL, updated_at = ? WHERE tx_hash = ? AND status IN (?, ?)",
+                (PENDING, time.time(), tx_hash, CONFIRMED, FAILED),
+            ).rowcount for tx_hash in tx_hashes)
+
+
+class ReceiptConfirmer:
+    """Background worker that resolves pending registrations as blocks arrive"""
+
+    def __init__(self, w3, queue, key_signer=None):
+        self.w3 = w3
+        self.queue = queue
+        # Repairs the signer's nonces while it is unlocked (None: no repair)
+        self.signer = key_signer
+        self.tracker = confirmation_tracker.ConfirmationTracker(w3, on_reorg=self._reopen)
+        self._senders = {}  # tx hash of an expired registration -> (sender, nonce)
+        self._stop = threading.Event()
+
+    def _reopen(self, tx_hashes):
+        reopened = self.queue.reopen(tx_hashes)
+        if reopened:
+            print(f"⚠️  Reorg: {reopened} registrations back to pending")
+
+    def _remember_sender(self, tx_hash):
+        """Note the sender and nonce of a transaction still known to the node; False if it isn't"""
+        try:
+            tx = self.w3.eth.get_transaction(tx_hash)
+        except TransactionNotFound:
+            return False
+        self._senders[tx_hash] = (tx["from"], tx["nonce"])
+        return True
+
+    def _superseded(self, tx_hashes):
+        """
+        {tx_hash: nonce} of the unmined transactions whose nonce another mined
+        transaction took, so they can never be mined
+        """
+        self._senders = {tx_hash: self._senders[tx_hash] for tx_hash in tx_hashes
+                         if tx_hash in self._senders}
+        mined_counts = {}
+        used = {}
+        for tx_hash in tx_hashes:
+            if tx_hash not in self._senders and not self._remember_sender(tx_hash):
+                # Dropped before its nonce was seen; repair() may still re-send it
+                continue
+            sender, nonce = self._senders[tx_hash]
+            if sender not in mined_counts:
+                mined_counts[sender] = self.w3.eth.get_transaction_count(sender, "latest")
+            if mined_counts[sender] > nonce:
+                used[tx_hash] = nonce
+        # Mined itself, only not CONFIRM_DEPTH deep yet
+        for tx_hash, receipt in confirmation_tracker.fetch_receipts(self.w3, list(used)).items():
+            if receipt is not None:
+                del used[tx_hash]
+        return used
+
+    def confirm_once(self):
+        """Resolve the pending registrations confirmed so far; returns number resolved"""
+        pending = self.queue.pending()
+        tx_hashes = list({reg["tx_hash"] for reg in pending})
+        self.tracker.retain(tx_hashes)
+        if not self.tracker.following:
+            self.tracker.update()
+        receipts = self.tracker.receipts(tx_hashes)
+        batch_sizes = {}
+        for reg in pending:
+            batch_sizes[reg["tx_hash"]] = batch_sizes.get(reg["tx_hash"], 0) + 1
+        resolved = 0
+        now = time.time()
+        expired = [reg["tx_hash"] for reg in pending
+                   if reg["status"] == EXPIRED and reg["tx_hash"] not in receipts]
+        superseded = self._superseded(list(dict.fromkeys(expired))) if expired else {}
+        oracle = fee_oracle.get_oracle(self.w3)
+        for receipt in receipts.values():
+            if receipt is not None:
+                metrics.TX_GAS_USED.observe(
+                    receipt["gasUsed"], kind="anchor" if receipt["anchored"] else "register"
+                )
+                oracle.record_receipt(receipt)
+        for reg in pending:
+            receipt = receipts.get(reg["tx_hash"])
+            if receipt is None:
+                if reg["tx_hash"] in superseded:
+                    self.queue.mark_failed(
+                        reg["work_id"],
+                        f"Nonce {superseded[reg['tx_hash']]} was used by another transaction",
+                    )
+                    metrics.REGISTRATIONS.inc(status=FAILED)
+                    resolved += 1
+                elif reg["status"] == PENDING and now - reg["submitted_at"] > config.CONFIRM_TIMEOUT:
+                    # Still valid: keep watching it (and keep its upload), with its
+                    # nonce noted while the node still has it
+                    if reg["tx_hash"] not in self._senders:
+                        self._remember_sender(reg["tx_hash"])
+                    self.queue.mark_expired(
+                        reg["work_id"], f"Not mined within {config.CONFIRM_TIMEOUT:.0f}s, still waiting"
+                    )
+                    metrics.REGISTRATIONS.inc(status=EXPIRED)
+                continue
+            # Gas of a batch transaction is shared by its works
+            gas_used = receipt["gasUsed"] // batch_sizes[reg["tx_hash"]]
+            # An anchorRoot transaction commits every work of its batch
+            registered = (receipt["anchored"] or
+                          registry_v2.work_id_topic(reg["work_id"]) in receipt["workIdTopics"])
+            status = CONFIRMED if receipt["status"] and registered else FAILED
+            metrics.REGISTRATIONS.inc(status=status)
+            metrics.CONFIRMATION_SECONDS.observe(now - reg["submitted_at"], status=status)
+            if status == CONFIRMED:
+                metrics.WORK_GAS_USED.observe(gas_used, kind="anchor" if receipt["anchored"] else "register")
+                self.queue.mark_confirmed(reg["work_id"], receipt["blockNumber"], gas_used)
+            elif receipt["status"]:
+                # registerWorks(skipDuplicates=true) left this one out
+                self.queue.mark_failed(
+                    reg["work_id"], "Skipped: work ID or content already registered",
+                    receipt["blockNumber"], gas_used,
+                )
+            else:
+                self.queue.mark_failed(
+                    reg["work_id"], f"Transaction reverted. Gas used: {receipt['gasUsed']}",
+                    receipt["blockNumber"], gas_used,
+                )
+            resolved += 1
+        return resolved
+
+    def repair_nonces(self):
+        """Fill nonce gaps and replace stuck transactions of the unlocked signer; returns txs sent"""
+        if self.signer is None:
+            return 0
+        try:
+            account = self.signer.get_account()
+        except signer.SignerLocked:
+            return 0
+        nonces = nonce_manager.for_account(self.w3, account.address)
+        if not nonces.needs_repair():
+            return 0
+        return nonces.repair(account, on_replaced=self.queue.replace_tx_hash)
+
+    def run(self):
+        """Resolve registrations after each new block until stop() is called"""
+        self.tracker.start()
+        while not self._stop.is_set():
+            seen = self.tracker.updates
+            try:
+                self.confirm_once()
+                self.repair_nonces()
+            except Exception as e:
+                print(f"✗ Confirmer error: {e}")
+            # Timeouts are still checked every CONFIRM_POLL_INTERVAL without blocks
+            self.tracker.wait_for_block(seen, config.CONFIRM_POLL_INTERVAL)
+        self.tracker.stop()
+
+    def start(self):
+        """Run the confirmer in a daemon thread"""
+        threading.Thread(target=self.run, name="receipt-confirmer", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.tracker.stop()
+
+
+if __name__ == "__main__":
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        sys.exit(1)
+    print("✓ Connected to blockchain")
+
+    # With --repair the confirmer also unblocks the account's nonces, which needs its key
+    key_signer = None
+    if "--repair" in sys.argv[1:]:
+        key_signer = signer.get_signer()
+        try:
+            account = key_signer.unlock(getpass("Account Password: "), ttl=float("inf"))
+        except Exception as e:
+            print(f"✗ Failed to decrypt account: {e}")
+            sys.exit(1)
+        print(f"✓ Repairing nonces of {account.address}")
+
+    queue = RegistrationQueue()
+    print(f"✓ Registration queue at {queue.path}")
+    print("⏳ Confirming pending registrations... (Ctrl+C to stop)")
+    try:
+        ReceiptConfirmer(w3, queue, key_signer).run()
+    except KeyboardInterrupt:
+        print("\n✓ Confirmer stopped")
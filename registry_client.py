@@ -0,0 +1,144 @@
+"""Shared blockchain connection and contract handle.
+
+Every entry point (web app, CLIs, background workers) gets its Web3 and
+contract from here instead of building its own:
+
+- One Web3 per process. The provider follows RPC_URL: http(s):// uses a
+  keep-alive requests session whose pool holds RPC_POOL_SIZE connections
+  (one per web worker thread), a path ending in .ipc talks to a co-located
+  geth over its IPC socket, and ws(s):// uses web3's synchronous WebSocket
+  provider where the installed web3 still has one.
+- The ABI is parsed once and the contract object built once per process,
+  already wrapped by registry_v2 (getWorkDetails results come back as
+  WorkRegistration records) and optionally by a read_cache.ReadCache.
+- With METRICS_ENABLED every provider counts and times its requests
+  (metrics.instrument_provider), labelled with the contract function called.
+"""
+from eth_utils import function_abi_to_4byte_selector
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+import json
+import os
+import subprocess
+import threading
+import requests
+import config
+import metrics
+import read_cache
+import registry_v2
+
+WorkRegistration = registry_v2.WorkRegistration
+
+_lock = threading.Lock()
+_web3 = {}       # pid -> Web3 (a forked worker builds its own)
+_contracts = {}  # (pid, id(w3), address, id(cache)) -> contract
+
+
+def make_provider(url=None):
+    """Provider for url (default RPC_URL): HTTP with a pooled session, IPC or WebSocket"""
+    url = url or config.RPC_URL
+    if url.endswith(".ipc"):
+        provider = Web3.IPCProvider(url, timeout=config.RPC_TIMEOUT)
+    elif url.startswith(("ws://", "wss://")):
+        provider_class = getattr(Web3, "LegacyWebSocketProvider", None) or getattr(Web3, "WebsocketProvider", None)
+        if provider_class is None:
+            raise ValueError("This web3 version has no synchronous WebSocket provider; use HTTP or IPC")
+        provider = provider_class(url)
+    else:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config.RPC_POOL_SIZE)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        provider = Web3.HTTPProvider(url, session=session, request_kwargs={"timeout": config.RPC_TIMEOUT})
+    if config.METRICS_ENABLED:
+        metrics.instrument_provider(provider, function_names)
+    return provider
+
+
+def get_web3():
+    """This process's Web3 connected to RPC_URL"""
+    pid = os.getpid()
+    w3 = _web3.get(pid)
+    if w3 is None:
+        with _lock:
+            w3 = _web3.get(pid)
+            if w3 is None:
+                w3 = _web3[pid] = Web3(make_provider())
+    return w3
+
+
+@lru_cache(maxsize=None)
+def load_abi(path=None):
+    """Parsed ABI of the configured contract version"""
+    with open(path or config.ABI_FILE, "r") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def function_names():
+    """{"0x<selector>": function name} of the configured ABI (empty before compiling)"""
+    try:
+        abi = load_abi()
+    except (OSError, ValueError):
+        return {}
+    return {
+        "0x" + function_abi_to_4byte_selector(entry).hex(): entry["name"]
+        for entry in abi if entry.get("type") == "function"
+    }
+
+
+def missing_functions(abi, bytecode):
+    """
+    Names of the ABI's functions that bytecode does not dispatch. solc's
+    dispatcher pushes each selector (PUSH4, shorter with leading zero bytes)
+    to compare it with the calldata, so a selector that is never pushed means
+    the .bin was compiled from an older source than the .abi.
+    """
+    code = bytecode.lower().removeprefix("0x")
+    missing = []
+    for entry in abi:
+        if entry.get("type") != "function":
+            continue
+        selector = function_abi_to_4byte_selector(entry).lstrip(b"\0")
+        if f"{0x5f + len(selector):02x}{selector.hex()}" not in code:
+            missing.append(entry["name"])
+    return missing
+
+
+def compile_contracts(*sources):
+    """
+    {contract name: (abi, bytecode)} of the Solidity sources, from one run of
+    SOLC_PATH with the same options as README step 6
+    """
+    output = subprocess.run(
+        [config.SOLC_PATH, "--evm-version", "london", "--combined-json", "abi,bin", *sources],
+        capture_output=True, check=True, text=True,
+    ).stdout
+    contracts = {}
+    for key, compiled in json.loads(output)["contracts"].items():
+        abi = compiled["abi"]
+        # solc before 0.8.10 nests the ABI as a JSON string
+        contracts[key.rsplit(":", 1)[-1]] = (json.loads(abi) if isinstance(abi, str) else abi, compiled["bin"])
+    return contracts
+
+
+def get_contract(w3=None, address=None, cache=None):
+    """
+    Process-wide contract object for address (default CONTRACT_ADDRESS), or
+    None if no contract is deployed. cache puts a ReadCache in front of the
+    immutable view calls.
+    """
+    address = address or config.CONTRACT_ADDRESS
+    if not address:
+        return None
+    w3 = w3 or get_web3()
+    key = (os.getpid(), id(w3), address, id(cache))
+    contract = _contracts.get(key)
+    if contract is None:
+        with _lock:
+            contract = _contracts.get(key)
+            if contract is None:
+                raw = w3.eth.contract(address=address, abi=load_abi())
+                contract = _contracts[key] = read_cache.wrap(registry_v2.wrap(raw), cache)
+    return contract
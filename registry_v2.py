@@ -0,0 +1,188 @@
+"""Encoding for the v2 registry layout (copyright_registry_v2.sol).
+
+v2 keys works by bytes16 work IDs ("WORK-1A2B3C4D" as zero-padded ASCII)
+and bytes32 SHA-256 content hashes instead of strings. wrap() adapts a v2
+contract to the v1 calling convention used throughout this project: callers
+keep passing hex hash strings and "WORK-..." IDs and keep getting the v1
+getWorkDetails tuple (workId, title, type, contentHash, creator, timestamp,
+metadata) back, as a WorkRegistration record. With CONTRACT_VERSION=1,
+wrap() only turns those results into records.
+"""
+from typing import NamedTuple
+from web3 import Web3
+import config
+
+WORK_ID_BYTES = 16
+
+
+def encode_work_id(work_id):
+    """'WORK-1A2B3C4D' -> bytes16 (ASCII, zero-padded on the right)"""
+    raw = work_id.encode("ascii")
+    if not raw or len(raw) > WORK_ID_BYTES:
+        raise ValueError(f"Work ID must be 1-{WORK_ID_BYTES} ASCII characters: {work_id!r}")
+    return raw.ljust(WORK_ID_BYTES, b"\0")
+
+
+def decode_work_id(raw):
+    """bytes16 -> 'WORK-1A2B3C4D' ('' for the zero ID)"""
+    return bytes(raw).rstrip(b"\0").decode("ascii")
+
+
+def encode_content_hash(content_hash):
+    """Hex SHA-256 (with or without 0x) -> bytes32"""
+    h = content_hash.strip().lower()
+    if h.startswith("0x"):
+        h = h[2:]
+    raw = bytes.fromhex(h)
+    if len(raw) != 32:
+        raise ValueError(f"Content hash must be 32 bytes: {content_hash!r}")
+    return raw
+
+
+def decode_content_hash(raw):
+    """bytes32 -> lowercase hex without 0x, as stored by v1 ('' for zero)"""
+    raw = bytes(raw)
+    return raw.hex() if any(raw) else ""
+
+
+class WorkRegistration(NamedTuple):
+    """getWorkDetails result in v1 types (still indexable as details[0..6])"""
+    work_id: str
+    title: str
+    type: str
+    content_hash: str
+    creator: str
+    timestamp: int
+    metadata: str
+
+
+def to_record(details):
+    """v1 getWorkDetails tuple -> WorkRegistration"""
+    if isinstance(details, WorkRegistration):
+        return details
+    return WorkRegistration(*details)
+
+
+def to_v1_details(details):
+    """v2 WorkRegistration tuple -> v1 getWorkDetails record"""
+    return WorkRegistration(
+        decode_work_id(details[0]), details[1], details[2],
+        decode_content_hash(details[3]), details[4], details[5], details[6],
+    )
+
+
+def work_id_topic(work_id):
+    """First WorkRegistered topic for work_id, as 0x-hex"""
+    if config.CONTRACT_VERSION == 2:
+        return Web3.to_hex(encode_work_id(work_id).ljust(32, b"\0"))
+    # v1 indexes the string, so the topic is its keccak
+    return Web3.to_hex(Web3.keccak(text=work_id))
+
+
+# Topic 0 of RootAnchored (same signature in both contract versions)
+ROOT_ANCHORED_TOPIC = Web3.to_hex(Web3.keccak(text="RootAnchored(bytes32,address,uint256,uint256)"))
+
+
+def _each(encode):
+    return lambda values: [encode(value) for value in values]
+
+
+def _same(value):
+    return value
+
+
+# Per function: (argument encoders, result decoder)
+_SIGNATURES = {
+    "registerWork": ((encode_work_id, _same, _same, encode_content_hash, _same), None),
+    "registerWorks": ((_each(encode_work_id), _same, _same, _each(encode_content_hash),
+                       _same, _same), None),
+    "verifyWork": ((encode_work_id, encode_content_hash), None),
+    "getWorkDetails": ((encode_work_id,), to_v1_details),
+    "getWorksDetails": ((_each(encode_work_id),), _each(to_v1_details)),
+    "checkContentExists": ((encode_content_hash,), decode_work_id),
+    "checkContentsExist": ((_each(encode_content_hash),), _each(decode_work_id)),
+    "getCreatorWorks": ((_same,), _each(decode_work_id)),
+    "getCreatorWorksPage": ((_same, _same, _same), _each(to_v1_details)),
+}
+
+# v1 contracts take the arguments as they are; only results become records
+_V1_SIGNATURES = {
+    "getWorkDetails": ((_same,), to_record),
+    "getWorksDetails": ((_same,), _each(to_record)),
+    "getCreatorWorksPage": ((_same, _same, _same), _each(to_record)),
+}
+
+
+def signature(name):
+    """(argument encoders, result decoder) of name for CONTRACT_VERSION, or None"""
+    return (_SIGNATURES if config.CONTRACT_VERSION == 2 else _V1_SIGNATURES).get(name)
+
+
+class _Call:
+    """A bound v2 contract function that decodes call() results to v1 types"""
+
+    def __init__(self, function, decode):
+        self.function = function
+        self.decode = decode or _same
+
+    def call(self, *args, **kwargs):
+        return self.decode(self.function.call(*args, **kwargs))
+
+    def __getattr__(self, name):
+        # estimate_gas, build_transaction, transact, ...
+        return getattr(self.function, name)
+
+
+class _Functions:
+    def __init__(self, contract, signatures):
+        self._contract = contract
+        self._signatures = signatures
+
+    def __getattr__(self, name):
+        function = getattr(self._contract.functions, name)
+        if name not in self._signatures:
+            return function
+        encoders, decode = self._signatures[name]
+
+        def bind(*args):
+            encoded = [encode(arg) for encode, arg in zip(encoders, args)]
+            return _Call(function(*encoded), decode)
+        return bind
+
+
+class RecordInterface:
+    """v1 contract whose details results come back as WorkRegistration records"""
+
+    signatures = _V1_SIGNATURES
+
+    def __init__(self, contract):
+        self.contract = contract
+        self.address = contract.address
+        self.abi = contract.abi
+        self.events = contract.events
+        self.functions = _Functions(contract, self.signatures)
+
+
+class V1Interface(RecordInterface):
+    """CopyrightRegistryV2 contract behind the v1 argument and result types"""
+
+    signatures = _SIGNATURES
+
+
+def wrap(contract):
+    """Adapt contract to the v1 calling convention and WorkRegistration results"""
+    if contract is None or isinstance(contract, RecordInterface):
+        return contract
+    if config.CONTRACT_VERSION == 2:
+        return V1Interface(contract)
+    return RecordInterface(contract)
+
+
+def event_row(log):
+    """v2 WorkRegistered log -> v1 details tuple (the event carries every field)"""
+    args = log["args"]
+    return (
+        decode_work_id(args["workId"]), args["workTitle"], args["workType"],
+        decode_content_hash(args["contentHash"]), args["creator"], args["timestamp"],
+        args["metadata"],
+    )
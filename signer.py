@@ -0,0 +1,114 @@
+"""Unlock-once signer for the keystore account.
+
+Decrypting a Geth keystore runs scrypt, which costs hundreds of milliseconds
+of CPU and a large chunk of memory. Signer decrypts it once, keeps the key in
+memory for SIGNER_TTL seconds and checks later passwords against a salted
+HMAC of the unlock password, so each signature costs microseconds.
+
+Used by app.py, register_work.py and deploy_copyright_registry.py through
+get_signer().
+"""
+from eth_account import Account
+import hashlib
+import hmac
+import os
+import threading
+import time
+import config
+
+_default = None
+_default_lock = threading.Lock()
+
+
+class SignerLocked(Exception):
+    """The signer is locked and no password was given"""
+
+
+class Signer:
+    """Holds a decrypted keystore account for a limited time"""
+
+    def __init__(self, keystore_file=None, ttl=None):
+        self.keystore_file = keystore_file or config.UTC_KEYSTORE_FILE
+        self.ttl = config.SIGNER_TTL if ttl is None else ttl
+        self._lock = threading.Lock()
+        self._account = None
+        self._expires_at = 0
+        self._salt = None
+        self._verifier = None
+
+    def _digest(self, password):
+        return hmac.new(self._salt, password.encode(), hashlib.sha256).digest()
+
+    def unlock(self, password, ttl=None):
+        """Decrypt the keystore (scrypt, slow) and keep the key for ttl seconds"""
+        with open(self.keystore_file) as keyfile:
+            encrypted_key = keyfile.read()
+        private_key = Account.decrypt(encrypted_key, password)
+        with self._lock:
+            self._account = Account.from_key(private_key)
+            self._salt = os.urandom(16)
+            self._verifier = self._digest(password)
+            self._expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        return self._account
+
+    def lock(self):
+        """Forget the decrypted key"""
+        with self._lock:
+            self._account = None
+            self._salt = None
+            self._verifier = None
+            self._expires_at = 0
+
+    def _current(self):
+        """Unlocked account or None; caller holds self._lock"""
+        if self._account and time.time() >= self._expires_at:
+            self._account = None
+            self._salt = None
+            self._verifier = None
+        return self._account
+
+    def is_unlocked(self):
+        with self._lock:
+            return self._current() is not None
+
+    def expires_in(self):
+        """Seconds until the key is forgotten (0 when locked)"""
+        with self._lock:
+            return max(self._expires_at - time.time(), 0) if self._current() else 0
+
+    def get_account(self, password=None):
+        """
+        Return the unlocked account. While unlocked, a given password is
+        checked against the unlock password without running scrypt; when
+        locked, the password is used to unlock.
+        """
+        with self._lock:
+            account = self._current()
+            if account:
+                if password is not None and not hmac.compare_digest(
+                    self._digest(password), self._verifier
+                ):
+                    raise ValueError("MAC mismatch")  # same error Account.decrypt raises
+                return account
+        if password is None:
+            raise SignerLocked("Signer is locked; password required")
+        if self.ttl <= 0:
+            # Caching disabled: decrypt for this use only
+            with open(self.keystore_file) as keyfile:
+                return Account.from_key(Account.decrypt(keyfile.read(), password))
+        return self.unlock(password)
+
+    @property
+    def address(self):
+        with self._lock:
+            account = self._current()
+            return account.address if account else None
+
+
+def get_signer():
+    """Process-wide Signer for config.UTC_KEYSTORE_FILE"""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Signer()
+        return _default
@@ -0,0 +1,413 @@
+"""Near-duplicate detection for image and audio works.
+
+checkContentExists only finds byte-identical files. A resized or re-encoded
+copy has a different SHA-256, so registrations also store a perceptual
+fingerprint of the upload:
+
+- Images: a 64-bit pHash (DCT of a 32x32 grayscale thumbnail) and a 64-bit
+  dHash (gradient of a 9x8 thumbnail), compared by Hamming distance. pHashes
+  live in an in-memory BK-tree, so a lookup within SIMILAR_IMAGE_DISTANCE
+  bits visits a small part of the index instead of every work; dHash
+  confirms the candidates.
+- Audio: a Chromaprint fingerprint (chroma features, one 32-bit
+  sub-fingerprint per ~0.12 s) from the fpcalc tool. Sub-fingerprints go in
+  an inverted index; works sharing sub-fingerprints with the query vote for
+  a time offset, and the best offsets are compared by bit error rate.
+
+Image hashing needs Pillow and audio needs fpcalc on PATH (FPCALC_PATH);
+without them those files are simply not fingerprinted.
+
+Fingerprint works stored before this index existed with:
+    python similarity.py backfill
+"""
+from math import cos, pi
+from collections import Counter
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import config
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+AUDIO_EXTENSIONS = {"mp3"}
+
+# Overlapping sub-fingerprints needed before an audio match counts
+MIN_AUDIO_OVERLAP = 20
+# Audio covered by one Chromaprint sub-fingerprint
+SUBPRINT_SECONDS = 0.1238
+# SQLite host parameter limit per IN (...) query
+QUERY_CHUNK = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS image_fingerprints (
+    work_id      TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    phash        TEXT NOT NULL,
+    dhash        TEXT NOT NULL,
+    added_at     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audio_fingerprints (
+    work_id      TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    duration     REAL NOT NULL,
+    subprints    TEXT NOT NULL,
+    added_at     REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS audio_postings (
+    subprint INTEGER NOT NULL,
+    work_id  TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audio_postings ON audio_postings (subprint);
+"""
+
+_PHASH_SIZE = 32
+_PHASH_LOW = 8
+# cos(pi * (2n + 1) * k / 2N) for the 8 lowest DCT frequencies
+_DCT = [[cos(pi * (2 * n + 1) * k / (2 * _PHASH_SIZE)) for n in range(_PHASH_SIZE)]
+        for k in range(_PHASH_LOW)]
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+def _to_bits(values):
+    bits = 0
+    for value in values:
+        bits = (bits << 1) | bool(value)
+    return bits
+
+
+def image_hashes(source):
+    """(pHash, dHash) of an image path or file object, as 64-bit ints"""
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+    with Image.open(source) as img:
+        # Pillow itself only refuses images over twice MAX_IMAGE_PIXELS
+        if Image.MAX_IMAGE_PIXELS and img.width * img.height > Image.MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(f"{img.width}x{img.height} image is too large to fingerprint")
+        img.seek(0)
+        gray = img.convert("L")
+
+    pixels = list(gray.resize((_PHASH_SIZE, _PHASH_SIZE), Image.LANCZOS).tobytes())
+    rows = [pixels[i:i + _PHASH_SIZE] for i in range(0, len(pixels), _PHASH_SIZE)]
+    # Separable 2-D DCT-II, low frequencies only
+    row_dct = [[sum(c * p for c, p in zip(basis, row)) for basis in _DCT] for row in rows]
+    low = [
+        sum(basis[y] * row_dct[y][u] for y in range(_PHASH_SIZE))
+        for basis in _DCT for u in range(_PHASH_LOW)
+    ]
+    median = sorted(low)[len(low) // 2]
+    phash = _to_bits(value > median for value in low)
+
+    small = list(gray.resize((9, 8), Image.LANCZOS).tobytes())
+    dhash = _to_bits(small[y * 9 + x + 1] > small[y * 9 + x] for y in range(8) for x in range(8))
+    return phash, dhash
+
+
+def audio_fingerprint(path):
+    """(duration, sub-fingerprints) of an audio file from Chromaprint's fpcalc"""
+    output = subprocess.run(
+        [config.FPCALC_PATH, "-raw", "-json", path],
+        capture_output=True, check=True, timeout=120,
+    ).stdout
+    result = json.loads(output)
+    return float(result["duration"]), [value & 0xFFFFFFFF for value in result["fingerprint"]]
+
+
+def fingerprint_file(source, filename):
+    """
+    Fingerprint dict of an upload (path or file object), or None if the
+    file type isn't fingerprinted or the decoder is unavailable / fails
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    try:
+        if extension in IMAGE_EXTENSIONS and Image is not None:
+            if not isinstance(source, str):
+                source.seek(0)
+            phash, dhash = image_hashes(source)
+            return {"kind": "image", "phash": phash, "dhash": dhash}
+        if extension in AUDIO_EXTENSIONS and shutil.which(config.FPCALC_PATH):
+            if isinstance(source, str):
+                duration, subprints = audio_fingerprint(source)
+            else:
+                # fpcalc reads from a path
+                source.seek(0)
+                with tempfile.NamedTemporaryFile(suffix="." + extension) as f:
+                    shutil.copyfileobj(source, f)
+                    f.flush()
+                    duration, subprints = audio_fingerprint(f.name)
+            if len(subprints) >= MIN_AUDIO_OVERLAP:
+                return {"kind": "audio", "duration": duration, "subprints": subprints}
+    except Exception as e:
+        # Uploads are untrusted: decoders fail with DecompressionBombError,
+        # SyntaxError, struct.error, ... on crafted or truncated files
+        print(f"⚠️  Could not fingerprint {filename}: {e}")
+    return None
+
+
+def bit_error_rate(a, b, offset):
+    """Share of differing bits between a[i] and b[i + offset] where both exist, and the overlap"""
+    start = max(0, -offset)
+    end = min(len(a), len(b) - offset)
+    if end - start <= 0:
+        return 1.0, 0
+    errors = sum((a[i] ^ b[i + offset]).bit_count() for i in range(start, end))
+    return errors / (32 * (end - start)), end - start
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes under Hamming distance"""
+
+    def __init__(self):
+        self.root = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, key, item):
+        self.size += 1
+        if self.root is None:
+            self.root = [key, [item], {}]
+            return
+        node = self.root
+        while True:
+            distance = hamming(key, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [key, [item], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """[(distance, item)] of items within radius of key"""
+        results = []
+        stack = [self.root] if self.root else []
+        while stack:
+            node_key, items, children = stack.pop()
+            distance = hamming(key, node_key)
+            if distance <= radius:
+                results.extend((distance, item) for item in items)
+            # Triangle inequality: only these subtrees can hold matches
+            for child_distance, child in children.items():
+                if distance - radius <= child_distance <= distance + radius:
+                    stack.append(child)
+        return results
+
+
+class SimilarityIndex:
+    """SQLite store of fingerprints, searched through a BK-tree and an inverted index"""
+
+    def __init__(self, path=None):
+        self.path = path or config.SIMILARITY_DB
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        self._tree = BKTree()
+        self._tree_rowid = 0
+        self._tree_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, work_id, content_hash, fingerprint):
+        """Index the fingerprint of a registered work"""
+        now = time.time()
+        with self._conn() as conn:
+            if fingerprint["kind"] == "image":
+                conn.execute(
+                    "INSERT OR REPLACE INTO image_fingerprints VALUES (?, ?, ?, ?, ?)",
+                    (work_id, content_hash, f"{fingerprint['phash']:016x}",
+                     f"{fingerprint['dhash']:016x}", now),
+                )
+            else:
+                subprints = fingerprint["subprints"]
+                conn.execute("DELETE FROM audio_postings WHERE work_id = ?", (work_id,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO audio_fingerprints VALUES (?, ?, ?, ?, ?)",
+                    (work_id, content_hash, fingerprint["duration"], json.dumps(subprints), now),
+                )
+                conn.executemany(
+                    "INSERT INTO audio_postings VALUES (?, ?, ?)",
+                    [(value, work_id, i) for i, value in enumerate(subprints) if value],
+                )
+
+    def has(self, work_id):
+        conn = self._conn()
+        return bool(
+            conn.execute("SELECT 1 FROM image_fingerprints WHERE work_id = ?", (work_id,)).fetchone()
+            or conn.execute("SELECT 1 FROM audio_fingerprints WHERE work_id = ?", (work_id,)).fetchone()
+        )
+
+    def get(self, work_id):
+        """Stored fingerprint of work_id, or None"""
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT phash, dhash FROM image_fingerprints WHERE work_id = ?", (work_id,)
+        ).fetchone()
+        if row:
+            return {"kind": "image", "phash": int(row[0], 16), "dhash": int(row[1], 16)}
+        row = conn.execute(
+            "SELECT duration, subprints FROM audio_fingerprints WHERE work_id = ?", (work_id,)
+        ).fetchone()
+        if row:
+            return {"kind": "audio", "duration": row[0], "subprints": json.loads(row[1])}
+        return None
+
+    def _refresh_tree(self):
+        """Add image rows written since the last lookup (also by other processes)"""
+        rows = self._conn().execute(
+            "SELECT rowid, work_id, content_hash, phash, dhash FROM image_fingerprints "
+            "WHERE rowid > ? ORDER BY rowid",
+            (self._tree_rowid,),
+        ).fetchall()
+        for rowid, work_id, content_hash, phash, dhash in rows:
+            self._tree.add(int(phash, 16), (work_id, content_hash, int(dhash, 16)))
+            self._tree_rowid = rowid
+
+    def similar_images(self, phash, dhash, max_distance=None):
+        max_distance = config.SIMILAR_IMAGE_DISTANCE if max_distance is None else max_distance
+        with self._tree_lock:
+            self._refresh_tree()
+            candidates = self._tree.search(phash, max_distance)
+        matches = []
+        for distance, (work_id, content_hash, candidate_dhash) in candidates:
+            dhash_distance = hamming(dhash, candidate_dhash)
+            if dhash_distance <= max_distance:
+                matches.append({
+                    "work_id": work_id, "content_hash": content_hash, "kind": "image",
+                    "similarity": 1 - max(distance, dhash_distance) / 64,
+                    "distance": distance,
+                })
+        return matches
+
+    def similar_audio(self, subprints, max_ber=None):
+        max_ber = config.SIMILAR_AUDIO_MAX_BER if max_ber is None else max_ber
+        positions = {}
+        for i, value in enumerate(subprints):
+            if value:
+                positions.setdefault(value, []).append(i)
+
+        # Every shared sub-fingerprint votes for (work, time offset)
+        votes = Counter()
+        conn = self._conn()
+        keys = list(positions)
+        for i in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys[i:i + QUERY_CHUNK]
+            rows = conn.execute(
+                f"SELECT subprint, work_id, position FROM audio_postings "
+                f"WHERE subprint IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for value, work_id, position in rows:
+                for query_position in positions[value]:
+                    votes[work_id, position - query_position] += 1
+
+        best = {}
+        for (work_id, offset), count in votes.most_common():
+            if work_id not in best and count >= 2:
+                best[work_id] = offset
+            if len(best) >= config.SIMILAR_MAX_RESULTS * 2:
+                break
+
+        matches = []
+        for work_id, offset in best.items():
+            row = conn.execute(
+                "SELECT content_hash, subprints FROM audio_fingerprints WHERE work_id = ?", (work_id,)
+            ).fetchone()
+            if not row:
+                continue
+            ber, overlap = bit_error_rate(subprints, json.loads(row[1]), offset)
+            if ber <= max_ber and overlap >= MIN_AUDIO_OVERLAP:
+                matches.append({
+                    "work_id": work_id, "content_hash": row[0], "kind": "audio",
+                    "similarity": 1 - ber, "offset_seconds": round(offset * SUBPRINT_SECONDS, 1),
+                })
+        return matches
+
+    def similar(self, fingerprint, limit=None):
+        """Indexed works resembling fingerprint, most similar first"""
+        if fingerprint["kind"] == "image":
+            matches = self.similar_images(fingerprint["phash"], fingerprint["dhash"])
+        else:
+            matches = self.similar_audio(fingerprint["subprints"])
+        matches.sort(key=lambda match: -match["similarity"])
+        return matches[:limit or config.SIMILAR_MAX_RESULTS]
+
+    def stats(self):
+        conn = self._conn()
+        return {
+            "images": conn.execute("SELECT COUNT(*) FROM image_fingerprints").fetchone()[0],
+            "audio": conn.execute("SELECT COUNT(*) FROM audio_fingerprints").fetchone()[0],
+        }
+
+
+def open_index():
+    """Process-wide similarity index, or None if disabled"""
+    if not config.SIMILARITY_ENABLED:
+        return None
+    return SimilarityIndex()
+
+
+def backfill(index, blobs):
+    """Fingerprint stored uploads of works not in the index yet; returns number added"""
+    added = 0
+    for content_hash, work_id, filename in blobs.iter_refs():
+        if not filename or index.has(work_id):
+            continue
+        path = blobs.path_for(content_hash)
+        if not os.path.exists(path):
+            continue
+        fingerprint = fingerprint_file(path, filename)
+        if fingerprint:
+            index.add(work_id, content_hash, fingerprint)
+            added += 1
+    return added
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ("backfill", "stats", "query") or (args[0] == "query" and len(args) < 2):
+        print("Usage:")
+        print("  python similarity.py backfill       # fingerprint stored uploads")
+        print("  python similarity.py stats")
+        print("  python similarity.py query <file>   # registered works similar to a file")
+        sys.exit(1)
+
+    index = SimilarityIndex()
+    if args[0] == "stats":
+        stats = index.stats()
+        print(f"📄 {stats['images']} image and {stats['audio']} audio fingerprints")
+    elif args[0] == "backfill":
+        import blob_store
+        print(f"✓ Fingerprinted {backfill(index, blob_store.BlobStore())} stored uploads")
+    else:
+        fingerprint = fingerprint_file(args[1], os.path.basename(args[1]))
+        if not fingerprint:
+            print(f"✗ Cannot fingerprint {args[1]} (supported: images with Pillow, mp3 with fpcalc)")
+            sys.exit(1)
+        matches = index.similar(fingerprint)
+        if not matches:
+            print("✓ No similar registered works")
+        for match in matches:
+            print(f"⚠️  {match['work_id']}  {match['similarity']:.0%} similar ({match['kind']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Shared fixtures: an in-process eth-tester chain (pip install "web3[tester]")
+and the registry contracts compiled from source with SOLC_PATH (tests that
+deploy them skip without solc)
+"""
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import config  # noqa: E402
+import registry_client  # noqa: E402
+
+
+@pytest.fixture
+def w3(monkeypatch):
+    from web3 import Web3, EthereumTesterProvider
+    w3 = Web3(EthereumTesterProvider())
+    monkeypatch.setattr(config, "CHAIN_ID", w3.eth.chain_id)
+    return w3
+
+
+@pytest.fixture
+def account(w3):
+    """Local account of the first funded eth-tester key"""
+    from eth_account import Account
+    key = w3.provider.ethereum_tester.backend.account_keys[0]
+    return Account.from_key(key.to_bytes())
+
+
+@pytest.fixture(scope="session")
+def compiled():
+    """{contract name: (abi, bytecode)} of both registry versions"""
+    if not shutil.which(config.SOLC_PATH):
+        pytest.skip(f"{config.SOLC_PATH} not found; install solc >= 0.8.26 or set SOLC_PATH")
+    return registry_client.compile_contracts(
+        os.path.join(ROOT, "copyright_registry.sol"), os.path.join(ROOT, "copyright_registry_v2.sol")
+    )
+
+
+@pytest.fixture
+def deploy(w3, compiled):
+    """deploy(name, *constructor_args) -> contract, sent from the first eth-tester account"""
+    def deploy(name, *args):
+        abi, bytecode = compiled[name]
+        tx_hash = w3.eth.contract(abi=abi, bytecode=bytecode).constructor(*args).transact(
+            {"from": w3.eth.accounts[0]}
+        )
+        address = w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+        return w3.eth.contract(address=address, abi=abi)
+    return deploy
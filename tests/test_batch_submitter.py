@@ -0,0 +1,45 @@
+"""BatchSubmitter refuses to start against a deployment without registerWorks"""
+import pytest
+from eth_utils import function_abi_to_4byte_selector
+
+import batch_submitter
+import registration_queue
+
+REGISTER_WORKS = {
+    "type": "function", "name": "registerWorks", "stateMutability": "nonpayable", "outputs": [],
+    "inputs": [{"name": name, "type": "string[]"}
+               for name in ("workIds", "titles", "workTypes", "contentHashes", "metadatas")]
+    + [{"name": "skipDuplicates", "type": "bool"}],
+}
+
+
+def deploy_runtime(w3, runtime):
+    """Deploy runtime bytecode (hex, no 0x) as is; returns its address"""
+    size = len(runtime) // 2
+    init = f"60{size:02x}600c60003960{size:02x}6000f3"
+    tx_hash = w3.eth.send_transaction({"from": w3.eth.accounts[0], "data": "0x" + init + runtime})
+    return w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return registration_queue.RegistrationQueue(str(tmp_path / "registrations.db"))
+
+
+@pytest.mark.parametrize("dispatches, starts", [(True, True), (False, False)],
+                         ids=["registerWorks", "older-build"])
+def test_start_checks_deployed_code(w3, queue, dispatches, starts):
+    # PUSH4 <selector>, as solc's dispatcher does for every function it has
+    selector = function_abi_to_4byte_selector(REGISTER_WORKS).hex().removeprefix("0x")
+    address = deploy_runtime(w3, ("63" + selector if dispatches else "6300000000") + "00")
+    contract = w3.eth.contract(address=address, abi=[REGISTER_WORKS])
+
+    assert batch_submitter.deployed_without_batches(w3, contract) is not starts
+    submitter = batch_submitter.BatchSubmitter(w3, contract, queue, key_signer=object())
+    assert (submitter.start() is not None) is starts
+    submitter.stop()
+
+
+def test_abi_without_register_works_refuses(w3):
+    address = deploy_runtime(w3, "00")
+    assert batch_submitter.deployed_without_batches(w3, w3.eth.contract(address=address, abi=[]))
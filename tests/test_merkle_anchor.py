@@ -0,0 +1,120 @@
+"""Merkle trees, proofs and their check by the contract's verifyAnchored"""
+import json
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+import config
+import merkle_anchor
+import nonce_manager
+import registration_queue
+import signer
+
+CREATOR = "0x" + "ab" * 20
+
+
+def works(count):
+    """(work_id, content_hash, creator, metadata) of count distinct works"""
+    return [
+        (f"WORK-{i:08X}", Web3.keccak(text=str(i)).hex().removeprefix("0x"), CREATOR, f"work {i}")
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("count", range(1, 34))
+def test_every_proof_folds_to_the_root(count):
+    leaves = [merkle_anchor.leaf_hash(*work) for work in works(count)]
+    levels = merkle_anchor.build_levels(leaves)
+    [root] = levels[-1]
+
+    for i, leaf in enumerate(leaves):
+        proof = merkle_anchor.proof_for(levels, i)
+        assert len(proof) <= (count - 1).bit_length()
+        assert merkle_anchor.compute_root(leaf, proof) == root
+        # The proof is only valid for its own leaf
+        if count > 1:
+            other = leaves[(i + 1) % count]
+            assert merkle_anchor.compute_root(other, proof) != root
+
+
+def test_leaf_covers_every_field():
+    work_id, content_hash, creator, metadata = works(1)[0]
+    leaf = merkle_anchor.leaf_hash(work_id, content_hash, creator, metadata)
+
+    # Hash and address spelling don't matter
+    assert merkle_anchor.leaf_hash(
+        work_id, "0x" + content_hash.upper(), Web3.to_checksum_address(creator), metadata
+    ) == leaf
+    assert merkle_anchor.leaf_hash(work_id + "0", content_hash, creator, metadata) != leaf
+    assert merkle_anchor.leaf_hash(work_id, content_hash[::-1], creator, metadata) != leaf
+    assert merkle_anchor.leaf_hash(work_id, content_hash, "0x" + "cd" * 20, metadata) != leaf
+    assert merkle_anchor.leaf_hash(work_id, content_hash, creator, metadata + " ") != leaf
+
+
+def test_build_levels_rejects_empty_batch():
+    with pytest.raises(ValueError):
+        merkle_anchor.build_levels([])
+
+
+@pytest.fixture
+def registry(w3, deploy):
+    w3.eth.default_account = w3.eth.accounts[0]
+    return deploy("CopyrightRegistry")
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 8, 13])
+def test_contract_verifies_python_proofs(w3, registry, count):
+    batch = works(count)
+    leaves = [merkle_anchor.leaf_hash(*work) for work in batch]
+    levels = merkle_anchor.build_levels(leaves)
+    [root] = levels[-1]
+
+    proof = merkle_anchor.proof_for(levels, 0)
+    assert not registry.functions.verifyAnchored(leaves[0], proof, root).call()
+
+    w3.eth.wait_for_transaction_receipt(registry.functions.anchorRoot(root, count).transact())
+    for i, leaf in enumerate(leaves):
+        proof = merkle_anchor.proof_for(levels, i)
+        assert registry.functions.verifyAnchored(leaf, proof, root).call()
+        assert not registry.functions.verifyAnchored(Web3.keccak(leaf), proof, root).call()
+
+    work_id, content_hash, creator, metadata = batch[-1]
+    record = {
+        "work_id": work_id, "content_hash": content_hash, "creator": creator, "metadata": metadata,
+        "root": Web3.to_hex(root),
+        "proof": [Web3.to_hex(node) for node in merkle_anchor.proof_for(levels, count - 1)],
+    }
+    assert merkle_anchor.check_proof(registry, record)["valid"]
+
+
+def test_only_owner_anchors(w3, registry):
+    root = merkle_anchor.build_levels([merkle_anchor.leaf_hash(*works(1)[0])])[-1][0]
+    with pytest.raises(Exception, match="Only owner"):
+        registry.functions.anchorRoot(root, 1).transact({"from": w3.eth.accounts[1]})
+
+
+def test_non_owner_anchor_fails_its_works(w3, registry, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "NONCE_DB", str(tmp_path / "nonces.db"))
+    monkeypatch.setattr(nonce_manager, "_managers", {})
+    key = w3.provider.ethereum_tester.backend.account_keys[1].to_bytes()
+    keystore = tmp_path / "keystore.json"
+    keystore.write_text(json.dumps(Account.encrypt(key, "pw", kdf="pbkdf2", iterations=1)))
+    not_owner = signer.Signer(str(keystore))
+    not_owner.unlock("pw")
+
+    queue = registration_queue.RegistrationQueue(str(tmp_path / "registrations.db"))
+    for work_id, content_hash, creator, metadata in works(3):
+        queue.add_queued(work_id, "t", "image", content_hash, metadata, creator)
+    store = merkle_anchor.AnchorStore(str(tmp_path / "anchors.db"))
+    anchorer = merkle_anchor.Anchorer(w3, registry, queue, store, not_owner)
+
+    assert anchorer.anchor_once() == 0
+    for work_id, *_ in works(3):
+        registration = queue.get(work_id)
+        assert registration["status"] == registration_queue.FAILED
+        assert "Only owner" in registration["error"]
+        assert store.get(work_id) is None
+    # The reverting anchorRoot was never broadcast
+    assert w3.eth.get_transaction_count(not_owner.address) == 0
+    assert queue.queued() == []
@@ -0,0 +1,111 @@
+"""NonceManager against eth-tester: allocation, reuse, gap fill and replacement"""
+import threading
+
+import pytest
+
+import config
+import fee_oracle
+import nonce_manager
+
+
+@pytest.fixture
+def nonces(w3, account, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "NONCE_STUCK_AFTER", 0)
+    return nonce_manager.NonceManager(w3, account.address, path=str(tmp_path / "nonces.db"))
+
+
+def send(w3, nonces, account, nonce, **fees):
+    """Broadcast a zero-value self-transfer at nonce and record it"""
+    tx = {
+        "from": account.address,
+        "to": account.address,
+        "value": 0,
+        "nonce": nonce,
+        "gas": 21000,
+        "chainId": config.CHAIN_ID,
+        **(fees or fee_oracle.get_oracle(w3).fees()),
+    }
+    tx_hash = w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction)
+    nonces.mark_sent(nonce, tx_hash, tx)
+    return tx_hash
+
+
+def test_concurrent_allocations_are_distinct(w3, account, nonces):
+    # A second manager on the same database stands in for another process
+    other = nonce_manager.NonceManager(w3, account.address, path=nonces.path)
+    allocated = []
+    lock = threading.Lock()
+
+    def worker(manager):
+        for _ in range(20):
+            nonce = manager.allocate()
+            with lock:
+                allocated.append(nonce)
+
+    threads = [threading.Thread(target=worker, args=(manager,))
+               for manager in [nonces, other] * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(allocated) == list(range(160))
+
+
+def test_released_nonce_is_reused(nonces):
+    first = nonces.allocate()
+    second = nonces.allocate()
+    nonces.release(first)
+
+    assert nonces.allocate() == first
+    assert nonces.allocate() == second + 1
+
+
+def test_repair_fills_gap(w3, account, nonces):
+    abandoned = nonces.allocate()  # reserved, never broadcast
+    assert nonces.find_gaps() == [abandoned]
+    assert nonces.needs_repair()
+
+    assert nonces.repair(account) == 1
+    assert w3.eth.get_transaction_count(account.address) == abandoned + 1
+    nonces.sync()
+    assert nonces.find_gaps() == []
+    assert not nonces.needs_repair()
+
+
+def test_repair_claims_gap_before_filling(w3, account, nonces, monkeypatch):
+    gap = nonces.allocate()
+    nonces.release(gap)
+    handed_out = []
+    send_fill = nonces._send
+
+    def allocate_mid_fill(*args):
+        # A /register request landing between the gap being signed and broadcast
+        handed_out.append(nonces.allocate())
+        return send_fill(*args)
+
+    monkeypatch.setattr(nonces, "_send", allocate_mid_fill)
+    assert nonces.repair(account) == 1
+    assert handed_out == [gap + 1]
+
+
+def test_repair_bumps_both_fee_fields(w3, account, nonces):
+    tester = w3.provider.ethereum_tester
+    tester.disable_auto_mine_transactions()
+    nonce = nonces.allocate()
+    old_hash = send(w3, nonces, account, nonce, maxFeePerGas=10**9, maxPriorityFeePerGas=10**9)
+    [(_, _, old_tx)] = nonces.find_stuck()
+
+    replaced = []
+    assert nonces.repair(account, on_replaced=lambda old, new: replaced.append((old, new))) == 1
+
+    [(stuck_nonce, new_hash, new_tx)] = nonces.find_stuck()
+    assert stuck_nonce == nonce
+    assert replaced == [(w3.to_hex(old_hash), new_hash)]
+    for field in ("maxFeePerGas", "maxPriorityFeePerGas"):
+        assert new_tx[field] >= int(old_tx[field] * config.NONCE_REPLACE_BUMP)
+    assert new_tx["maxFeePerGas"] >= new_tx["maxPriorityFeePerGas"]
+
+    tester.enable_auto_mine_transactions()
+    receipt = w3.eth.wait_for_transaction_receipt(new_hash)
+    assert receipt["status"] == 1
@@ -0,0 +1,92 @@
+"""ReceiptConfirmer against eth-tester: timeouts expire registrations instead of failing them"""
+import pytest
+
+import config
+import fee_oracle
+import registration_queue
+import registry_v2
+
+# LOG2(topic0 = calldata[0:32], topic1 = calldata[32:64]): stands in for the
+# registry's WorkRegistered event without compiling it
+LOG_EMITTER = "0x600c80600b6000396000f3" "60203560003560006000a200"
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return registration_queue.RegistrationQueue(str(tmp_path / "registrations.db"))
+
+
+@pytest.fixture
+def emitter(w3):
+    tx_hash = w3.eth.send_transaction({"from": w3.eth.accounts[1], "data": LOG_EMITTER})
+    return w3.eth.wait_for_transaction_receipt(tx_hash)["contractAddress"]
+
+
+@pytest.fixture
+def confirmer(w3, queue, emitter, monkeypatch):
+    monkeypatch.setattr(config, "CONFIRM_TIMEOUT", 0)
+    monkeypatch.setattr(config, "CONFIRM_HEADS_URL", "")
+    w3.provider.ethereum_tester.disable_auto_mine_transactions()
+    return registration_queue.ReceiptConfirmer(w3, queue)
+
+
+def send(w3, account, to, work_id, nonce, tip_gwei=1):
+    """Sign and broadcast a call that logs work_id's WorkRegistered topic; returns its 0x tx hash"""
+    data = "0x" + "00" * 32 + registry_v2.work_id_topic(work_id)[2:]
+    fees = fee_oracle.get_oracle(w3).fees()
+    fees["maxPriorityFeePerGas"] = tip_gwei * 10**9
+    fees["maxFeePerGas"] += tip_gwei * 10**9
+    tx = {"from": account.address, "to": to, "value": 0, "data": data, "nonce": nonce,
+          "gas": 50000, "chainId": config.CHAIN_ID, **fees}
+    return w3.to_hex(w3.eth.send_raw_transaction(account.sign_transaction(tx).raw_transaction))
+
+
+def add(queue, work_id, tx_hash, account):
+    queue.add_pending(work_id, "t", "image", work_id.lower() * 4, "", account.address, tx_hash)
+
+
+def test_timed_out_registration_expires_and_confirms_late(w3, account, queue, confirmer, emitter):
+    tx_hash = send(w3, account, emitter, "WORK-LATE", 0)
+    add(queue, "WORK-LATE", tx_hash, account)
+
+    confirmer.confirm_once()
+    registration = queue.get("WORK-LATE")
+    assert registration["status"] == registration_queue.EXPIRED
+    # Still blocks a second registration of the same content, and keeps its upload
+    assert queue.find_pending_by_hash(registration["content_hash"]) == "WORK-LATE"
+    assert queue.failed_work_ids() == []
+
+    w3.provider.ethereum_tester.mine_blocks()
+    confirmer.confirm_once()
+    registration = queue.get("WORK-LATE")
+    assert registration["status"] == registration_queue.CONFIRMED
+    assert registration["error"] is None
+
+
+def test_replacement_is_followed_after_expiry(w3, account, queue, confirmer, emitter):
+    old_hash = send(w3, account, emitter, "WORK-BUMPED", 0)
+    add(queue, "WORK-BUMPED", old_hash, account)
+    confirmer.confirm_once()
+
+    new_hash = send(w3, account, emitter, "WORK-BUMPED", 0, tip_gwei=2)
+    queue.replace_tx_hash(old_hash, new_hash)
+    w3.provider.ethereum_tester.mine_blocks()
+    confirmer.confirm_once()
+
+    registration = queue.get("WORK-BUMPED")
+    assert (registration["status"], registration["tx_hash"]) == (registration_queue.CONFIRMED, new_hash)
+
+
+def test_fails_once_another_transaction_takes_the_nonce(w3, account, queue, confirmer, emitter):
+    add(queue, "WORK-DROPPED", send(w3, account, emitter, "WORK-DROPPED", 0), account)
+    confirmer.confirm_once()
+
+    # A replacement the queue never heard of
+    send(w3, account, emitter, "WORK-OTHER", 0, tip_gwei=2)
+    w3.provider.ethereum_tester.mine_blocks()
+    confirmer.confirm_once()
+
+    registration = queue.get("WORK-DROPPED")
+    assert registration["status"] == registration_queue.FAILED
+    assert registration["error"] == "Nonce 0 was used by another transaction"
+    assert queue.failed_work_ids() == ["WORK-DROPPED"]
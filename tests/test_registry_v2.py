@@ -0,0 +1,86 @@
+"""v2 layout: key encoding and CopyrightRegistryV2 read back through registry_v2.wrap"""
+import hashlib
+
+import pytest
+
+import config
+import registry_client
+import registry_v2
+
+WORK_ID = "WORK-1A2B3C4D"
+CONTENT_HASH = hashlib.sha256(b"sunset").hexdigest()
+
+
+def test_keys_round_trip():
+    assert registry_v2.decode_work_id(registry_v2.encode_work_id(WORK_ID)) == WORK_ID
+    assert registry_v2.decode_content_hash(registry_v2.encode_content_hash("0x" + CONTENT_HASH.upper())) == CONTENT_HASH
+    assert registry_v2.decode_work_id(bytes(16)) == ""
+    assert registry_v2.decode_content_hash(bytes(32)) == ""
+    with pytest.raises(ValueError):
+        registry_v2.encode_work_id("WORK-" + "0" * 12)
+    with pytest.raises(ValueError):
+        registry_v2.encode_content_hash(CONTENT_HASH[:-2])
+
+
+def test_compiled_bytecode_matches_abi(compiled):
+    for name, (abi, bytecode) in compiled.items():
+        assert registry_client.missing_functions(abi, bytecode) == [], name
+
+
+@pytest.fixture(params=[True, False], ids=["stored-text", "events-only"])
+def registry(request, w3, deploy, monkeypatch):
+    monkeypatch.setattr(config, "CONTRACT_VERSION", 2)
+    contract = deploy("CopyrightRegistryV2", request.param)
+    assert contract.functions.storeDetails().call() is request.param
+    return registry_v2.wrap(contract)
+
+
+def test_register_and_read_back(w3, registry):
+    creator = w3.eth.accounts[0]
+    stored = registry.contract.functions.storeDetails().call()
+    tx_hash = registry.functions.registerWork(
+        WORK_ID, "Sunset", "image", CONTENT_HASH, '{"license": "CC-BY-4.0"}'
+    ).transact({"from": creator})
+    w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    details = registry.functions.getWorkDetails(WORK_ID).call()
+    assert isinstance(details, registry_v2.WorkRegistration)
+    assert details.work_id == WORK_ID
+    assert details.content_hash == CONTENT_HASH
+    assert details.creator == creator
+    assert details.timestamp > 0
+    # Without stored text the fields only live in the WorkRegistered event
+    if stored:
+        assert (details.title, details.type, details.metadata) == ("Sunset", "image", '{"license": "CC-BY-4.0"}')
+    else:
+        assert (details.title, details.type, details.metadata) == ("", "", "")
+    [log] = registry.events.WorkRegistered().get_logs(from_block=0)
+    assert registry_v2.event_row(log) == (
+        WORK_ID, "Sunset", "image", CONTENT_HASH, creator, details.timestamp, '{"license": "CC-BY-4.0"}'
+    )
+
+    other_hash = hashlib.sha256(b"other").hexdigest()
+    assert registry.functions.verifyWork(WORK_ID, CONTENT_HASH).call()
+    assert not registry.functions.verifyWork(WORK_ID, other_hash).call()
+    assert registry.functions.checkContentExists(CONTENT_HASH).call() == WORK_ID
+    assert registry.functions.checkContentsExist([other_hash, CONTENT_HASH]).call() == ["", WORK_ID]
+    assert registry.functions.getCreatorWorks(creator).call() == [WORK_ID]
+    assert registry.functions.getWorksDetails([WORK_ID]).call() == [details]
+    assert registry.functions.getCreatorWorksPage(creator, 0, 10).call() == [details]
+
+
+def test_batch_skips_duplicates(w3, registry):
+    creator = w3.eth.accounts[0]
+    work_ids = [f"WORK-{i:08X}" for i in range(3)]
+    hashes = [hashlib.sha256(work_id.encode()).hexdigest() for work_id in work_ids]
+    w3.eth.wait_for_transaction_receipt(registry.functions.registerWork(
+        work_ids[1], "t", "image", hashes[1], ""
+    ).transact({"from": creator}))
+
+    tx_hash = registry.functions.registerWorks(
+        work_ids, ["t"] * 3, ["image"] * 3, hashes, [""] * 3, True
+    ).transact({"from": creator})
+    w3.eth.wait_for_transaction_receipt(tx_hash)
+
+    assert registry.functions.getCreatorWorks(creator).call() == [work_ids[1], work_ids[0], work_ids[2]]
+    assert [details.content_hash for details in registry.functions.getWorksDetails(work_ids).call()] == hashes
@@ -0,0 +1,101 @@
+"""Hash uploads while the request body streams in.
+
+Werkzeug's multipart parser writes each uploaded file into a stream obtained
+from Request._get_file_stream. HashingRequest hands it a HashingSpool, which
+feeds every chunk to SHA-256 as it arrives, so the hash is ready the moment
+parsing finishes and the file never has to be read back.
+
+- /verify only needs the hash: the spool keeps no data at all.
+- Other endpoints (/register) keep the bytes in memory (on disk in a
+  temporary file past UPLOAD_SPOOL_SIZE) until the view decides to persist
+  them, i.e. after the duplicate check.
+"""
+from flask import Request
+from tempfile import SpooledTemporaryFile
+import hashlib
+import io
+import config
+
+# Endpoints whose uploads are hashed and then discarded
+HASH_ONLY_ENDPOINTS = {"verify"}
+
+COPY_BUFFER = 1024 * 1024
+
+
+class HashingSpool(io.RawIOBase):
+    """Writable file object that hashes everything written to it"""
+
+    def __init__(self, keep=True, spool_size=None):
+        super().__init__()
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+        self._buffer = SpooledTemporaryFile(
+            max_size=config.UPLOAD_SPOOL_SIZE if spool_size is None else spool_size
+        ) if keep else None
+
+    def writable(self):
+        return True
+
+    def readable(self):
+        return self._buffer is not None
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        self._sha256.update(data)
+        self.size += len(data)
+        if self._buffer is not None:
+            self._buffer.write(data)
+        return len(data)
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._buffer.seek(offset, whence) if self._buffer is not None else 0
+
+    def tell(self):
+        return self._buffer.tell() if self._buffer is not None else self.size
+
+    def read(self, size=-1):
+        return self._buffer.read(size) if self._buffer is not None else b""
+
+    def readinto(self, b):
+        if self._buffer is None:
+            return 0
+        data = self._buffer.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if self._buffer is not None:
+            self._buffer.close()
+        super().close()
+
+    def hexdigest(self):
+        return self._sha256.hexdigest()
+
+
+class HashingRequest(Request):
+    """Flask request whose file uploads are hashed during parsing"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        return HashingSpool(keep=self.endpoint not in HASH_ONLY_ENDPOINTS)
+
+
+def upload_hash(file_storage):
+    """SHA-256 hex of an uploaded FileStorage (no extra read if it was spooled)"""
+    stream = file_storage.stream
+    if isinstance(stream, HashingSpool):
+        return stream.hexdigest()
+    # Small uploads parsed into memory or a plain stream: hash with one buffer
+    sha256_hash = hashlib.sha256()
+    buffer = bytearray(COPY_BUFFER)
+    view = memoryview(buffer)
+    stream.seek(0)
+    while True:
+        n = stream.readinto(buffer)
+        if not n:
+            break
+        sha256_hash.update(view[:n])
+    stream.seek(0)
+    return sha256_hash.hexdigest()
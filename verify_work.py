@@ -1,18 +1,29 @@
 #!/usr/bin/env python3
-from web3 import Web3
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import glob
 import json
-import hashlib
+import os
 import sys
+import time
 from datetime import datetime
 import config
+import indexer
+import batch_reads
+import registry_client
+import merkle_anchor
+from file_hash import calculate_file_hash
 
-def calculate_file_hash(filepath):
-    """Calculate SHA-256 hash of a file"""
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+# Batch verification outcomes
+MATCHED = "matched"
+UNMATCHED = "unmatched"
+TAMPERED = "tampered"
+ERROR = "error"
+
+RESULT_FIELDS = (
+    "input", "path", "content_hash", "expected_work_id", "status", "work_id",
+    "title", "type", "creator", "timestamp", "registered_hash", "anchor_root", "error",
+)
 
 def normalize_hash(h):
     """Normalize hex hash input: accept with/without 0x and lowercase"""
@@ -23,7 +34,7 @@ def normalize_hash(h):
         return h[2:].lower()
     return h.lower()
 
-def try_variants_check(contract, content_hash):
+def try_variants_check(contract, content_hash, index=None, anchors=None):
     """
     Try checking various variants of the provided hash against the contract:
     - as provided
@@ -39,12 +50,17 @@ def try_variants_check(contract, content_hash):
     variants = [base, "0x" + base]
     for v in variants:
         try:
-            work_id = contract.functions.checkContentExists(v).call()
+            work_id = indexer.find_work_by_hash(contract, v, index)
             if work_id:
                 return work_id
         except Exception:
             # ignore and try next variant
             pass
+
+    # Works anchored under a Merkle root are not in the contract's mappings
+    anchored = merkle_anchor.find_anchored(contract, anchors, content_hash=base)
+    if anchored and anchored[1]["valid"]:
+        return anchored[0]["work_id"]
     return ""
 
 def print_work_details(work_details):
@@ -60,11 +76,31 @@ def print_work_details(work_details):
     print(f"Metadata:     {work_details[6]}")
     print("═" * 60)
 
-def verify_work(work_id=None, filepath=None, content_hash_arg=None):
+def lookup_work(contract, work_id, index=None, anchors=None):
+    """
+    (details, anchor check) of work_id: registered in the contract (check is
+    None) or anchored under a Merkle root with a valid proof; raises if neither
+    """
+    try:
+        return indexer.get_work_details(contract, work_id, index), None
+    except Exception as e:
+        anchored = merkle_anchor.find_anchored(contract, anchors, work_id=work_id)
+        if not anchored:
+            raise
+        record, check = anchored
+        if not check["valid"]:
+            raise ValueError(f"Inclusion proof does not verify: {check['error']}") from e
+        return merkle_anchor.to_registration(record, check), check
+
+def print_anchor_check(check):
+    print(f"🌳 Anchored under Merkle root {check['root']}")
+    print(f"   Root committed on-chain by {check['submitter']} (registry operator); inclusion proof valid")
+
+def verify_work(work_id=None, filepath=None, content_hash_arg=None, use_replica=False):
     """Verify a work registration on the blockchain"""
     
     # Connect to blockchain
-    w3 = Web3(Web3.HTTPProvider(config.RPC_URL))
+    w3 = registry_client.get_web3()
     if not w3.is_connected():
         print("✗ Cannot connect to blockchain")
         return False
@@ -76,15 +112,18 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
         return False
     
     try:
-        with open(config.ABI_FILE, "r") as f:
-            abi = json.load(f)
+        contract = registry_client.get_contract(w3)
     except Exception as e:
         print(f"✗ Failed to load ABI file: {e}")
         return False
 
-    contract = w3.eth.contract(address=config.CONTRACT_ADDRESS, abi=abi)
     print(f"✓ Contract loaded\n")
 
+    # Serve lookups from the local read replica when requested
+    index = indexer.open_index() if use_replica else None
+    # Inclusion proofs of works anchored under a Merkle root
+    anchors = merkle_anchor.open_store()
+
     # If filepath provided, compute its hash
     file_hash = None
     if filepath:
@@ -109,8 +148,10 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
     # 4) Else -> error
     if work_id:
         try:
-            work_details = contract.functions.getWorkDetails(work_id).call()
+            work_details, anchor = lookup_work(contract, work_id, index, anchors)
             print_work_details(work_details)
+            if anchor:
+                print_anchor_check(anchor)
 
             # If file hash provided, verify hash matches
             target_hash = None
@@ -121,7 +162,11 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
 
             if target_hash:
                 try:
-                    is_valid = contract.functions.verifyWork(work_id, target_hash).call()
+                    if anchor:
+                        # The checked proof covers the content hash, so compare locally
+                        is_valid = normalize_hash(work_details[3]) == normalize_hash(target_hash)
+                    else:
+                        is_valid = contract.functions.verifyWork(work_id, target_hash).call()
                     if is_valid:
                         print("\n✅ File/hash MATCHES registered work!")
                         print("   This file/hash is authentic.")
@@ -140,10 +185,10 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
     if file_hash:
         try:
             print("🔍 Checking blockchain for this content hash...")
-            existing_work_id = try_variants_check(contract, file_hash)
+            existing_work_id = try_variants_check(contract, file_hash, index, anchors)
             if existing_work_id:
                 print(f"✅ This content is registered on blockchain! Work ID: {existing_work_id}\n")
-                return verify_work(work_id=existing_work_id, filepath=None)
+                return verify_work(work_id=existing_work_id, filepath=None, use_replica=use_replica)
             else:
                 print("⚠️  This content is NOT registered on blockchain")
                 print("   No matching registration found.")
@@ -156,10 +201,10 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
     if provided_hash:
         try:
             print("🔍 Checking blockchain for the provided content hash...")
-            existing_work_id = try_variants_check(contract, provided_hash)
+            existing_work_id = try_variants_check(contract, provided_hash, index, anchors)
             if existing_work_id:
                 print(f"✅ This content hash is registered on blockchain! Work ID: {existing_work_id}\n")
-                return verify_work(work_id=existing_work_id, filepath=None)
+                return verify_work(work_id=existing_work_id, filepath=None, use_replica=use_replica)
             else:
                 print("⚠️ This content hash is NOT registered on blockchain")
                 print("   No matching registration found.")
@@ -171,6 +216,231 @@ def verify_work(work_id=None, filepath=None, content_hash_arg=None):
     print("✗ Please provide either --id <WORK-ID> or --file <path> or --hash <content-hash>")
     return False
 
+def load_batch_items(source):
+    """
+    Items to verify from a directory, a glob, a .jsonl list of objects with
+    path / work_id / content_hash, or a newline list of hashes and work IDs
+    ("-" reads the list from stdin)
+    """
+    if os.path.isdir(source):
+        items = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                items.append({"input": path, "path": path})
+        return items
+    if any(ch in source for ch in "*?["):
+        return [
+            {"input": path, "path": path}
+            for path in sorted(glob.glob(source, recursive=True)) if os.path.isfile(path)
+        ]
+
+    f = sys.stdin if source == "-" else open(source)
+    items = []
+    with f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if source.endswith(".jsonl"):
+                record = json.loads(line)
+                item = {
+                    "input": record.get("path") or record.get("work_id") or record.get("content_hash"),
+                    "path": record.get("path"),
+                    "expected_work_id": record.get("work_id"),
+                    "content_hash": record.get("content_hash") or record.get("hash"),
+                }
+            elif line.upper().startswith("WORK-"):
+                item = {"input": line, "expected_work_id": line}
+            else:
+                item = {"input": line, "content_hash": line}
+            items.append({k: v for k, v in item.items() if v})
+    return items
+
+def _hash_path(path):
+    """Process-pool worker: (path, hash, error)"""
+    try:
+        return path, calculate_file_hash(path), None
+    except OSError as e:
+        return path, None, str(e)
+
+def _concurrent(rpc_pool, fn, keys):
+    """Run fn over BATCH_READ_SIZE chunks of keys on the RPC pool; results in order"""
+    size = config.BATCH_READ_SIZE
+    chunks = [keys[i:i + size] for i in range(0, len(keys), size)]
+    results = []
+    for part in rpc_pool.map(fn, chunks):
+        results.extend(part)
+    return results
+
+def resolve_window(w3, contract, items, index, hash_pool, rpc_pool, anchors=None, roots=None):
+    """Hash, look up and classify one window of batch items in place"""
+    paths = [item["path"] for item in items if item.get("path") and not item.get("content_hash")]
+    if paths:
+        hashes = {}
+        for path, content_hash, error in hash_pool.map(_hash_path, paths, chunksize=16):
+            hashes[path] = (content_hash, error)
+        for item in items:
+            if item.get("path") in hashes and not item.get("content_hash"):
+                item["content_hash"], error = hashes[item["path"]]
+                if error:
+                    item["status"], item["error"] = ERROR, error
+
+    # Hashes without an expected work ID: which work registered them?
+    lookup = sorted({
+        normalize_hash(item["content_hash"]) for item in items
+        if item.get("content_hash") and not item.get("expected_work_id") and "status" not in item
+    })
+    found = {}
+    if lookup:
+        check = lambda chunk: batch_reads.check_contents_exist(w3, contract, chunk, index)
+        found = dict(zip(lookup, _concurrent(rpc_pool, check, lookup)))
+        # Same variants as try_variants_check, but only for the misses
+        retry = [h for h in lookup if not found[h]]
+        if retry:
+            variants = ["0x" + h for h in retry]
+            found.update(zip(retry, _concurrent(rpc_pool, check, variants)))
+
+    for item in items:
+        if "status" not in item and not item.get("expected_work_id"):
+            item["work_id"] = found.get(normalize_hash(item.get("content_hash")), "")
+
+    work_ids = sorted({
+        item.get("expected_work_id") or item.get("work_id") for item in items
+        if "status" not in item and (item.get("expected_work_id") or item.get("work_id"))
+    })
+    details = {}
+    if work_ids:
+        fetch = lambda chunk: batch_reads.get_works_details(w3, contract, chunk, index)
+        details = dict(zip(work_ids, _concurrent(rpc_pool, fetch, work_ids)))
+
+    for item in items:
+        if "status" in item:
+            continue
+        work_id = item.get("expected_work_id") or item.get("work_id")
+        registered = details.get(work_id) if work_id else None
+        if not registered and anchors is not None and (work_id or item.get("content_hash")):
+            # Anchored works: one anchors() read per Merkle root, shared through roots
+            anchored = merkle_anchor.find_anchored(
+                contract, anchors, work_id=work_id, content_hash=item.get("content_hash"), roots=roots
+            )
+            if anchored and not anchored[1]["valid"]:
+                item["status"], item["error"] = ERROR, anchored[1]["error"]
+                continue
+            if anchored:
+                registered = merkle_anchor.to_registration(*anchored)
+                item["anchor_root"] = anchored[1]["root"]
+        if not registered:
+            item["status"] = UNMATCHED
+            continue
+        item.update({
+            "work_id": registered[0], "title": registered[1], "type": registered[2],
+            "registered_hash": registered[3], "creator": registered[4], "timestamp": registered[5],
+        })
+        if item.get("content_hash") and normalize_hash(registered[3]) != normalize_hash(item["content_hash"]):
+            item["status"] = TAMPERED
+        else:
+            item["status"] = MATCHED
+
+def verify_batch(source, output="-", workers=None, rpc_workers=None, use_replica=False):
+    """Verify many files, hashes or work IDs; returns the status counts"""
+    log = lambda message: print(message, file=sys.stderr)
+
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        log("✗ Cannot connect to blockchain")
+        return None
+    contract = registry_client.get_contract(w3)
+    index = indexer.open_index() if use_replica else None
+    anchors = merkle_anchor.open_store()
+    roots = {}
+
+    items = load_batch_items(source)
+    log(f"📄 {len(items)} items from {source}")
+
+    out = sys.stdout if output == "-" else open(output, "w", newline="")
+    writer = None
+    if output.endswith(".csv"):
+        writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+
+    counts = {MATCHED: 0, UNMATCHED: 0, TAMPERED: 0, ERROR: 0}
+    window = config.VERIFY_WINDOW
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or config.VERIFY_HASH_WORKERS) as hash_pool, \
+                ThreadPoolExecutor(max_workers=rpc_workers or config.VERIFY_RPC_WORKERS) as rpc_pool:
+            for i in range(0, len(items), window):
+                chunk = items[i:i + window]
+                try:
+                    resolve_window(w3, contract, chunk, index, hash_pool, rpc_pool, anchors, roots)
+                except Exception as e:
+                    for item in chunk:
+                        if "status" not in item:
+                            item["status"], item["error"] = ERROR, str(e)
+                for item in chunk:
+                    counts[item["status"]] += 1
+                    if writer:
+                        writer.writerow(item)
+                    else:
+                        out.write(json.dumps({k: item.get(k) for k in RESULT_FIELDS}) + "\n")
+                out.flush()
+                elapsed = time.perf_counter() - start
+                done = i + len(chunk)
+                log(f"⏳ {done}/{len(items)} verified ({done / elapsed:.0f} items/s)")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = time.perf_counter() - start
+    log(f"✓ {counts[MATCHED]} matched, {counts[UNMATCHED]} unmatched, "
+        f"{counts[TAMPERED]} tampered, {counts[ERROR]} errors in {elapsed:.1f}s")
+    if counts[TAMPERED]:
+        log("⚠️  Tampered items: content differs from the registered hash")
+    return counts
+
+def verify_proof_file(path, filepath=None, content_hash_arg=None):
+    """Check a proof bundle (GET /api/proofs/<work_id>) against the contract alone"""
+    try:
+        with open(path) as f:
+            bundle = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"✗ Cannot read proof file: {e}")
+        return False
+
+    w3 = registry_client.get_web3()
+    if not w3.is_connected():
+        print("✗ Cannot connect to blockchain")
+        return False
+    print("✓ Connected to blockchain")
+    contract = registry_client.get_contract(w3)
+    if not contract:
+        print("✗ CONTRACT_ADDRESS not set in config.py")
+        return False
+    if bundle.get("contract") and bundle["contract"].lower() != contract.address.lower():
+        print(f"⚠️  Proof names contract {bundle['contract']}, checking against {contract.address}")
+    print("✓ Contract loaded\n")
+
+    try:
+        check = merkle_anchor.check_proof(contract, bundle)
+    except (KeyError, ValueError) as e:
+        print(f"✗ Malformed proof: {e}")
+        return False
+    if not check["valid"]:
+        print(f"✗ Proof does not verify: {check['error']}")
+        return False
+    print_work_details(merkle_anchor.to_registration(bundle, check))
+    print_anchor_check(check)
+
+    target_hash = calculate_file_hash(filepath) if filepath else content_hash_arg
+    if target_hash:
+        if normalize_hash(target_hash) == normalize_hash(bundle["content_hash"]):
+            print("\n✅ File/hash MATCHES the anchored work!")
+        else:
+            print("\n⚠️ File/hash DOES NOT MATCH!")
+            return False
+    return True
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage:")
@@ -181,11 +451,35 @@ if __name__ == "__main__":
         print("\n  Verify by Content Hash (hex):")
         print("    python verify_work.py --hash 24466bbc756be2472263d11320757e475547cb75fa93b1309bc5b89248433462")
         print("\n  You can combine --id with --file or --hash to verify the provided file/hash against the on-chain record.")
+        print("  Add --replica to serve lookups from the local read replica (see indexer.py).")
+        print("\n  Check a Merkle inclusion proof (from /api/proofs/<work_id>), optionally against a file/hash:")
+        print("    python verify_work.py --proof WORK-12345678.json [--file myart.png]")
+        print("\n  Batch: a directory, glob, .jsonl list (path/work_id/content_hash) or")
+        print("  newline list of hashes and work IDs; results as JSONL (or CSV for *.csv):")
+        print("    python verify_work.py --batch archive/ [--output results.jsonl] [--workers N] [--rpc-workers N]")
         sys.exit(1)
     
+    if sys.argv[1] == "--batch" and len(sys.argv) > 2:
+        args = sys.argv[3:]
+        options = {}
+        for flag in ("--output", "--workers", "--rpc-workers"):
+            if flag in args:
+                options[flag] = args[args.index(flag) + 1]
+        counts = verify_batch(
+            sys.argv[2],
+            output=options.get("--output", "-"),
+            workers=int(options["--workers"]) if "--workers" in options else None,
+            rpc_workers=int(options["--rpc-workers"]) if "--rpc-workers" in options else None,
+            use_replica="--replica" in args,
+        )
+        # Non-zero exit for scripted sweeps when anything failed to verify
+        sys.exit(1 if counts is None or counts[TAMPERED] or counts[ERROR] else 0)
+    
     work_id = None
     filepath = None
     content_hash_arg = None
+    proof_path = None
+    use_replica = False
     
     i = 1
     while i < len(sys.argv):
@@ -198,7 +492,15 @@ if __name__ == "__main__":
         elif sys.argv[i] == "--hash" and i + 1 < len(sys.argv):
             content_hash_arg = sys.argv[i + 1]
             i += 2
+        elif sys.argv[i] == "--proof" and i + 1 < len(sys.argv):
+            proof_path = sys.argv[i + 1]
+            i += 2
+        elif sys.argv[i] == "--replica":
+            use_replica = True
+            i += 1
         else:
             i += 1
     
-    verify_work(work_id, filepath, content_hash_arg)
\ No newline at end of file
+    if proof_path:
+        sys.exit(0 if verify_proof_file(proof_path, filepath, content_hash_arg) else 1)
+    verify_work(work_id, filepath, content_hash_arg, use_replica)
\ No newline at end of file